@@ -2,3 +2,29 @@
 
 # Initial value for TEST_MODE
 TEST_MODE = False
+
+# Parallel verification of vouchers at profile login (see minuto_voucher.verify_many).
+# None uses the number of CPU cores. Threads are used by default, because worker processes started with "spawn"
+# (Windows, frozen app) would import the GUI again.
+VERIFICATION_WORKERS = None
+VERIFICATION_USE_PROCESSES = False
+
+# Strategy for the selection of the vouchers of a payment (see models/voucher_selection.py):
+# 'exact_match', 'fewest_vouchers', 'shortest_chain', 'oldest_expiry' or 'list_order'
+VOUCHER_SELECTION_STRATEGY = 'exact_match'
+
+# Compact binary serialization (see services/binary_format.py) instead of JSON for the local voucher and transaction
+# storage (BINARY_STORAGE) and for the files sent to other users (BINARY_TRANSFER). Both formats are always readable,
+# but versions without the binary format can't read binary files.
+BINARY_STORAGE = False
+BINARY_TRANSFER = False
+
+# Recalculate the balances of all vouchers on every balance query and compare them with the running balances of the
+# balance ledger (see models/balance_ledger.py). Raises a ValueError on a difference. For debugging and tests only.
+BALANCE_LEDGER_CHECK = False
+
+# Compaction of long transaction chains (see MinutoVoucher.compact_transactions): archived vouchers with more
+# transactions are compacted to a signed checkpoint and the last transaction at logout, the full history is archived
+# in the history folder. Only the local archive is compacted, vouchers are always sent with all transactions.
+# None disables the compaction.
+TRANSACTION_COMPACTION_THRESHOLD = None
@@ -58,9 +58,12 @@ class Dialog_Generate_Profile(QMainWindow, Ui_DialogGenerateProfile):
 class Dialog_Profile_Login(QMainWindow, Ui_DialogProfileLogin):
     profileLogin = Signal()
     overwritePassword = Signal()
-    def __init__(self):
+    def __init__(self, start_task):
         super().__init__()
         self.setupUi(self)
+        # starts the login (key derivation, decryption of the profile and the voucher index) in the background
+        # and blocks the windows meanwhile (see start_profile_task in qt_main.py)
+        self.start_task = start_task
         self.pushButton_OK.clicked.connect(self.check_password)
         self.lineEdit_entered_password.returnPressed.connect(self.check_password)
 
@@ -74,7 +77,12 @@ class Dialog_Profile_Login(QMainWindow, Ui_DialogProfileLogin):
 
     def check_password(self):
         password = self.lineEdit_entered_password.text()
-        if not user_profile.init_existing_profile(password):
+        self.start_task("Profil wird geladen ...", user_profile.init_existing_profile, password,
+                        on_result=self.login_finished,
+                        on_error=lambda error_msg: show_message_box("Fehler", error_msg))
+
+    def login_finished(self, logged_in):
+        if not logged_in:
             self.failed_attempts += 1  # Fehlgeschlagene Versuche erhöhen
             self.label_status.setText("Passwort falsch")
             self.lineEdit_entered_password.clear()
@@ -1,7 +1,7 @@
 # qt_main.py
-import re
+import os
 
-from PySide6.QtCore import QSortFilterProxyModel, Qt, QSize, QModelIndex, QDateTime
+from PySide6.QtCore import Qt, QSize, QModelIndex, QDateTime, Signal
 from PySide6.QtGui import QAction, QShowEvent, QIcon
 from PySide6.QtWidgets import QApplication, QStatusBar, QLabel, QHBoxLayout, QWidget, QPushButton, QFileDialog, \
     QCheckBox, QVBoxLayout, QMessageBox
@@ -24,8 +24,10 @@ from src.gui.qt.ui_components.dialog_forgot_password import Ui_DialogForgotPassw
 from src.models.user_transaction import UserTransaction
 from src.services.crypto_utils import verify_user_ID, check_word_seed
 
+from src.gui.qt.table_models import ObjectTableModel, TableColumn, CustomSortFilterProxyModel
+from src.gui.qt.task_runner import TaskRunner
 from src.gui.qt.utils import apply_global_styles, show_message_box, show_yes_no_box, DecimalFormatValidator, \
-    format_table_cell
+    TaskProgressDialog
 from src.models.user_profile import user_profile
 from src.models.minuto_voucher import MinutoVoucher, VoucherStatus
 from PySide6.QtGui import QStandardItemModel, QStandardItem
@@ -33,7 +35,26 @@ from PySide6.QtWidgets import QAbstractItemView
 from src import config
 
 
-from src.services.utils import dprint, display_balance, is_iso8601_datetime, is_password_valid
+from src.services.utils import dprint, is_password_valid
+
+
+def start_profile_task(message, function, *args, on_result=None, on_error=None, on_finished=None, **kwargs):
+    """
+    Starts a task that changes the user profile in the background (see TaskRunner.start).
+    The windows read the same objects (voucher lists, balances, vouchers of the table models), so a modal
+    progress dialog blocks all windows until the task is finished.
+    """
+    busy_dialog = TaskProgressDialog("Bitte warten", message)
+
+    def finish_and_call(callback):
+        def call(*args):
+            busy_dialog.finish()  # the function of the task has returned, the callbacks run in the GUI thread
+            if callback is not None:
+                callback(*args)
+        return call
+
+    return task_runner.start(function, *args, on_result=finish_and_call(on_result),
+                             on_error=finish_and_call(on_error), on_finished=finish_and_call(on_finished), **kwargs)
 
 
 def open_data_file(file_type=""):
@@ -50,23 +71,88 @@ def open_data_file(file_type=""):
     else:
         file_filter = "Gutschein/Unterschrift/Transaktions Dateien (*.mv *.ms *.mt);;Alle Dateien (*)"
 
-    # Create and open the dialog and get the file path
+    # Create and open the dialog and get the file paths (several files are imported with import_data_files)
     file_dialog = QFileDialog()
-    file_path, _ = file_dialog.getOpenFileName(None, "Open File", "", file_filter)
+    file_paths, _ = file_dialog.getOpenFileNames(None, "Open File", "", file_filter)
+    if len(file_paths) > 1:
+        import_data_files(file_paths)
+        return
 
-    if file_path:
-        # if not a voucher then None will be returned
-        voucher, transaction, info_msg = user_profile.open_file(file_path)
-        win['dialog_voucher_list'].init_values()
+    if file_paths:
+        # the file is decrypted and the vouchers are verified in the background
+        start_profile_task("Datei wird geöffnet ...", user_profile.open_file, file_paths[0],
+                           on_result=show_opened_file, on_error=lambda error_msg: show_message_box("Fehler", error_msg))
 
-        frm_main_window.update_values()  # update balances in main window
-        show_message_box("Info", info_msg) # display info to user
-        if voucher is not None:
-            win['form_show_voucher'].show_voucher(voucher)
 
-        if transaction is not None:
+def show_opened_file(result):
+    """
+    Shows the result of user_profile.open_file (voucher, transaction, info_msg) and updates the windows.
+    """
+    # if not a voucher then None will be returned
+    voucher, transaction, info_msg = result
+    win['dialog_voucher_list'].init_values()
+
+    frm_main_window.update_values()  # update balances in main window
+    show_message_box("Info", info_msg) # display info to user
+    if voucher is not None:
+        win['form_show_voucher'].show_voucher(voucher)
+
+    if transaction is not None:
+        win['dialog_transaction_list'].init_show()
+
+
+def import_data_files(file_paths):
+    """
+    Imports several transaction, voucher or signature files (or all files of a directory) in the background
+    with a progress dialog and shows a summary of the results.
+    """
+    # the dialog blocks all windows, so no window reads the profile while the files are imported
+    progress_dialog = TaskProgressDialog("Import", "Dateien werden importiert ...", "Abbrechen", len(file_paths))
+
+    def import_files(task):
+        results = []
+        for result in user_profile.import_files(
+                file_paths, progress_callback=lambda done, total, *_: task.report_progress(done, total)):
+            results.append(result)
+            if task.is_canceled():
+                break
+        return results
+
+    def show_progress(done, total):
+        progress_dialog.setMaximum(total)
+        progress_dialog.setValue(done)
+
+    def show_results(results):
+        progress_dialog.finish()
+        win['dialog_voucher_list'].init_values()
+        frm_main_window.update_values()  # update balances in main window
+        received = sum(1 for _, _, transaction, _ in results if transaction is not None)
+        info_msg = f"{len(results)} Dateien importiert, {received} Transaktionen empfangen.\n\n"
+        info_msg += "\n".join(f"{os.path.basename(file_path)}: {info}" for file_path, _, _, info in results)
+        show_message_box("Info", info_msg)
+        if received:
             win['dialog_transaction_list'].init_show()
 
+    def cancel():
+        # the file that is imported at the moment is finished, the dialog blocks the windows until then
+        task.cancel()
+        progress_dialog.setLabelText("Import wird abgebrochen ...")
+
+    def finished():
+        progress_dialog.finish()
+        if task.is_canceled():
+            # the files imported so far stay in the profile
+            win['dialog_voucher_list'].init_values()
+            frm_main_window.update_values()
+
+    def show_error(error_msg):
+        progress_dialog.finish()
+        show_message_box("Fehler", error_msg)
+
+    task = task_runner.start(import_files, with_task=True, on_result=show_results,
+                             on_progress=show_progress, on_finished=finished, on_error=show_error)
+    progress_dialog.canceled.connect(cancel)
+
 
 class DialogForgotPassword(QMainWindow, Ui_DialogForgotPassword):
     def __init__(self):
@@ -159,7 +245,17 @@ class FormSendMinuto(QMainWindow, Ui_FormSendMinuto):
         if not show_yes_no_box("Minuto versenden?", "Sollen die Minuto versendet werden?"):
             return
 
-        transaction = user_profile.send_minuto(amount, purpose, recipient_id)
+        # the vouchers are selected, verified and saved in the background
+        self.pushButton_Send_Minuto.setEnabled(False)
+        start_profile_task("Minuto werden versendet ...", user_profile.send_minuto, amount, purpose, recipient_id,
+                           on_result=lambda transaction: self.save_transaction(transaction, recipient_id),
+                           on_error=lambda error_msg: show_message_box("Fehler", f"Transaktion fehlgeschlagen: {error_msg}"),
+                           on_finished=self.check_recipient_ID)  # enables the send button again
+
+    def save_transaction(self, transaction, recipient_id):
+        """
+        Asks for the file name of the sent transaction and encrypts and saves the transaction in the background.
+        """
         if not transaction.transaction_successful:
             show_message_box("Fehler","Transaktion fehlgeschlagen")
             return
@@ -175,20 +271,22 @@ class FormSendMinuto(QMainWindow, Ui_FormSendMinuto):
             file_filter
         )
 
-        # Check if the user has entered a file name
-        if filename_with_path:
-            # Encrypt and save the transaction
-            user_profile._secure_file_handler.encrypt_with_shared_secret_and_save(
-                transaction, filename_with_path, recipient_id, user_profile.person.id)
-
         self.close()
         win['form_show_transaction'].show_transaction(transaction)
         frm_main_window.update_values() # update balances in main window
 
+        # Check if the user has entered a file name
+        if filename_with_path:
+            # Encrypt and save the transaction
+            task_runner.start(user_profile._secure_file_handler.encrypt_with_shared_secret_and_save,
+                              transaction, filename_with_path, recipient_id, user_profile.person.id,
+                              binary=config.BINARY_TRANSFER,
+                              on_error=lambda error_msg: show_message_box("Fehler", error_msg))
+
 
     def show_init(self):
         self.setWindowTitle(f"Minuto versenden - Profil: {user_profile.profile_name}")
-        self.available_amount = user_profile.person.get_amount_of_all_vouchers()
+        self.available_amount = user_profile.get_available_amount()  # from the voucher index if not loaded
         self.lineEdit_recipient_id.setText("")
         self.lineEdit_transfer_amount.setText("")
         self.lineEdit_purpose.setText("")
@@ -260,7 +358,8 @@ class FormSignAsGuarantor(QMainWindow, Ui_FormSignVoucherAsGuarantor):
         # Check if the user has entered a file name
         if filename_with_path:
             user_profile._secure_file_handler.encrypt_with_shared_secret_and_save(
-                self.guarantor_signature, filename_with_path, creator_id, user_profile.person.id)
+                self.guarantor_signature, filename_with_path, creator_id, user_profile.person.id,
+                binary=config.BINARY_TRANSFER)
 
     def show_form(self, voucher):
         self.voucher = voucher
@@ -356,7 +455,8 @@ class FormSendToGuarantor(QMainWindow, Ui_FormSendToGuarantor):
             if encrypt_data:
                 # Encrypt and save the voucher
                 user_profile._secure_file_handler.encrypt_with_shared_secret_and_save(
-                    self.voucher, filename_with_path, guarantor_id, user_profile.person.id)
+                    self.voucher, filename_with_path, guarantor_id, user_profile.person.id,
+                    binary=config.BINARY_TRANSFER)
             else:
                 # Save the voucher unencrypted
                 user_profile.person.save_voucher(filename=filename_with_path, voucher=self.voucher)
@@ -544,6 +644,7 @@ class FormShowVoucher(QMainWindow, Ui_FormShowVoucher):
             self.pushButtonTrash.setText("In Papierkorb verschieben")
 
         voucher_stat_text = ""
+        needs_verification = False
         if own_voucher:
             voucher_stat_text += "<b>Eigener Gutschein"
             if trashed_voucher == True:
@@ -556,10 +657,8 @@ class FormShowVoucher(QMainWindow, Ui_FormShowVoucher):
                 voucher_stat_text += " (weiblicher Bürge fehlt)"
             elif no_creator_signature:
                 voucher_stat_text += " (Eigene Unterschrift fehlt)"
-            elif voucher.verify_complete_voucher():
-                voucher_stat_text += " (Gültig)"
             else:
-                voucher_stat_text += " (Ungültig!)"
+                needs_verification = True
 
         else:
             voucher_stat_text += "<b>Erhaltener Gutschein"
@@ -567,17 +666,27 @@ class FormShowVoucher(QMainWindow, Ui_FormShowVoucher):
                 voucher_stat_text += " (Nicht genug Bürgen)"
             elif no_creator_signature:
                 voucher_stat_text += " (Ersteller Unterschrift fehlt)"
-            elif voucher.verify_complete_voucher():
-                voucher_stat_text += " (Gültig)"
             else:
-                voucher_stat_text += " (Ungültig!)"
-        voucher_stat_text += "</b>"
-
-        self.labelInfoTextLeft.setText(voucher_stat_text)
+                needs_verification = True
+
+        if needs_verification:
+            # the verification of long transaction chains takes a while, so it runs in the background
+            self.labelInfoTextLeft.setText(voucher_stat_text + " (wird geprüft ...)</b>")
+            task_runner.start(voucher.verify_complete_voucher, name="verify_shown_voucher",
+                              on_result=lambda is_valid: self.show_verification_result(
+                                  voucher, voucher_stat_text, is_valid))
+        else:
+            self.labelInfoTextLeft.setText(voucher_stat_text + "</b>")
 
         available_amount = voucher.get_voucher_amount(user_profile.person.id)
         self.labelInfoTextRight.setText(f"<b>Verfügbarer Betrag:  {available_amount} Minuto</b>")
 
+    def show_verification_result(self, voucher, voucher_stat_text, is_valid):
+        if voucher is not self.voucher:
+            return  # another voucher is shown in the meantime
+        voucher_stat_text += " (Gültig)" if is_valid else " (Ungültig!)"
+        self.labelInfoTextLeft.setText(voucher_stat_text + "</b>")
+
     def show_raw_data(self):
         """ Display raw data of the voucher. """
         win['form_show_raw_data'].show_data(self.voucher, "eMinuto-")
@@ -776,7 +885,8 @@ class FormShowTransaction(QMainWindow, Ui_FormShowTransaction):
         if filename_with_path:
             # Encrypt and save the transaction
             user_profile._secure_file_handler.encrypt_with_shared_secret_and_save(
-                self.transaction, filename_with_path, recipient_id, user_profile.person.id)
+                self.transaction, filename_with_path, recipient_id, user_profile.person.id,
+                binary=config.BINARY_TRANSFER)
 
 
 
@@ -872,86 +982,6 @@ class Dialog_Create_Minuto(QMainWindow, Ui_DialogCreateMinuto):
             self.label_voucher_description.setText("Gutschein für Waren oder Dienstleistungen")
 
 
-class CustomSortFilterProxyModel(QSortFilterProxyModel):
-    """
-    A custom filter proxy model to filter table rows based on text.
-    It supports filtering with a logical "AND" between words and a logical "OR" across visible columns.
-    This model allows rows to be shown if each word in the filter text is found in any of the visible columns.
-    """
-
-    def __init__(self, *args, **kwargs):
-        """
-        Initializes the CustomSortFilterProxyModel with empty lists for visible_columns and filter_words.
-        """
-        super().__init__(*args, **kwargs)
-        self.visible_columns = []  # List of indexes of columns that are visible
-        self.filter_words = []  # List of words to filter by
-
-
-    def set_visible_columns(self, columns):
-        """
-        Sets the visible columns in the table view.
-
-        :param columns: A list of column indexes that are visible.
-        """
-        self.visible_columns = columns
-        self.invalidateFilter()  # Important to reapply the filter
-
-    def set_filter_text(self, text):
-        """
-        Sets the filter text, splitting it into words for the filter.
-
-        :param text: The text string to filter by.
-        """
-        self.filter_words = [word.lower() for word in text.split() if word]
-        self.invalidateFilter()  # Important to reapply the filter
-
-    def filterAcceptsRow(self, source_row, source_parent):
-        """
-        Reimplementation of the filterAcceptsRow method to apply a custom filter.
-        The row is accepted if each word in the filter text is found in any of the visible columns.
-
-        :param source_row: The row number in the model.
-        :param source_parent: The parent index in the model.
-        :return: True if the row should be included; otherwise False.
-        """
-        if not self.filter_words:
-            return True  # No filter set, accept all rows
-
-        # Check each column for each word
-        for word in self.filter_words:
-            word_found_in_any_column = False
-            for col in self.visible_columns:
-                cell_text = str(self.sourceModel().index(source_row, col, source_parent).data()).lower()
-                if word in cell_text:
-                    word_found_in_any_column = True
-                    break  # Word found in this column, no need to check further
-
-            if not word_found_in_any_column:
-                return False  # Word not found in any of the visible columns
-
-        # All words were found in at least one of the visible columns
-        return True
-
-    def lessThan(self, left: QModelIndex, right: QModelIndex) -> bool:
-        """
-        Reimplementation of the lessThan method to handle numerical sorting based on the Qt.UserRole.
-
-        :param left: The QModelIndex of the left item.
-        :param right: The QModelIndex of the right item.
-        :return: True if the left item is less than the right item; otherwise False.
-        """
-        leftData = self.sourceModel().data(left, Qt.UserRole)
-        rightData = self.sourceModel().data(right, Qt.UserRole)
-
-        # If both leftData and rightData are of type float or int, compare them as numbers
-        if isinstance(leftData, (float, int)) and isinstance(rightData, (float, int)):
-            return leftData < rightData
-
-        # Otherwise, fall back to the default implementation for other types (e.g., string comparison)
-        return super().lessThan(left, right)
-
-
 class DialogVoucherList(QMainWindow, Ui_DialogVoucherList):
     """
     A main window class that handles the display and filtering of vouchers in a table view.
@@ -971,7 +1001,6 @@ class DialogVoucherList(QMainWindow, Ui_DialogVoucherList):
             "Erstellungsdatum", "Testgutschein", "Bürgen",
             "Unterschrift des Erstellers", "Transaktionen"
         ]
-        self.voucher_mapping = {}
         self.isTableViewConnected = False
 
         # Setup context menu for table headers
@@ -980,9 +1009,10 @@ class DialogVoucherList(QMainWindow, Ui_DialogVoucherList):
         self.tableView_vouchers.horizontalHeader().customContextMenuRequested.connect(self.openContextMenu)
         self.pushButton_open_voucher_or_signature.clicked.connect(open_data_file)
 
-        # Initialize the base model
-        self.model = QStandardItemModel()
-        self.model.setHorizontalHeaderLabels(self.headers)
+        # Initialize the base model (the cells are computed when they are shown, see ObjectTableModel)
+        self.voucher_columns = self.get_voucher_columns()
+        self.index_entry_columns = self.get_index_entry_columns()
+        self.model = ObjectTableModel(self.voucher_columns)
 
         self.base_proxy_model = CustomSortFilterProxyModel()
         self.base_proxy_model.setSourceModel(self.model)
@@ -1016,12 +1046,6 @@ class DialogVoucherList(QMainWindow, Ui_DialogVoucherList):
         self.base_proxy_model.set_visible_columns(visible_columns)
         self.base_proxy_model.set_filter_text(filter_text)
 
-        # Set the proxy model as the model for the TableView
-        self.tableView_vouchers.setModel(self.base_proxy_model)
-
-        # Refresh the view
-        self.init_values()
-
     def add_filter(self):
         """
         Adds filters to select which vouchers to display.
@@ -1069,12 +1093,13 @@ class DialogVoucherList(QMainWindow, Ui_DialogVoucherList):
     def init_values(self):
         """
         Initializes the values in the table view based on the selected filters.
+        Only the changed rows of the model are updated (see ObjectTableModel.set_objects).
         """
         self.setWindowTitle(f"eMinuto-Liste - Profil: {user_profile.profile_name}")
 
-        self.model.removeRows(0, self.model.rowCount())
-
         # Fetch vouchers based on the selected status
+        # (only the index entries of the vouchers, if the vouchers are not loaded yet)
+        vouchers_loaded = user_profile.vouchers_loaded()
         self.all_vouchers = []
         for index in range(self.statusComboBox.model().rowCount()):
             item = self.statusComboBox.model().item(index)
@@ -1087,53 +1112,63 @@ class DialogVoucherList(QMainWindow, Ui_DialogVoucherList):
             status_enum = self.status_text_to_enum.get(english_status_key)
 
             if status_enum and item.checkState() == Qt.CheckState.Checked:
-                self.all_vouchers += user_profile.person.voucherlist[status_enum.value]
+                if vouchers_loaded:
+                    self.all_vouchers += user_profile.person.voucherlist[status_enum.value]
+                else:
+                    self.all_vouchers += user_profile.get_voucher_index(status_enum.value)
 
-        for i, voucher in enumerate(self.all_vouchers):
-            self.add_voucher_to_model(self.model, voucher)
-            self.voucher_mapping[i] = voucher
+        columns = self.voucher_columns if vouchers_loaded else self.index_entry_columns
+        if self.model.columns != columns:
+            self.model.set_columns(columns)
+        self.model.set_objects(self.all_vouchers)
 
-        self.tableView_vouchers.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.tableView_vouchers.customContextMenuRequested.connect(self.openContextMenu)
         if not self.isTableViewConnected:
+            self.tableView_vouchers.setContextMenuPolicy(Qt.CustomContextMenu)
+            self.tableView_vouchers.customContextMenuRequested.connect(self.openContextMenu)
             self.tableView_vouchers.doubleClicked.connect(self.on_table_view_clicked)
             self.isTableViewConnected = True
 
-    def add_voucher_to_model(self, model, voucher):
+    def get_voucher_columns(self):
         """
-        Adds a voucher to the table model.
-        :param model: The table model to which the voucher will be added.
-        :param voucher: The voucher object to add.
+        Returns the columns of the table (see self.headers) for voucher objects.
         """
-        gender_text = {0: "Unbekannt", 1: "Männlich", 2: "Weiblich"}.get(voucher.creator_gender, "Unbekannt")
-        test_voucher_text = "Ja" if voucher.is_test_voucher else "Nein"
-        creator_signature_text = "Ja" if voucher.creator_signature else "Nein"
-        available_balance = format_table_cell(
-            (voucher.get_voucher_amount(user_profile.person.id))
-        )
-
-        row = [
-            format_table_cell(voucher.voucher_id),
-            format_table_cell(float(voucher.amount)),
-            available_balance,
-            format_table_cell(voucher.valid_until),
-            format_table_cell(f"{voucher.creator_first_name} {voucher.creator_last_name}"),
-            format_table_cell(voucher.creator_organization),
-            format_table_cell(voucher.creator_address),
-            format_table_cell(gender_text),
-            format_table_cell(voucher.service_offer),
-            format_table_cell(voucher.region),
-            format_table_cell(voucher.coordinates),
-            format_table_cell(voucher.email),
-            format_table_cell(voucher.phone),
-            format_table_cell(voucher.creation_date),
-            format_table_cell(test_voucher_text),
-            format_table_cell(str(len(voucher.guarantor_signatures))),
-            format_table_cell(creator_signature_text),
-            format_table_cell(str(len(voucher.transactions)))
+        gender_texts = {0: "Unbekannt", 1: "Männlich", 2: "Weiblich"}
+        values = [
+            lambda voucher: voucher.voucher_id,
+            lambda voucher: float(voucher.amount),
+            lambda voucher: voucher.get_voucher_amount(user_profile.person.id),
+            lambda voucher: voucher.valid_until,
+            lambda voucher: f"{voucher.creator_first_name} {voucher.creator_last_name}",
+            lambda voucher: voucher.creator_organization,
+            lambda voucher: voucher.creator_address,
+            lambda voucher: gender_texts.get(voucher.creator_gender, "Unbekannt"),
+            lambda voucher: voucher.service_offer,
+            lambda voucher: voucher.region,
+            lambda voucher: voucher.coordinates,
+            lambda voucher: voucher.email,
+            lambda voucher: voucher.phone,
+            lambda voucher: voucher.creation_date,
+            lambda voucher: "Ja" if voucher.is_test_voucher else "Nein",
+            lambda voucher: str(len(voucher.guarantor_signatures)),
+            lambda voucher: "Ja" if voucher.creator_signature else "Nein",
+            lambda voucher: str(len(voucher.transactions))
         ]
-        model.appendRow(row)
+        return [TableColumn(header, value) for header, value in zip(self.headers, values)]
 
+    def get_index_entry_columns(self):
+        """
+        Returns the columns of the table for voucher index entries (dicts).
+        Columns not contained in the index stay empty.
+        """
+        values = {
+            0: lambda entry: entry['voucher_id'],
+            1: lambda entry: float(entry['amount']),
+            2: lambda entry: entry['balance'],
+            3: lambda entry: entry['valid_until'],
+            4: lambda entry: entry['creator_name'],
+            17: lambda entry: str(entry['tx_count'])
+        }
+        return [TableColumn(header, values.get(i, lambda entry: "")) for i, header in enumerate(self.headers)]
 
     def openContextMenu(self, position):
         """
@@ -1169,10 +1204,18 @@ class DialogVoucherList(QMainWindow, Ui_DialogVoucherList):
         :param index: The index of the clicked table cell.
         """
         mapped_index = self.base_proxy_model.mapToSource(index)
-        row = mapped_index.row()
-        voucher = self.voucher_mapping[row]
+        voucher = self.model.object_at(mapped_index.row())
+        if isinstance(voucher, dict):  # index entry -> load (decrypt and verify) the vouchers in the background
+            start_profile_task("Gutscheine werden geladen ...", user_profile.get_voucher, voucher['location'],
+                               on_result=self.show_loaded_voucher)
+            return
         win['form_show_voucher'].show_voucher(voucher)
 
+    def show_loaded_voucher(self, voucher):
+        self.init_values()
+        if voucher is not None:
+            win['form_show_voucher'].show_voucher(voucher)
+
     def init_show(self):
         """
         Initializes and shows the main window.
@@ -1186,12 +1229,14 @@ class DialogTransactionList(QMainWindow, Ui_DialogTransactionList):
     """
     A main window class that handles the display and filtering of transactions in a table view.
     It allows for dynamic filtering based on text input and visible table columns.
+    The rows are updated with the change notifications of the transaction history (see on_transaction_changed).
     """
+    # (event, entry) of the transaction history, emitted in the thread that changed the history
+    transactionChanged = Signal(str, object)
 
     def __init__(self):
         super().__init__()
         self.setupUi(self)  # This method needs to be defined elsewhere, typically setup by Qt Designer UI files.
-        self.headers = []
         self.column_translations = {
             'id': "Transaktions-ID",
             'sender': "Sender",
@@ -1200,16 +1245,23 @@ class DialogTransactionList(QMainWindow, Ui_DialogTransactionList):
             'purpose': "Zweck",
             'time': "Zeit"
         }
-        self.transaction_mapping = {}
+        self.headers = list(self.column_translations.values())
         self.isTableViewConnected = False
-        
+        self.needs_refresh = True  # changes while the window is hidden are applied with init_values on show
+
         # Setup context menu for table headers
         self.tableView_transactions.horizontalHeader().setContextMenuPolicy(Qt.CustomContextMenu)
         self.tableView_transactions.horizontalHeader().customContextMenuRequested.connect(self.openContextMenu)
 
-        # Initialize the base model
-        self.model = QStandardItemModel()
-        #self.model.setHorizontalHeaderLabels(self.headers)
+        # Initialize the base model (one row per entry of the transaction history)
+        self.model = ObjectTableModel([
+            TableColumn(self.column_translations['id'], lambda entry: entry['id']),
+            TableColumn(self.column_translations['sender'], lambda entry: entry['sender']),
+            TableColumn(self.column_translations['recipient'], lambda entry: entry['recipient']),
+            TableColumn(self.column_translations['amount'], self.get_signed_amount, color=True),
+            TableColumn(self.column_translations['purpose'], lambda entry: entry['purpose']),
+            TableColumn(self.column_translations['time'], lambda entry: entry['time']),
+        ])
 
         self.base_proxy_model = CustomSortFilterProxyModel()  # This needs to be defined
         self.base_proxy_model.setSourceModel(self.model)
@@ -1222,6 +1274,10 @@ class DialogTransactionList(QMainWindow, Ui_DialogTransactionList):
         self.add_filter()
         self.lineEditFilter.textChanged.connect(self.apply_filter)
 
+        # the signal passes the notifications to the GUI thread (transactions are received in background tasks)
+        self.transactionChanged.connect(self.on_transaction_changed)
+        user_profile.transactions.add_listener(self.transactionChanged.emit)
+
         self.init_values()  # Populate the table with transactions
 
     def get_visible_columns(self):
@@ -1241,7 +1297,6 @@ class DialogTransactionList(QMainWindow, Ui_DialogTransactionList):
         filter_text = self.lineEditFilter.text().lower()
         self.base_proxy_model.set_filter_text(filter_text)
         self.base_proxy_model.set_visible_columns(self.get_visible_columns())
-        self.tableView_transactions.setModel(self.base_proxy_model)
 
     def add_filter(self):
         """
@@ -1262,71 +1317,67 @@ class DialogTransactionList(QMainWindow, Ui_DialogTransactionList):
         """
         self.setWindowTitle(f"Transaktionen - Profile: {user_profile.profile_name}")
 
-        self.model.clear()  # Clear existing items from the table model.
-
         # Determine the current filter based on the index of the selection in the statusComboBox.
         current_filter_index = self.statusComboBox.currentIndex()
 
-        filtered_transactions = []
-        for transaction_id, transaction_details in user_profile.transactions.items():
-            if current_filter_index == 0:  # Index 0 corresponds to "All Transactions".
-                filtered_transactions.append((transaction_id, transaction_details))
-            elif current_filter_index == 1:  # Index 1 corresponds to "Incoming Transactions".
-                if transaction_details['recipient'] == user_profile.person.id:
-                    filtered_transactions.append((transaction_id, transaction_details))
-            elif current_filter_index == 2:  # Index 2 corresponds to "Outgoing Transactions".
-                if transaction_details['sender'] == user_profile.person.id:
-                    filtered_transactions.append((transaction_id, transaction_details))
-
-        # If there are any transactions to display, set up the table headers based on the keys of the first transaction
-        # and exclude 'transaction_object' from being displayed.
-        if filtered_transactions:
-            first_transaction = filtered_transactions[0][1]
-            headers_keys = [key for key in first_transaction.keys() if key != 'transaction_object']
-            self.headers = [self.column_translations.get(key, key) for key in headers_keys]
-            self.model.setHorizontalHeaderLabels(self.headers)
-
-        # Clearing the transaction mapping to ensure it's in sync with the currently displayed transactions.
-        self.transaction_mapping.clear()
-
-        # Populate the table with filtered transactions.
-        for transaction_id, transaction_details in filtered_transactions:
-            self.add_transaction_to_model(self.model, transaction_details)
-            # Update the transaction mapping for each transaction using its row index.
-            self.transaction_mapping[
-                self.model.indexFromItem(self.model.item(self.model.rowCount() - 1, 0)).row()] = transaction_id
+        # The transaction history is sorted by time and indexed by sender and recipient (most recent first).
+        if current_filter_index == 1:  # Index 1 corresponds to "Incoming Transactions".
+            transaction_entries = user_profile.transactions.query(recipient=user_profile.person.id)
+        elif current_filter_index == 2:  # Index 2 corresponds to "Outgoing Transactions".
+            transaction_entries = user_profile.transactions.query(sender=user_profile.person.id)
+        else:  # Index 0 corresponds to "All Transactions".
+            transaction_entries = user_profile.transactions.query()
+
+        self.model.reset_objects(transaction_entries)
+        self.needs_refresh = False
 
         # Apply the filter settings.
         self.apply_filter()
 
-        # Set the updated model to the tableView_transactions.
-        self.tableView_transactions.setModel(self.base_proxy_model)
-        self.tableView_transactions.setSortingEnabled(True)
-
         # Connect signals for handling table view interactions, ensuring they are only connected once.
         if not self.isTableViewConnected:
             self.tableView_transactions.doubleClicked.connect(self.on_table_view_clicked)
             self.isTableViewConnected = True
 
-    def add_transaction_to_model(self, model, transaction):
+    def filter_arguments(self):
+        """Returns the arguments of TransactionHistory.query for the selected filter (all, incoming, outgoing)."""
+        current_filter_index = self.statusComboBox.currentIndex()
+        if current_filter_index == 1:
+            return {'recipient': user_profile.person.id}
+        if current_filter_index == 2:
+            return {'sender': user_profile.person.id}
+        return {}
+
+    def matches_filter(self, entry):
+        """Returns True if the transaction entry is shown with the selected filter (all, incoming, outgoing)."""
+        return all(entry[key] == value for key, value in self.filter_arguments().items())
+
+    def on_transaction_changed(self, event, entry):
         """
-        Adds a transaction to the table model.
-        :param model: The table model to which the transaction will be added.
-        :param transaction: The transaction object to add.
+        Updates the rows after a change of the transaction history: a new transaction inserts a single row.
+        :param event: 'add', 'remove' or 'clear' (see TransactionHistory.add_listener).
+        :param entry: The added or removed transaction entry.
         """
-        amount = float(transaction['amount'])
-        if transaction['recipient'] != user_profile.person.id:
+        if not self.isVisible():
+            self.needs_refresh = True  # the list is updated when shown
+            return
+        if event == 'clear':
+            self.model.reset_objects([])
+        elif event == 'remove':
+            self.model.remove_object(entry)
+        elif event == 'add' and self.model.row_of(entry) is None and self.matches_filter(entry):
+            # the row of the entry in the filtered history (most recent first), used if the table is not sorted
+            # by a column; None if the entry was removed again before the (queued) notification arrived
+            row = user_profile.transactions.position(entry['id'], **self.filter_arguments())
+            if row is not None and user_profile.transactions.get(entry['id']) is entry:
+                self.model.insert_objects([entry], row=min(row, self.model.rowCount()))
+
+    def get_signed_amount(self, entry):
+        """Returns the amount of a transaction entry, negative for outgoing transactions."""
+        amount = float(entry['amount'])
+        if entry['recipient'] != user_profile.person.id:
             amount *= -1
-        row = [
-            format_table_cell(transaction['id']),
-            format_table_cell(transaction['sender']),
-            format_table_cell(transaction['recipient']),
-            format_table_cell(amount, color=True),
-            format_table_cell(transaction['purpose']),
-            format_table_cell(transaction['time']),
-        ]
-        model.appendRow(row)
-
+        return amount
 
     def openContextMenu(self, position):
         """
@@ -1359,26 +1410,21 @@ class DialogTransactionList(QMainWindow, Ui_DialogTransactionList):
     def on_table_view_clicked(self, index):
         source_index = self.base_proxy_model.mapToSource(index)
         if source_index.isValid():
-            row = source_index.row()
-            # Using the transaction_mapping to get the transaction_id
-            transaction_id = self.transaction_mapping.get(row)
-            if transaction_id:
-                # Access the transaction details directly from user_profile.transactions
-                transaction = user_profile.transactions.get(transaction_id)
-                transaction = transaction['transaction_object']
-                if transaction:
-                    win['form_show_transaction'].show_transaction(transaction)
+            entry = self.model.object_at(source_index.row())
+            transaction = entry['transaction_object']
+            if transaction:
+                win['form_show_transaction'].show_transaction(transaction)
 
     def init_show(self):
         """
         Initializes and shows the main window.
         """
-        self.init_values()
+        if self.needs_refresh:
+            self.init_values()
         self.show()
         self.raise_()
 
 
-
 class Frm_Mainwin(QMainWindow, Ui_MainWindow):
     def __init__(self):
         super().__init__()
@@ -1386,7 +1432,7 @@ class Frm_Mainwin(QMainWindow, Ui_MainWindow):
         # load porfile windows - connect signals
         self.dialog_generate_profile = Dialog_Generate_Profile()
         self.dialog_generate_profile.profileCreated.connect(self.onProfileCreated)
-        self.dialog_profile_login = Dialog_Profile_Login()
+        self.dialog_profile_login = Dialog_Profile_Login(start_profile_task)
         self.dialog_profile_login.profileLogin.connect(self.profile_login)
         self.dialog_profile_login.overwritePassword.connect(self.forgot_password)
         self.dialog_profile = Dialog_Profile()
@@ -1422,6 +1468,9 @@ class Frm_Mainwin(QMainWindow, Ui_MainWindow):
         for window in win.values():
             window.close()
 
+        # finish the running and queued tasks (e.g. saving of vouchers and transactions)
+        task_runner.wait()
+
         # Beenden der Anwendung
         QApplication.instance().quit()
 
@@ -1457,8 +1506,19 @@ class Frm_Mainwin(QMainWindow, Ui_MainWindow):
         self.update_values()
         self.set_gui_depending_profile_status()
         self.show_status_message("Erfolgreich eingeloggt.")
+        if not user_profile.vouchers_loaded():
+            # the login only read the voucher index (balances are shown from it), the vouchers are loaded now
+            start_profile_task("Gutscheine werden geladen ...", user_profile.load_vouchers,
+                               on_error=lambda error_msg: show_message_box("Fehler", error_msg),
+                               on_finished=self.vouchers_loaded)
+
+    def vouchers_loaded(self):
+        self.update_values()
+        if win['dialog_voucher_list'].isVisible():
+            win['dialog_voucher_list'].init_values()
 
     def profile_logout(self):
+        task_runner.wait()  # the running tasks still use the profile
         user_profile.profile_logout()
         self.update_values()
         self.set_gui_depending_profile_status()
@@ -1550,6 +1610,9 @@ class Frm_Mainwin(QMainWindow, Ui_MainWindow):
 app = QApplication([])
 apply_global_styles(app)
 
+# runs verification, key derivation and file encryption in the background (see task_runner.py)
+task_runner = TaskRunner()
+
 # dict of all windwos
 win = {
     'form_send_minuto': FormSendMinuto(),
@@ -0,0 +1,405 @@
+# table_models.py
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt, QTimer
+from PySide6.QtGui import QBrush, QFont
+
+from src.gui.qt.utils import format_table_value, value_color
+
+
+class TableColumn:
+    """
+    A column of an ObjectTableModel.
+
+    Args:
+        header (str): The header text.
+        value (callable): Returns the value of the cell for a row object (str, float, int or ISO datetime string).
+        color (bool): If True, float values are color-coded (see format_table_cell).
+    """
+
+    def __init__(self, header, value, color=False):
+        self.header = header
+        self.value = value
+        self.color = color
+
+
+class ObjectTableModel(QAbstractTableModel):
+    """
+    A read-only table model backed directly by a list of objects (e.g. vouchers), one row per object.
+
+    The cells are computed only when the view asks for them (data) and are cached per object and column,
+    so only the visible cells (and the sort column) are computed, even for tens of thousands of rows.
+    set_objects updates the rows incrementally: removed objects are removed, new objects are inserted at the end
+    and only the cached cells are recalculated, so the selection and the scroll position of the view are kept.
+    The sort key of a cell (numbers as numbers, other values as display text) is cached with the cell and provided
+    with Qt.UserRole. The model sorts itself by these keys (sort), which is much faster than sorting in a proxy model
+    with lessThan (see CustomSortFilterProxyModel.sort).
+    """
+
+    def __init__(self, columns=(), parent=None):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self._objects = []
+        self._rows = None  # id(object) -> row (built when needed)
+        self._cells = {}  # id(object) -> list of the cells per column: (display text, alignment, sort key, value)
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._objects)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and section < len(self.columns):
+            return self.columns[section].header
+        return super().headerData(section, orientation, role)
+
+    def _cell(self, row, column):
+        return self._object_cell(self._objects[row], column)
+
+    def _object_cell(self, obj, column):
+        cells = self._cells.get(id(obj))
+        if cells is None:
+            cells = self._cells[id(obj)] = [None] * len(self.columns)
+        cell = cells[column]
+        if cell is None:
+            value = self.columns[column].value(obj)
+            display_text, alignment = format_table_value(value)
+            sort_key = value if isinstance(value, (int, float)) else display_text
+            cell = cells[column] = (display_text, alignment, sort_key, value)
+        return cell
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self._cell(index.row(), index.column())[0]
+        if role == Qt.UserRole:
+            return self._cell(index.row(), index.column())[2]
+        if role == Qt.TextAlignmentRole:
+            return self._cell(index.row(), index.column())[1]
+        if self.columns[index.column()].color and role in (Qt.ForegroundRole, Qt.FontRole):
+            value = self._cell(index.row(), index.column())[3]
+            if not isinstance(value, float):
+                return None
+            if role == Qt.ForegroundRole:
+                return QBrush(value_color(value))
+            font = QFont()
+            font.setBold(True)
+            return font
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """
+        Sorts the rows by the sort keys of the column (numbers before texts). The rows added later are sorted too.
+        """
+        self._sort_column = column
+        self._sort_order = order
+        if not 0 <= column < len(self.columns):
+            return
+
+        self.layoutAboutToBeChanged.emit()
+        keys = [self._sort_key(obj, column) for obj in self._objects]
+        old_rows = sorted(range(len(self._objects)), key=keys.__getitem__, reverse=order == Qt.DescendingOrder)
+        new_rows = [0] * len(old_rows)
+        for new_row, old_row in enumerate(old_rows):
+            new_rows[old_row] = new_row
+        self._objects = [self._objects[row] for row in old_rows]
+        self._rows = None
+
+        # keep the selection and the current index of the views
+        old_indexes = self.persistentIndexList()
+        self.changePersistentIndexList(
+            old_indexes, [self.index(new_rows[index.row()], index.column()) for index in old_indexes])
+        self.layoutChanged.emit()
+
+    def _sort_key(self, obj, column):
+        sort_key = self._object_cell(obj, column)[2]
+        return (1, sort_key) if isinstance(sort_key, str) else (0, sort_key)  # numbers before texts
+
+    def _sorted_row(self, obj):
+        """Returns the row at which the object has to be inserted to keep the sort order (binary search)."""
+        key = self._sort_key(obj, self._sort_column)
+        descending = self._sort_order == Qt.DescendingOrder
+        low, high = 0, len(self._objects)
+        while low < high:
+            middle = (low + high) // 2
+            middle_key = self._sort_key(self._objects[middle], self._sort_column)
+            if key > middle_key if descending else key < middle_key:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def row_texts(self, columns):
+        """Returns the display texts of the columns for every row (e.g. for a search index)."""
+        return [[self._object_cell(obj, column)[0] for column in columns] for obj in self._objects]
+
+    def object_at(self, row):
+        """Returns the object of the row (of this model, not of a proxy model)."""
+        return self._objects[row]
+
+    def objects(self):
+        return list(self._objects)
+
+    def row_of(self, obj):
+        """Returns the row of the object or None."""
+        if self._rows is None:
+            self._rows = {id(o): row for row, o in enumerate(self._objects)}
+        return self._rows.get(id(obj))
+
+    def set_columns(self, columns):
+        """Replaces the columns (resets the model)."""
+        self.beginResetModel()
+        self.columns = list(columns)
+        self._cells = {}
+        self.endResetModel()
+
+    def reset_objects(self, objects):
+        """Replaces all rows with the objects (in the sort order of the model, if sorted)."""
+        self.beginResetModel()
+        self._objects = list(objects)
+        self._rows = None
+        self._cells = {}
+        self.endResetModel()
+        if self._sort_column >= 0:
+            self.sort(self._sort_column, self._sort_order)
+
+    def set_objects(self, objects):
+        """
+        Updates the rows to the objects: objects not contained anymore are removed, new objects are appended.
+        The cached cells of all objects are discarded (the objects may have changed).
+        """
+        objects = list(objects)
+        new_ids = {id(obj) for obj in objects}
+        removed_rows = [row for row, obj in enumerate(self._objects) if id(obj) not in new_ids]
+        # remove contiguous ranges of rows, starting at the end, so the row numbers of the other ranges stay valid
+        while removed_rows:
+            last = first = removed_rows.pop()
+            while removed_rows and removed_rows[-1] == first - 1:
+                first = removed_rows.pop()
+            self.remove_rows(first, last)
+
+        old_ids = {id(obj) for obj in self._objects}
+        self._insert_rows(len(self._objects), [obj for obj in objects if id(obj) not in old_ids])
+
+        self._cells = {}
+        if self._objects and self.columns:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._objects) - 1, len(self.columns) - 1))
+        if self._sort_column >= 0:
+            self.sort(self._sort_column, self._sort_order)
+
+    def insert_objects(self, objects, row=None):
+        """
+        Inserts the objects at the row (default: at the end). If the model is sorted, every object is inserted
+        at the row given by the sort order instead.
+        """
+        objects = list(objects)
+        if 0 <= self._sort_column < len(self.columns):
+            for obj in objects:
+                self._insert_rows(self._sorted_row(obj), [obj])
+            return
+        self._insert_rows(len(self._objects) if row is None else row, objects)
+
+    def _insert_rows(self, row, objects):
+        if not objects:
+            return
+        self.beginInsertRows(QModelIndex(), row, row + len(objects) - 1)
+        self._objects[row:row] = objects
+        self._rows = None
+        self.endInsertRows()
+
+    def remove_rows(self, first, last):
+        """Removes the rows first to last (inclusive)."""
+        self.beginRemoveRows(QModelIndex(), first, last)
+        for obj in self._objects[first:last + 1]:
+            self._cells.pop(id(obj), None)
+        del self._objects[first:last + 1]
+        self._rows = None
+        self.endRemoveRows()
+
+    def remove_object(self, obj):
+        """Removes the row of the object. Returns False if the object is not in the model."""
+        row = self.row_of(obj)
+        if row is None:
+            return False
+        self.remove_rows(row, row)
+        return True
+
+    def update_object(self, obj):
+        """Recalculates the cells of an object after it has changed."""
+        row = self.row_of(obj)
+        if row is None:
+            return
+        self._cells.pop(id(obj), None)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.columns) - 1))
+
+
+class CustomSortFilterProxyModel(QSortFilterProxyModel):
+    """
+    A custom filter proxy model to filter table rows based on text.
+    It supports filtering with a logical "AND" between words and a logical "OR" across visible columns.
+    This model allows rows to be shown if each word in the filter text is found in any of the visible columns.
+
+    The lower-cased texts of the visible columns of every row are collected once per change of the model
+    (search index), and the matching rows are determined in one pass when the filter text changes. If the new
+    filter text only refines the previous one (typing more characters), only the previous matches are searched.
+    Changes of the filter text are applied with a short delay, so fast typing filters only once.
+    """
+    FILTER_DELAY = 200  # milliseconds after the last change of the filter text until the filter is applied
+    COLUMN_SEPARATOR = '\x1f'  # separates the column texts in the search index, so words don't span columns
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes the CustomSortFilterProxyModel with empty lists for visible_columns and filter_words.
+        """
+        super().__init__(*args, **kwargs)
+        self.visible_columns = []  # List of indexes of columns that are visible
+        self.filter_words = []  # List of words to filter by
+        self._search_texts = None  # lower-cased texts of the visible columns per source row (built when needed)
+        self._accepted_rows = None  # source rows matching the filter words (determined when needed)
+        self._last_match = None  # (filter words, matching rows) of the last filter on the current search index
+        self._pending_filter_text = None
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(self.FILTER_DELAY)
+        self._filter_timer.timeout.connect(self.apply_pending_filter_text)
+
+    def setSourceModel(self, source_model):
+        """
+        Sets the source model. The search index is discarded before the model changes (the signals are connected
+        before the proxy model connects its own handlers, which already filter the changed rows).
+        """
+        old_model = self.sourceModel()
+        signals = ['modelAboutToBeReset', 'rowsAboutToBeInserted', 'rowsAboutToBeRemoved', 'rowsAboutToBeMoved',
+                   'layoutAboutToBeChanged', 'dataChanged']
+        if old_model is not None:
+            for signal in signals:
+                getattr(old_model, signal).disconnect(self.clear_search_index)
+        if source_model is not None:
+            for signal in signals:
+                getattr(source_model, signal).connect(self.clear_search_index)
+        self.clear_search_index()
+        super().setSourceModel(source_model)
+
+    def clear_search_index(self, *args):
+        self._search_texts = None
+        self._accepted_rows = None
+        self._last_match = None
+
+    def set_visible_columns(self, columns):
+        """
+        Sets the visible columns in the table view.
+
+        :param columns: A list of column indexes that are visible.
+        """
+        if list(columns) == self.visible_columns:
+            return
+        self.beginFilterChange()
+        self.visible_columns = list(columns)
+        self.clear_search_index()
+        self.endFilterChange(QSortFilterProxyModel.Direction.Rows)  # Important to reapply the filter
+
+    def set_filter_text(self, text, delay=True):
+        """
+        Sets the filter text, splitting it into words for the filter.
+
+        :param text: The text string to filter by.
+        :param delay: If True, the filter is applied after FILTER_DELAY milliseconds without further changes.
+        """
+        self._pending_filter_text = text
+        if delay:
+            self._filter_timer.start()
+        else:
+            self.apply_pending_filter_text()
+
+    def apply_pending_filter_text(self):
+        self._filter_timer.stop()
+        if self._pending_filter_text is None:
+            return
+        filter_words = [word.lower() for word in self._pending_filter_text.split() if word]
+        self._pending_filter_text = None
+        if filter_words == self.filter_words:
+            return
+        self.beginFilterChange()
+        self.filter_words = filter_words
+        self._accepted_rows = None
+        self.endFilterChange(QSortFilterProxyModel.Direction.Rows)  # Important to reapply the filter
+
+    def build_search_index(self):
+        """
+        Collects the lower-cased texts of the visible columns of every row of the source model.
+        """
+        source_model = self.sourceModel()
+        if isinstance(source_model, ObjectTableModel):
+            rows = source_model.row_texts(self.visible_columns)
+        else:
+            rows = [[str(source_model.index(row, column).data()) for column in self.visible_columns]
+                    for row in range(source_model.rowCount())]
+        self._search_texts = [self.COLUMN_SEPARATOR.join(texts).lower() for texts in rows]
+
+    def match_rows(self):
+        """
+        Returns the set of the source rows containing all filter words.
+        """
+        if self._search_texts is None:
+            self.build_search_index()
+        if self._last_match is not None:
+            last_words, last_rows = self._last_match
+            # words which contain all previous words can only match rows matched by the previous words
+            if all(any(last_word in word for word in self.filter_words) for last_word in last_words):
+                candidates = last_rows
+            else:
+                candidates = range(len(self._search_texts))
+        else:
+            candidates = range(len(self._search_texts))
+
+        texts = self._search_texts
+        words = self.filter_words
+        accepted_rows = {row for row in candidates if all(word in texts[row] for word in words)}
+        self._last_match = (words, accepted_rows)
+        return accepted_rows
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        """
+        Reimplementation of the filterAcceptsRow method to apply a custom filter.
+        The row is accepted if each word in the filter text is found in any of the visible columns.
+
+        :param source_row: The row number in the model.
+        :param source_parent: The parent index in the model.
+        :return: True if the row should be included; otherwise False.
+        """
+        if not self.filter_words:
+            return True  # No filter set, accept all rows
+
+        if self._accepted_rows is None:
+            self._accepted_rows = self.match_rows()
+        return source_row in self._accepted_rows
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """
+        Sorts the rows. An ObjectTableModel sorts itself by its cached sort keys (the proxy keeps the order of the
+        model), other models are sorted by the proxy with lessThan.
+        """
+        if isinstance(self.sourceModel(), ObjectTableModel):
+            self.sourceModel().sort(column, order)
+        else:
+            super().sort(column, order)
+
+    def lessThan(self, left: QModelIndex, right: QModelIndex) -> bool:
+        """
+        Reimplementation of the lessThan method to handle numerical sorting based on the Qt.UserRole.
+
+        :param left: The QModelIndex of the left item.
+        :param right: The QModelIndex of the right item.
+        :return: True if the left item is less than the right item; otherwise False.
+        """
+        leftData = self.sourceModel().data(left, Qt.UserRole)
+        rightData = self.sourceModel().data(right, Qt.UserRole)
+
+        # If both leftData and rightData are of type float or int, compare them as numbers
+        if isinstance(leftData, (float, int)) and isinstance(rightData, (float, int)):
+            return leftData < rightData
+
+        # Otherwise, fall back to the default implementation for other types (e.g., string comparison)
+        return super().lessThan(left, right)
@@ -0,0 +1,159 @@
+# task_runner.py
+import threading
+import traceback
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+
+class TaskSignals(QObject):
+    """
+    Signals of a background task. They are emitted in the worker thread and delivered to the TaskRunner in the GUI
+    thread (queued connection), so the callbacks of a task always run in the GUI thread.
+    """
+    result = Signal(object, object)  # task, return value
+    error = Signal(object, str)  # task, error message
+    progress = Signal(object, int, int)  # task, done, total
+    finished = Signal(object)  # task
+
+
+class BackgroundTask(QRunnable):
+    """
+    Runs a function in a thread of the QThreadPool of a TaskRunner.
+    A task can be canceled: if it has not started yet, the function is not called at all, otherwise the function
+    runs to the end (or stops early if it checks is_canceled) and its result is discarded.
+    """
+
+    def __init__(self, function, args, kwargs, with_task=False, name=None):
+        super().__init__()
+        self.setAutoDelete(False)  # the TaskRunner keeps the task until it is finished
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.with_task = with_task  # if True, the task is passed as first argument (for progress and cancel checks)
+        self.name = name
+        self.signals = TaskSignals()
+        self._canceled = threading.Event()
+
+    def cancel(self):
+        self._canceled.set()
+
+    def is_canceled(self):
+        return self._canceled.is_set()
+
+    def report_progress(self, done, total):
+        """Reports the progress from the worker thread (calls on_progress in the GUI thread)."""
+        self.signals.progress.emit(self, done, total)
+
+    def run(self):
+        try:
+            if self.is_canceled():
+                return
+            args = (self,) + self.args if self.with_task else self.args
+            result = self.function(*args, **self.kwargs)
+            self.signals.result.emit(self, result)
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.error.emit(self, str(e))
+        finally:
+            self.signals.finished.emit(self)
+
+
+class TaskRunner(QObject):
+    """
+    Runs slow operations (signature verification, key derivation, file encryption) in background threads,
+    so the GUI stays responsive. The callbacks (on_result, on_error, on_progress, on_finished) are called in the
+    GUI thread; the callbacks of canceled tasks are not called (except on_finished).
+
+    The tasks run one after the other (max_threads=1 by default), because they use and change the shared user
+    profile. The verification of many vouchers is parallelized inside the tasks (see verify_many and import_files).
+    This doesn't protect the profile against the GUI thread: tasks that change the profile have to block the
+    windows while they run (see start_profile_task in qt_main.py).
+    """
+
+    def __init__(self, max_threads=1, parent=None):
+        super().__init__(parent)
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max_threads)
+        self._tasks = {}  # task -> callbacks (dict)
+        self._named_tasks = {}  # name -> last started task with the name
+
+    def start(self, function, *args, on_result=None, on_error=None, on_progress=None, on_finished=None,
+              name=None, with_task=False, **kwargs):
+        """
+        Starts function(*args, **kwargs) in the background.
+
+        Args:
+            function (callable): The function to run in the background thread. Must not access Qt widgets.
+            on_result (callable, optional): Called with the return value of the function.
+            on_error (callable, optional): Called with the error message if the function raised an exception.
+            on_progress (callable, optional): Called with (done, total) (see BackgroundTask.report_progress).
+            on_finished (callable, optional): Called without arguments when the task has finished or was canceled.
+            name (str, optional): A running task with the same name is canceled, so only the result of the last
+                started task is used (e.g. when a list is refreshed again before the last refresh has finished).
+            with_task (bool): If True, the task is passed to the function as first argument.
+
+        Returns:
+            BackgroundTask: The started task (can be canceled).
+        """
+        if name is not None:
+            self.cancel(name)
+        task = BackgroundTask(function, args, kwargs, with_task=with_task, name=name)
+        self._tasks[task] = {'on_result': on_result, 'on_error': on_error, 'on_progress': on_progress,
+                             'on_finished': on_finished}
+        if name is not None:
+            self._named_tasks[name] = task
+        task.signals.result.connect(self._on_result)
+        task.signals.error.connect(self._on_error)
+        task.signals.progress.connect(self._on_progress)
+        task.signals.finished.connect(self._on_finished)
+        self.thread_pool.start(task)
+        return task
+
+    def cancel(self, name=None):
+        """Cancels the task with the name or, without name, all tasks."""
+        if name is None:
+            for task in self._tasks:
+                task.cancel()
+        elif name in self._named_tasks:
+            self._named_tasks[name].cancel()
+
+    def is_running(self, name):
+        """Returns True if a task with the name is started and not finished or canceled."""
+        task = self._named_tasks.get(name)
+        return task is not None and not task.is_canceled()
+
+    def wait(self, msecs=-1):
+        """Waits until all tasks are finished (e.g. before closing the application)."""
+        return self.thread_pool.waitForDone(msecs)
+
+    def _callback(self, task, callback_name):
+        callbacks = self._tasks.get(task)
+        if callbacks is None or task.is_canceled():
+            return None
+        return callbacks[callback_name]
+
+    @Slot(object, object)
+    def _on_result(self, task, result):
+        callback = self._callback(task, 'on_result')
+        if callback is not None:
+            callback(result)
+
+    @Slot(object, str)
+    def _on_error(self, task, message):
+        callback = self._callback(task, 'on_error')
+        if callback is not None:
+            callback(message)
+
+    @Slot(object, int, int)
+    def _on_progress(self, task, done, total):
+        callback = self._callback(task, 'on_progress')
+        if callback is not None:
+            callback(done, total)
+
+    @Slot(object)
+    def _on_finished(self, task):
+        callbacks = self._tasks.pop(task, None)
+        if self._named_tasks.get(task.name) is task:
+            del self._named_tasks[task.name]
+        if callbacks is not None and callbacks['on_finished'] is not None:
+            callbacks['on_finished']()
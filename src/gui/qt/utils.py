@@ -1,5 +1,5 @@
-from PySide6.QtCore import QDateTime
-from PySide6.QtWidgets import QMessageBox
+from PySide6.QtCore import QDateTime, Qt
+from PySide6.QtWidgets import QMessageBox, QProgressDialog
 
 from src.services.utils import dprint
 
@@ -24,6 +24,42 @@ def show_yes_no_box(title, text):
     else:
         return False
 
+class TaskProgressDialog(QProgressDialog):
+    """
+    Application modal progress dialog of a background task that changes the user profile. It is shown at once and
+    blocks all windows until finish is called. The user can't close it, only cancel it with the cancel button
+    (if a cancel_text is given), the canceled signal is emitted then.
+    Without maximum a busy indicator is shown.
+    """
+
+    def __init__(self, title, text, cancel_text=None, maximum=0):
+        super().__init__(text, cancel_text, 0, maximum)
+        self.setWindowTitle(title)
+        self.setWindowModality(Qt.ApplicationModal)
+        self.setAutoReset(False)  # stay open when the last progress is reported until the task is finished
+        self.setAutoClose(False)
+        self._finished = False
+        self.canceled.connect(self.show)  # the cancel button hides the dialog, but the task is still running
+        self.show()
+
+    def finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        self.canceled.disconnect(self.show)
+        self.hide()
+
+    def closeEvent(self, event):
+        if not self._finished:
+            event.ignore()
+            return
+        super().closeEvent(event)
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Escape and not self._finished:
+            return
+        super().keyPressEvent(event)
+
 def apply_global_styles(app):
     app.setStyleSheet("""
         QMainWindow {
@@ -86,12 +122,53 @@ class DecimalFormatValidator(QValidator):
         """
         return input_str.replace(',', '.')
 
+# ISO 8601 datetimes start with the date, other strings are not parsed (see is_iso8601_datetime)
+_ISO_DATE_PREFIX = re.compile(r'\d{4}-\d{2}-\d{2}')
+_RIGHT_ALIGNED = Qt.AlignRight | Qt.AlignVCenter
+
+
 def is_iso8601_datetime(value):
     """Check if the string value is in ISO 8601 datetime format."""
+    if not _ISO_DATE_PREFIX.match(value):
+        return False
     datetime_obj = QDateTime.fromString(value, Qt.ISODateWithMs)
     return datetime_obj.isValid()
 
 
+def format_table_value(value):
+    """
+    Returns the display text and the alignment of a value for a table cell.
+
+    Args:
+        value: The value to be displayed. Can be of type string, float, int, or an ISO formatted datetime string.
+
+    Returns:
+        A tuple of the display text and the alignment (Qt.AlignmentFlag or None for the default alignment).
+    """
+    if isinstance(value, float):
+        # Format float values to a string with 2 decimal places.
+        # Align float values to the right, making them easier to compare visually.
+        return "{:.2f}".format(value), _RIGHT_ALIGNED
+
+    if isinstance(value, str) and is_iso8601_datetime(value):
+        # Convert ISO formatted datetime strings to a more readable format, aligned to the right.
+        datetime_obj = QDateTime.fromString(value, Qt.ISODateWithMs)
+        return datetime_obj.toString("yyyy-MM-dd HH:mm:ss"), _RIGHT_ALIGNED
+
+    # For other types, simply convert the value to a string.
+    # Integer values are also right-aligned for consistency.
+    return str(value), _RIGHT_ALIGNED if isinstance(value, int) else None
+
+
+def value_color(value):
+    """Returns the text color of a color-coded float value (green for positive, red for negative values)."""
+    if value > 0:
+        return QColor(0, 150, 0)  # dark green
+    elif value < 0:
+        return QColor(Qt.red)
+    return QColor(Qt.black)  # value == 0
+
+
 def format_table_cell(value, color=False):
     """
     Creates a non-editable QStandardItem for display in a PyQt TableView.
@@ -106,37 +183,15 @@ def format_table_cell(value, color=False):
     item = QStandardItem()  # Create a new QStandardItem.
     item.setEditable(False)  # Make the item non-editable.
 
-    if isinstance(value, float):
-        # Format float values to a string with 2 decimal places.
-        display_text = "{:.2f}".format(value)
-        item.setText(display_text)
-        # Align float values to the right, making them easier to compare visually.
-        item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-
-        if color:  # Apply color and bold font for float values based on their magnitude.
-            font = QFont()
-            font.setBold(True)
-            item.setFont(font)
-
-            if value > 0:
-                item.setForeground(QBrush(QColor(0, 150, 0))) # dark green
-            elif value < 0:
-                item.setForeground(QBrush(Qt.red))
-            else:  # value == 0
-                item.setForeground(QBrush(Qt.black))
-
-    elif isinstance(value, str) and is_iso8601_datetime(value):
-        # Convert ISO formatted datetime strings to a more readable format.
-        datetime_obj = QDateTime.fromString(value, Qt.ISODateWithMs)
-        display_text = datetime_obj.toString("yyyy-MM-dd HH:mm:ss")
-        item.setText(display_text)
-        # Align datetime values to the right.
-        item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-    else:
-        # For other types, simply convert the value to a string.
-        item.setText(str(value))
-        # Integer values are also right-aligned for consistency.
-        if isinstance(value, int):
-            item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+    display_text, alignment = format_table_value(value)
+    item.setText(display_text)
+    if alignment is not None:
+        item.setTextAlignment(alignment)
+
+    if color and isinstance(value, float):  # Apply color and bold font for float values based on their magnitude.
+        font = QFont()
+        font.setBold(True)
+        item.setFont(font)
+        item.setForeground(QBrush(value_color(value)))
 
-    return item  # Return the configured QStandardItem.
\ No newline at end of file
+    return item  # Return the configured QStandardItem.
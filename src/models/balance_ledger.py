@@ -0,0 +1,66 @@
+# balance_ledger.py
+from src.models.voucher_selection import to_cents
+
+
+class BalanceLedger:
+    """
+    Running balances (in cents) of the vouchers of an owner per voucher status.
+    The ledger is updated when vouchers are added to or removed from the voucher lists (see VoucherCollection)
+    and when transactions are appended to a voucher (update), so the balances are available in O(1).
+    """
+
+    def __init__(self, owner_id):
+        self.owner_id = owner_id
+        self._entries = {}  # status -> {id(voucher): [voucher, balance in cents, count in the list]}
+        self._totals = {}  # status -> total balance in cents
+
+    def _voucher_balance(self, voucher):
+        return to_cents(voucher.get_voucher_amount(self.owner_id))
+
+    def add(self, voucher, status):
+        entries = self._entries.setdefault(status, {})
+        entry = entries.get(id(voucher))
+        if entry is None:
+            entry = entries[id(voucher)] = [voucher, self._voucher_balance(voucher), 0]
+        entry[2] += 1
+        self._totals[status] = self._totals.get(status, 0) + entry[1]
+
+    def remove(self, voucher, status):
+        entries = self._entries.get(status, {})
+        entry = entries.get(id(voucher))
+        if entry is None:
+            return
+        self._totals[status] -= entry[1]
+        entry[2] -= 1
+        if entry[2] == 0:
+            del entries[id(voucher)]
+
+    def update(self, voucher):
+        """Updates the balance of a voucher after its transactions have changed."""
+        for status, entries in self._entries.items():
+            entry = entries.get(id(voucher))
+            if entry is not None:
+                balance = self._voucher_balance(voucher)
+                self._totals[status] += (balance - entry[1]) * entry[2]
+                entry[1] = balance
+
+    def get_balance(self, status):
+        """Returns the total balance of all vouchers with the status."""
+        return self._totals.get(status, 0) / 100
+
+    def check_consistency(self, voucherlist):
+        """
+        Recalculates all balances from scratch and compares them with the running balances.
+
+        :param voucherlist: The voucher lists (status -> list of vouchers).
+        :return: True if the ledger is consistent, otherwise False (the differences are printed).
+        """
+        consistent = True
+        for status, vouchers in voucherlist.items():
+            total = sum(self._voucher_balance(voucher) for voucher in vouchers)
+            if total != self._totals.get(status, 0):
+                print(f"Balance ledger inconsistent for {status}: {self._totals.get(status, 0) / 100} "
+                      f"(recalculated: {total / 100})")
+                consistent = False
+        return consistent
+
@@ -0,0 +1,120 @@
+# double_spend_index.py
+from src.models.minuto_voucher import MinutoVoucher
+
+
+class DoubleSpendIndex:
+    """
+    Index of all transactions of a set of vouchers by (previous_hash, sender_id).
+    Different t_ids with the same previous_hash and sender_id are evidence of double spending.
+
+    The index is updated incrementally: only transactions appended since the last update are indexed,
+    so a new conflict is detected in O(1) per new transaction and the double spending report is built
+    from the conflicting index entries without scanning all vouchers again.
+    The VoucherCollection of a person keeps its index up to date when vouchers are added, changed or removed.
+    """
+
+    def __init__(self):
+        self._occurrences = {}  # (previous_hash, sender_id) -> list of (voucher, t_id, transaction)
+        self._t_ids = {}  # (previous_hash, sender_id) -> set of distinct t_ids
+        self._conflicts = {}  # keys with more than one t_id (dict used as ordered set)
+        self._vouchers = {}  # id(voucher) -> (voucher, list of (key, t_id) added by the voucher in chain order)
+
+    def add_voucher(self, voucher):
+        """
+        Indexes all transactions of the voucher that are not indexed yet. If the indexed transactions are no longer
+        the beginning of the chain (replaced, shortened or compacted chain), the voucher is indexed again.
+
+        :param voucher: The voucher (MinutoVoucher) to be indexed.
+        :return: List of (previous_hash, sender_id) keys that became double spends by this voucher.
+        """
+        indexed = self._vouchers.get(id(voucher))
+        start = 0
+        if indexed is not None:
+            start = len(indexed[1])
+            if start > len(voucher.transactions) or \
+                    (start and voucher.transactions[start - 1].t_id != indexed[1][-1][1]):
+                self.remove_voucher(voucher)
+                indexed = None
+                start = 0
+        if indexed is None:
+            indexed = self._vouchers[id(voucher)] = (voucher, [])
+
+        new_conflicts = []
+        for position in range(start, len(voucher.transactions)):
+            transaction = voucher.transactions[position]
+            key = (transaction.previous_hash, transaction.sender_id)
+            indexed[1].append((key, transaction.t_id))
+            self._occurrences.setdefault(key, []).append((voucher, transaction.t_id, transaction))
+            t_ids = self._t_ids.setdefault(key, set())
+            t_ids.add(transaction.t_id)
+            if len(t_ids) > 1 and key not in self._conflicts:
+                self._conflicts[key] = None
+                new_conflicts.append(key)
+        return new_conflicts
+
+    def remove_voucher(self, voucher):
+        """
+        Removes exactly the index entries that were added for the voucher (independent of its current transactions).
+        """
+        indexed = self._vouchers.pop(id(voucher), None)
+        if indexed is None:
+            return
+
+        for key, _ in indexed[1]:
+            occurrences = [entry for entry in self._occurrences[key] if entry[0] is not voucher]
+            if occurrences:
+                self._occurrences[key] = occurrences
+                self._t_ids[key] = {t_id for _, t_id, _ in occurrences}
+            else:
+                del self._occurrences[key]
+                del self._t_ids[key]
+            if len(self._t_ids.get(key, ())) < 2:
+                self._conflicts.pop(key, None)
+
+    def update(self, vouchers):
+        """
+        Brings the index up to date with the given vouchers: new vouchers and new transactions are indexed,
+        vouchers that are no longer in the list are removed. Used to build an index for a set of vouchers at once,
+        the index of a voucher collection is kept up to date by the collection.
+
+        :param vouchers: All vouchers that should be in the index.
+        """
+        voucher_ids = {id(voucher) for voucher in vouchers}
+        for voucher, _ in [indexed for key, indexed in self._vouchers.items() if key not in voucher_ids]:
+            self.remove_voucher(voucher)
+
+        for voucher in vouchers:
+            self.add_voucher(voucher)
+
+    def has_double_spending(self):
+        return bool(self._conflicts)
+
+    def get_double_spending_info(self):
+        """
+        Builds the double spending report from the conflicting index entries.
+
+        :return: List of dicts with 'double_spender_id' and 'voucher' (list of dicts with 'voucher_id',
+                 'max_allowed_amount', 'send_amount' and 'transactions'), see Person.check_double_spending.
+        """
+        double_spend_info = {}  # double_spender_id -> info
+        voucher_infos = {}  # (double_spender_id, voucher_id) -> voucher info
+        for key in self._conflicts:
+            for voucher, t_id, transaction in self._occurrences[key]:
+                user_id = transaction["sender_id"]  # The sender is the double spender
+
+                user_info = double_spend_info.get(user_id)
+                if user_info is None:
+                    user_info = double_spend_info[user_id] = {"double_spender_id": user_id, "voucher": []}
+
+                voucher_info = voucher_infos.get((user_id, voucher.voucher_id))
+                if voucher_info is None:
+                    max_allowed_amount = MinutoVoucher.get_transaction_amount(voucher, user_id, t_id)
+                    voucher_info = {"voucher_id": voucher.voucher_id, "max_allowed_amount": max_allowed_amount,
+                                    "send_amount": str(transaction["amount"]), "transactions": [transaction]}
+                    voucher_infos[(user_id, voucher.voucher_id)] = voucher_info
+                    user_info['voucher'].append(voucher_info)
+                else:
+                    voucher_info['transactions'].append(transaction)
+                    voucher_info["send_amount"] = str(float(voucher_info["send_amount"]) + float(transaction["amount"]))
+
+        return list(double_spend_info.values())
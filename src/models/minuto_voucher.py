@@ -1,10 +1,15 @@
 # minuto_voucher.py
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 from src.models.key import Key
-from src.services.utils import get_timestamp, dprint, amount_precision, Serializable, random_string, get_years_valid
+from src.services.utils import get_timestamp, dprint, amount_precision, Serializable, random_string, get_years_valid, \
+    LRUCache
 from src.services.crypto_utils import get_hash
+from src.services import binary_format
 from src.models.voucher_transaction import VoucherTransaction
+from src.models.transaction_record import TransactionRecord
 from enum import Enum
 
 class VoucherStatus(Enum):
@@ -20,7 +25,15 @@ class VoucherStatus(Enum):
     CORRUPT = "corrupt"  # Vouchers where the verification fails (signature etc).
     TEMP = "temp"  # Temporary vouchers.
 
+# Cache of verification results of complete vouchers, keyed by the hash of the voucher content (see
+# MinutoVoucher.get_content_hash). Any change of a voucher leads to a new key, so no explicit invalidation is needed.
+verification_cache = LRUCache(maxsize=10000)
+
 class MinutoVoucher(Serializable):
+    # Signed checkpoint which replaces the compacted beginning of the transaction chain (see compact_transactions).
+    # Class attribute, so the attribute is only stored (and sent) for compacted vouchers.
+    transaction_checkpoint = None
+
     def __init__(self):
         # Initialize default values for voucher attributes
         self.region = ''
@@ -40,16 +53,25 @@ class MinutoVoucher(Serializable):
         self.coordinates = ''
         self.guarantor_signatures = []  # Guarantor signatures
         self.needed_guarantors = 2 # minimum number of needed guarators signatures (included for possible future feature requests of more guarantors)
-        self.transactions = []  # list of transactions
+        self.transactions = []  # list of transactions (TransactionRecord)
         self.creation_date = ''
         self.voucher_id = ''
         self.footnote = ""
         self.is_test_voucher = False  # Indicates if the voucher is a test voucher
         self.voucher_version = 1  # Voucher version to handle format changes. Enables backward compatibility with older vouchers.
+        self._verified_prefix = None  # Local checkpoint of the last verified transaction (not part of hash or signatures)
+        # Memo of the canonical JSON, hash and calculated t_id per transaction (see get_transaction_memo)
+        self._transaction_memo = {}
 
 
 
 
+    def __setattr__(self, name, value):
+        # transactions are stored as TransactionRecord, also when the list is set from decoded data
+        if name == 'transactions':
+            value = [TransactionRecord.from_dict(transaction) for transaction in value]
+        super().__setattr__(name, value)
+
     @classmethod
     def create(cls, creator_id: str, creator_first_name: str, creator_last_name: str, creator_organization: str, creator_address, creator_gender: int, email: str, phone: str, service_offer: str, coordinates: str,
                amount: float, region: str, validity: int, is_test_voucher: bool = False, description='', footnote=''):
@@ -87,7 +109,7 @@ class MinutoVoucher(Serializable):
 
         # Initially, these keys are excluded from the hashing process.
         excluded_keys = ['guarantor_signatures', 'voucher_id', 'creator_signature',
-                         'transactions']
+                         'transactions', 'transaction_checkpoint']
         # By doing this, unknown keys are also dynamically included in the hash, enabling older versions to correctly verify hashes of newer versions with additional parameters.
         # removed keys which  start with _ are only locally needed. Not for hash or signatures.
         data = {key: value for key, value in self.__dict__.items()
@@ -120,7 +142,7 @@ class MinutoVoucher(Serializable):
         # Check the validity of the voucher
         return len(self.guarantor_signatures) >= 2 and self.creator_signature is not None
 
-    def save_to_disk(self, file_path=None, subfolder=None, simulation=False):
+    def save_to_disk(self, file_path=None, subfolder=None, simulation=False, binary=False):
         """
         Saves all attributes of the MinutoVoucher object either to a specified file path or returns the serialized data.
         If simulation mode is activated, the file_path is ignored and the serialized data is returned instead.
@@ -128,11 +150,14 @@ class MinutoVoucher(Serializable):
         :param file_path: Optional. The path of the file where the voucher data will be saved when not in simulation mode.
         :param subfolder: Optional. The subfolder under the script directory where the file will be saved. If no subfolder the file_path contains path and filename.
         :param simulation: If True, operates in simulation mode and returns the serialized data; otherwise, saves to the specified file path.
+        :param binary: If True, the compact binary format (bytes, see binary_format) is used instead of indented JSON.
         :return: The serialized data if simulation mode is activated.
         """
-        # Filter the __dict__ to remove keys starting with '_'
-        filtered_data = {k: v for k, v in self.__dict__.items() if not k.startswith('_')}
-        data_to_save = json.dumps(filtered_data, sort_keys=False, indent=4, ensure_ascii=False)
+        if binary:
+            data_to_save = self.to_bytes()
+        else:
+            # to_dict removes keys starting with '_'
+            data_to_save = json.dumps(self.to_dict(), sort_keys=False, indent=4, ensure_ascii=False)
 
         if simulation:
             return data_to_save  # Return the serialized data in simulation mode
@@ -144,8 +169,29 @@ class MinutoVoucher(Serializable):
             else:
                 full_path = file_path  # if no subfolder, file_path contains the full path and name of file
 
-            with open(full_path, 'w', encoding='utf-8') as file:
-                file.write(data_to_save)
+            if binary:
+                with open(full_path, 'wb') as file:
+                    file.write(data_to_save)
+            else:
+                with open(full_path, 'w', encoding='utf-8') as file:
+                    file.write(data_to_save)
+
+    def to_dict(self):
+        """
+        Extends the base to_dict method to convert the transactions (TransactionRecord) to dicts.
+        """
+        data = super().to_dict()
+        data['transactions'] = [transaction.to_dict() for transaction in self.transactions]
+        return data
+
+    def to_bytes(self):
+        """Returns the voucher in the compact binary format (see binary_format)."""
+        return binary_format.encode(self.to_dict())
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Creates a MinutoVoucher from data in the compact binary format."""
+        return cls.read_from_dict(binary_format.decode(data))
 
     @classmethod
     def read_from_file(cls, file_path, subfolder=None, simulation=False):
@@ -157,6 +203,7 @@ class MinutoVoucher(Serializable):
         :param subfolder: Optional. The subfolder under the script directory from where the file will be read.
         :param simulation: If True, operates in simulation mode for simulation purposes, otherwise performs actual file operations.
         :return: A MinutoVoucher object instantiated with the read data.
+        The format (JSON or binary) is detected automatically.
         """
         if simulation:
             data_str = file_path  # Treat 'file_path' as the content in simulation mode
@@ -167,15 +214,15 @@ class MinutoVoucher(Serializable):
             else:
                 full_path = os.path.join(base_dir, file_path)
 
-            with open(full_path, 'r', encoding='utf-8') as file:
+            with open(full_path, 'rb') as file:
                 data_str = file.read()
 
+        if binary_format.is_binary(data_str):
+            return cls.from_bytes(data_str)
+        if isinstance(data_str, bytes):
+            data_str = data_str.decode('utf-8')
         data = json.loads(data_str)
-        voucher = cls()
-        for key, value in data.items():
-            setattr(voucher, key, value)
-
-        return voucher
+        return cls.read_from_dict(data)
 
     @classmethod
     def read_from_dict(cls, data):
@@ -190,12 +237,18 @@ class MinutoVoucher(Serializable):
         """
         voucher = cls()
 
-        # Set attributes from the dictionary
+        # Set attributes from the dictionary. Keys starting with '_' are only locally needed and never
+        # taken from external data (e.g. a forged verification checkpoint in a received voucher).
         for key, value in data.items():
-            setattr(voucher, key, value)
+            if not key.startswith('_'):
+                setattr(voucher, key, value)
 
         return voucher
 
+    @classmethod
+    def from_dict(cls, dict_):
+        return cls.read_from_dict(dict_)
+
     def get_voucher_amount(self, sender_id, voucher=None):
         """
         Calculates the available amount of the last transaction of the voucher based on the sender_id.
@@ -217,15 +270,19 @@ class MinutoVoucher(Serializable):
         last_transaction = voucher.transactions[-1]
 
         # For 'split' type, check if sender_id matches sender or recipient of the last transaction
-        if last_transaction.get('t_type') == 'split':
-            if sender_id == last_transaction['sender_id']:
-                return float(last_transaction['sender_remaining_amount'])
-            elif sender_id == last_transaction['recipient_id']:
-                return float(last_transaction['amount'])
+        # (amount_value is None if the amount is no number, float raises the error then)
+        if last_transaction.t_type == 'split':
+            if sender_id == last_transaction.sender_id:
+                amount = last_transaction.sender_remaining_value
+                return amount if amount is not None else float(last_transaction.sender_remaining_amount)
+            elif sender_id == last_transaction.recipient_id:
+                amount = last_transaction.amount_value
+                return amount if amount is not None else float(last_transaction.amount)
 
         # For non-split or undefined t_type, return amount if sender_id matches recipient of the last transaction
-        elif sender_id == last_transaction['recipient_id']:
-            return float(last_transaction['amount'])
+        elif sender_id == last_transaction.recipient_id:
+            amount = last_transaction.amount_value
+            return amount if amount is not None else float(last_transaction.amount)
 
         # Default case for other scenarios
         return 0  # or a suitable error message or logic
@@ -233,7 +290,9 @@ class MinutoVoucher(Serializable):
     @staticmethod
     def get_transaction_amount(voucher, dspender_id, trans_id):
         """bestimmt den maximal menge für einen voucher wie viele minuto für eine bestimmte transaktion hätten gesendet werden dürfen. Wird benötigt für double spending benötig um zu ermitteln ob auch tatsächlich mehr als erlaubt gesendet wurde."""
-        previous_trans = None
+        # the last compacted transaction precedes the first transaction of a compacted voucher
+        checkpoint = voucher.transaction_checkpoint
+        previous_trans = checkpoint['last_transaction'] if checkpoint else None
         for trans in voucher.transactions:
             if trans["t_id"] == trans_id:
                 if previous_trans == None:
@@ -363,7 +422,7 @@ class MinutoVoucher(Serializable):
                 return False
 
             # Verify transaction ID and the correct signature of the sender (creator)
-            if VoucherTransaction.calculate_transaction_id(initial_transaction) != initial_transaction['t_id']:
+            if self.get_memoized_transaction_id(initial_transaction) != initial_transaction['t_id']:
                 return False
         except:
              return False
@@ -381,7 +440,7 @@ class MinutoVoucher(Serializable):
         """
 
         # Check if the transaction ID is correct
-        if not transaction["t_id"] == VoucherTransaction.calculate_transaction_id(transaction):
+        if not transaction["t_id"] == self.get_memoized_transaction_id(transaction):
             return False
 
         # Verify the signature against the sender's public key
@@ -391,11 +450,123 @@ class MinutoVoucher(Serializable):
                                                   pubkey)
         return is_signature_valid
 
-    def verify_all_transactions(self, verbose=False):
+    @staticmethod
+    def get_transaction_hash(transaction):
+        """
+        Returns the hash of a transaction as used for the linkage (previous_hash) of the following transaction.
+        """
+        return get_hash(json.dumps(dict(transaction), sort_keys=True).encode())
+
+    def get_transaction_memo(self, transaction):
+        """
+        Returns the memo dict of a transaction of this voucher, in which the canonical JSON ('canonical'), the hash
+        ('hash', see get_transaction_hash) and the calculated transaction ID ('t_id') are stored once computed.
+        The memo is kept per transaction object together with a snapshot of its items, so any change of the
+        transaction (e.g. a modified amount) invalidates it. The memo is local only (not part of hash or signatures).
+        """
+        memo = self.__dict__.setdefault('_transaction_memo', {})
+        snapshot = tuple(transaction.items())
+        entry = memo.get(id(transaction))
+        if entry is None or entry[0] is not transaction or entry[1] != snapshot:
+            if len(memo) > 2 * len(self.transactions) + 8:  # remove memos of removed or replaced transactions
+                current = {id(t): t for t in self.transactions}
+                for key in [key for key, value in memo.items() if current.get(key) is not value[0]]:
+                    del memo[key]
+            entry = memo[id(transaction)] = (transaction, snapshot, {})
+        return entry[2]
+
+    def get_memoized_transaction_hash(self, transaction):
+        """Returns the hash of a transaction (see get_transaction_hash), computed only once per transaction."""
+        memo = self.get_transaction_memo(transaction)
+        if 'hash' not in memo:
+            memo['canonical'] = json.dumps(dict(transaction), sort_keys=True).encode()
+            memo['hash'] = get_hash(memo['canonical'])
+        return memo['hash']
+
+    def get_memoized_transaction_id(self, transaction):
+        """Returns the calculated transaction ID (see VoucherTransaction.calculate_transaction_id), computed once."""
+        memo = self.get_transaction_memo(transaction)
+        if 't_id' not in memo:
+            memo['t_id'] = VoucherTransaction.calculate_transaction_id(transaction)
+        return memo['t_id']
+
+    def get_prefix_digest(self, length):
+        """
+        Returns a digest over the canonical data of the first `length` transactions and, for compacted vouchers, the
+        transaction checkpoint. Any change of one of these transactions (or of the checkpoint) changes the digest.
+        The transaction hashes are memoized (see get_memoized_transaction_hash), so no signature is verified here.
+
+        :param length: Number of leading transactions covered by the digest.
+        :return: The digest (hash string).
+        """
+        hashes = [self.voucher_id]
+        if self.transaction_checkpoint is not None:
+            hashes.append(get_hash(json.dumps(self.transaction_checkpoint, sort_keys=True).encode()))
+        hashes += [self.get_memoized_transaction_hash(transaction) for transaction in self.transactions[:length]]
+        return get_hash(json.dumps(hashes).encode())
+
+    def set_verified_prefix(self, length):
+        """
+        Sets the verified-prefix checkpoint to the first `length` transactions, which have to be verified before.
+        """
+        self._verified_prefix = {'voucher_id': self.voucher_id, 'index': length - 1,
+                                 'digest': self.get_prefix_digest(length)}
+
+    def get_verified_prefix_length(self):
+        """
+        Returns the number of leading transactions which are covered by the verified-prefix checkpoint.
+        The checkpoint stores the index of the last verified transaction and a digest over all transactions up to
+        this index (see get_prefix_digest). The digest is calculated again on every call, so a checkpoint is only
+        used if none of the verified transactions was changed since.
+
+        :return: Number of already verified transactions, 0 if there is no valid checkpoint.
+        """
+        checkpoint = self._verified_prefix
+        if not checkpoint:
+            return 0
+        try:
+            index = checkpoint['index']
+            if checkpoint['voucher_id'] != self.voucher_id or not 0 <= index < len(self.transactions):
+                return 0
+            if self.get_prefix_digest(index + 1) != checkpoint['digest']:
+                return 0
+        except Exception:  # corrupt checkpoint or transaction
+            return 0
+        return index + 1
+
+    def get_verified_prefix(self):
+        """
+        Returns a copy of the verified-prefix checkpoint (for local persistence) or None if there is no valid checkpoint.
+        """
+        if self.get_verified_prefix_length() == 0:
+            return None
+        return dict(self._verified_prefix)
+
+    def restore_verified_prefix(self, checkpoint):
+        """
+        Restores a verified-prefix checkpoint from local storage. The checkpoint is only accepted if its digest
+        matches the current transactions of the voucher (see get_verified_prefix_length).
+        Important: Only use checkpoints from trusted (own encrypted) storage, never from received data.
+
+        :param checkpoint: The checkpoint dict as returned by get_verified_prefix.
+        :return: True if the checkpoint was accepted, False otherwise.
+        """
+        self._verified_prefix = checkpoint if isinstance(checkpoint, dict) else None
+        if self.get_verified_prefix_length() == 0 or \
+                (self.transaction_checkpoint is not None and not self.verify_transaction_checkpoint()):
+            self._verified_prefix = None
+            return False
+        return True
+
+    def verify_all_transactions(self, verbose=False, use_checkpoint=True):
         """
         Verifies all transactions in the voucher.
+        Transactions covered by the verified-prefix checkpoint are not verified again, so after new transactions
+        were appended only the new part of the chain is verified. After a successful verification the checkpoint
+        is moved to the last transaction.
 
         :param verbose: If set to True, print detailed messages during the verification process.
+        :param use_checkpoint: If set to False, the complete chain is verified regardless of the checkpoint.
         :return: True if all transactions are valid, False otherwise.
         """
 
@@ -405,22 +576,34 @@ class MinutoVoucher(Serializable):
                 print("No transactions to verify.")
             return False
 
-        # Verify the initial transaction
-        if not self.verify_initial_transaction():
+        verified_prefix_length = self.get_verified_prefix_length() if use_checkpoint else 0
+        first_index = verified_prefix_length
+        if first_index == 0 and self.transaction_checkpoint is not None:
+            # The compacted transactions can't be verified anymore. Compacted vouchers are only valid with the
+            # verified-prefix checkpoint of the own local storage (see compact_transactions).
             if verbose:
-                print("Initial transaction verification failed.")
+                print("Compacted voucher without local verification (compacted vouchers of other users are invalid).")
             return False
+        elif first_index == 0:
+            # Verify the initial transaction
+            if not self.verify_initial_transaction():
+                if verbose:
+                    print("Initial transaction verification failed.")
+                return False
+            first_index = 1
+        elif verbose:
+            print(f"Transactions 0 to {first_index - 1} already verified (checkpoint).")
 
         # to catch key errors when corrupt file
         try:
 
             # Loop through and verify each subsequent transaction
-            for i in range(1, len(self.transactions)):
+            for i in range(first_index, len(self.transactions)):
                 current_transaction = self.transactions[i]
                 previous_transaction = self.transactions[i - 1]
 
                 if verbose:
-                    print(f"Verifying transaction: {i} - ID: {current_transaction['t_id'][:6]}...")
+                    print(f"Verifying transaction: {i} - ID: {current_transaction.t_id[:6]}...")
 
                 # Verify the transaction ID and the sender's signature
                 if not self.verify_transaction_ids_signature(current_transaction):
@@ -432,36 +615,37 @@ class MinutoVoucher(Serializable):
                     print("VoucherTransaction ID and Signature are okay")
 
                 # Verify if the sender was authorized to send
-                allowed_senders = [previous_transaction['recipient_id']]
-                if previous_transaction.get('t_type', '') == 'split':
-                    allowed_senders.append(previous_transaction['sender_id'])
-                if current_transaction['sender_id'] not in allowed_senders:
+                allowed_senders = [previous_transaction.recipient_id]
+                if previous_transaction.t_type == 'split':
+                    allowed_senders.append(previous_transaction.sender_id)
+                if current_transaction.sender_id not in allowed_senders:
                     if verbose:
-                        print(f"Sender {current_transaction['sender_id'][:6]}... was not authorized to send.")
+                        print(f"Sender {current_transaction.sender_id[:6]}... was not authorized to send.")
                     return False
 
                 if verbose:
-                    print(f"Sender {current_transaction['sender_id'][:6]}... was allowed to send")
+                    print(f"Sender {current_transaction.sender_id[:6]}... was allowed to send")
 
                 # Verify if the sent amount was permissible
                 # Typically, the recipient of the last transaction is the sender of the current transaction
-                allowed_amount = float(previous_transaction['amount'])
-                if previous_transaction.get('t_type', '') == 'split' and current_transaction['sender_id'] == \
-                        previous_transaction['sender_id']:
+                # (the amounts are None if they are no numbers, the comparison fails then)
+                allowed_amount = previous_transaction.amount_value
+                if previous_transaction.t_type == 'split' and current_transaction.sender_id == \
+                        previous_transaction.sender_id:
                     # when after split transaction the sender will send again, the remaining amount of the prev.
                     # transaction is the allowed amount
-                    allowed_amount = float(previous_transaction['sender_remaining_amount'])
-                if float(current_transaction['amount']) > allowed_amount:
+                    allowed_amount = previous_transaction.sender_remaining_value
+                if current_transaction.amount_value > allowed_amount:
                     if verbose:
-                        print(f"Too much sent! {float(current_transaction['amount'])} Minuto (max allowed {allowed_amount})")
+                        print(f"Too much sent! {current_transaction.amount_value} Minuto (max allowed {allowed_amount})")
                     return False
 
                 if verbose:
-                    print(f"Received {float(current_transaction['amount'])} Minuto (max allowed {allowed_amount})")
+                    print(f"Received {current_transaction.amount_value} Minuto (max allowed {allowed_amount})")
 
                 # Verify the linkage to the previous transaction
-                previous_transaction_hash = get_hash(json.dumps(previous_transaction, sort_keys=True).encode())
-                if current_transaction['previous_hash'] != previous_transaction_hash:
+                previous_transaction_hash = self.get_memoized_transaction_hash(previous_transaction)
+                if current_transaction.previous_hash != previous_transaction_hash:
                     if verbose:
                         print("Linkage to the previous transaction failed.")
                     return False
@@ -469,6 +653,9 @@ class MinutoVoucher(Serializable):
                 if verbose:
                     print("Linkage (Hash of the previous transaction) is correct\n")
 
+            # move the checkpoint to the last (now verified) transaction
+            if verified_prefix_length != len(self.transactions):
+                self.set_verified_prefix(len(self.transactions))
         except:
             return False
 
@@ -476,12 +663,155 @@ class MinutoVoucher(Serializable):
             print("All transactions are okay")
         return True
 
+    @staticmethod
+    def get_checkpoint_data(checkpoint):
+        """
+        Returns the data of a transaction checkpoint which is signed by the signer of the checkpoint
+        (canonical JSON of all keys except the signature).
+        """
+        data = {key: value for key, value in checkpoint.items() if key != 'signature'}
+        return json.dumps(data, sort_keys=True, ensure_ascii=False)
+
+    def compact_transactions(self, key_for_signing: Key, keep=1):
+        """
+        Replaces the verified beginning of the transaction chain with a signed checkpoint, so the locally archived
+        voucher doesn't keep the complete history in memory and storage.
+
+        The checkpoint contains the number of compacted transactions (including earlier compactions), the hash of
+        the last compacted transaction ('prefix_hash', which covers the whole compacted chain, because every
+        transaction contains the hash of its predecessor) and the last compacted transaction itself with the
+        signature of its sender (the state of the last holder, needed to verify the first retained transaction).
+        The checkpoint is signed by a holder of the last compacted transaction (its recipient or, after a split,
+        its sender), who confirms that the compacted chain was verified.
+        Important: The compaction is only for the local archive. The compacted transactions can't be verified
+        anymore, so a compacted voucher is only valid with the verified-prefix checkpoint of the local storage
+        (see verify_all_transactions) and is rejected when received from other users. Vouchers which will be sent
+        must not be compacted, and the full history should be archived before (see UserProfile.compact_voucher).
+
+        :param key_for_signing: The key of the holder signing the checkpoint.
+        :param keep: Number of transactions at the end of the chain which are kept (at least 1).
+        :return: The list of the compacted transactions.
+        """
+        keep = max(1, keep)
+        if len(self.transactions) <= keep:
+            raise ValueError("Not enough transactions to compact.")
+        if not self.verify_all_transactions():
+            raise ValueError("Only vouchers with verified transactions can be compacted.")
+
+        compacted = self.transactions[:-keep]
+        last_transaction = compacted[-1]
+        holders = [last_transaction['recipient_id']]
+        if last_transaction.get('t_type', '') == 'split':
+            holders.append(last_transaction['sender_id'])
+        if key_for_signing.id not in holders:
+            raise ValueError("Only a holder of the last compacted transaction can sign the checkpoint.")
+
+        previous_count = self.transaction_checkpoint['count'] if self.transaction_checkpoint else 0
+        checkpoint = {
+            'voucher_id': self.voucher_id,
+            'count': previous_count + len(compacted),
+            'prefix_hash': self.get_memoized_transaction_hash(last_transaction),
+            'last_transaction': dict(last_transaction),
+            'signer_id': key_for_signing.id,
+            'c_time': get_timestamp(),
+        }
+        checkpoint['signature'] = key_for_signing.sign(self.get_checkpoint_data(checkpoint), base64_encode=True)
+
+        self.transaction_checkpoint = checkpoint
+        self.transactions = self.transactions[-keep:]
+        # the retained transactions were verified above
+        self.set_verified_prefix(len(self.transactions))
+        return compacted
+
+    def verify_transaction_checkpoint(self, verbose=False):
+        """
+        Verifies the checkpoint of a compacted voucher: the signature of the checkpoint by a holder of the last
+        compacted transaction, the transaction ID and signature of the last compacted transaction, the prefix hash
+        and the linkage of the first retained transaction to the checkpoint.
+        Note: A valid checkpoint doesn't prove that the compacted transactions were valid (anybody can sign a
+        checkpoint over an invented last transaction). It is only used to check the integrity of the own local
+        storage (see restore_verified_prefix), the compacted voucher itself is valid only with the local
+        verified-prefix checkpoint.
+
+        :return: True if the checkpoint is valid, False otherwise.
+        """
+        checkpoint = self.transaction_checkpoint
+        # to catch key errors when corrupt file
+        try:
+            last_transaction = checkpoint['last_transaction']
+            if checkpoint['voucher_id'] != self.voucher_id or checkpoint['count'] < 1 or not self.transactions:
+                if verbose:
+                    print("Checkpoint does not belong to this voucher.")
+                return False
+
+            if checkpoint['prefix_hash'] != self.get_transaction_hash(last_transaction) or \
+                    self.transactions[0]['previous_hash'] != checkpoint['prefix_hash']:
+                if verbose:
+                    print("Linkage to the checkpoint failed.")
+                return False
+
+            if not self.verify_transaction_ids_signature(last_transaction):
+                if verbose:
+                    print("Last compacted transaction ID or sender's signature verification failed.")
+                return False
+
+            if float(last_transaction['amount']) > float(self.amount) or \
+                    float(last_transaction.get('sender_remaining_amount', 0)) > float(self.amount):
+                if verbose:
+                    print("Amount of the last compacted transaction exceeds the voucher amount.")
+                return False
+
+            holders = [last_transaction['recipient_id']]
+            if last_transaction.get('t_type', '') == 'split':
+                holders.append(last_transaction['sender_id'])
+            if checkpoint['signer_id'] not in holders:
+                if verbose:
+                    print(f"Signer {checkpoint['signer_id'][:6]}... of the checkpoint was no holder.")
+                return False
+
+            pubkey = Key.get_pubkey_from_id(checkpoint['signer_id'])
+            if not Key.verify_signature(self.get_checkpoint_data(checkpoint), checkpoint['signature'], pubkey):
+                if verbose:
+                    print("Invalid signature of the checkpoint.")
+                return False
+        except:
+            return False
+
+        if verbose:
+            print(f"Checkpoint of {checkpoint['count']} compacted transactions is okay")
+        return True
+
+    def get_content_hash(self):
+        """
+        Returns a hash of the complete voucher content (all attributes that are stored or sent, including
+        signatures and transactions). Used as key for the verification cache.
+        """
+        return get_hash(json.dumps(self.to_dict(), sort_keys=True, ensure_ascii=False).encode())
+
     def verify_complete_voucher(self, verbose=False):
         """
         Verifies the entire voucher including voucher_id, guarantor signatures, creator's signature, and all transactions.
+        The result is cached by the content hash of the voucher, so repeated verifications of an unchanged voucher
+        are nearly free. In verbose mode the cache is bypassed to print all details.
+        Compacted vouchers are not cached: they are only valid with the local verified prefix, which is not part of
+        the content (a received copy with the same content is invalid).
 
         :return: True if the entire voucher is valid, False otherwise.
         """
+        if verbose or self.transaction_checkpoint is not None:
+            return self._verify_complete_voucher(verbose)
+
+        content_hash = self.get_content_hash()
+        is_valid = verification_cache.get(content_hash)
+        if is_valid is None:
+            is_valid = self._verify_complete_voucher()
+            verification_cache.put(content_hash, is_valid)
+        return is_valid
+
+    def _verify_complete_voucher(self, verbose=False):
+        """
+        Verifies the entire voucher without using the verification cache.
+        """
 
         # Verify guarantor signatures
         if not self.verify_all_guarantor_signatures(self):
@@ -531,7 +861,7 @@ class MinutoVoucher(Serializable):
             # Other valid vouchers
             if self.get_voucher_amount(user_id) > 0:
                 return VoucherStatus.OTHER  # Vouchers from other users with amount
-            elif self.transactions[-1]['sender_id'] == user_id:
+            elif self.transactions[-1].sender_id == user_id:
                 return VoucherStatus.ARCHIVED
             else:
                 return VoucherStatus.TRASHED
@@ -564,8 +894,8 @@ class MinutoVoucher(Serializable):
         if voucher.transactions:
             # Iterate through transactions from the last to the first and add a local ID for each transaction involving the user
             for transaction in reversed(voucher.transactions):
-                if user_id == transaction['recipient_id'] or user_id == transaction['sender_id']:
-                    last_transaction_id = transaction['t_id']
+                if user_id == transaction.recipient_id or user_id == transaction.sender_id:
+                    last_transaction_id = transaction.t_id
                     old_local_ids.append(voucher.voucher_id[:8] + '-' + last_transaction_id[:8])
 
             # Add a default identifier based on the voucher_id if there are no transactions involving the user
@@ -594,6 +924,61 @@ class MinutoVoucher(Serializable):
 
         return str(self) == str(other)
 
+def _verify_voucher_in_worker(voucher, user_id):
+    """
+    Worker function of verify_many for process pools (module level to be picklable).
+    Returns the status and the verification results, so that they can be taken over by the main process.
+    """
+    content_hash = voucher.get_content_hash()
+    # compacted vouchers are not cached (see MinutoVoucher.verify_complete_voucher)
+    is_valid = voucher.verify_complete_voucher() \
+        if voucher.transactions and voucher.transaction_checkpoint is None else None
+    return voucher.voucher_status(user_id), content_hash, is_valid, voucher._verified_prefix
+
+
+def verify_many(vouchers, user_id, workers=None, use_processes=True):
+    """
+    Verifies a list of vouchers in parallel and determines the VoucherStatus of each voucher.
+    The signature verification is distributed to a process pool or, with use_processes=False, to a thread pool
+    (the signature verification of the cryptography library releases the GIL). With a process pool the results
+    (verification cache and verified-prefix checkpoints) are taken over in the calling process, so following status
+    queries of the vouchers don't need to verify again.
+
+    Args:
+        vouchers (list): The MinutoVoucher objects to verify.
+        user_id (str): The user ID used to determine the status of the vouchers (see MinutoVoucher.voucher_status).
+        workers (int, optional): Number of parallel workers. Defaults to the number of CPU cores.
+        use_processes (bool): If True a process pool is used, otherwise a thread pool.
+
+    Returns:
+        list: The VoucherStatus of every voucher in the same order as the given vouchers.
+    """
+    vouchers = list(vouchers)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(vouchers))
+
+    # no pool for single vouchers or single worker
+    if workers <= 1:
+        return [voucher.voucher_status(user_id) for voucher in vouchers]
+
+    if not use_processes:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda voucher: voucher.voucher_status(user_id), vouchers))
+
+    chunksize = max(1, len(vouchers) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_verify_voucher_in_worker, vouchers, repeat(user_id), chunksize=chunksize))
+
+    statuses = []
+    for voucher, (status, content_hash, is_valid, verified_prefix) in zip(vouchers, results):
+        if is_valid is not None:
+            verification_cache.put(content_hash, is_valid)
+        voucher.restore_verified_prefix(verified_prefix)
+        statuses.append(status)
+    return statuses
+
+
 def is_voucher_dict(data):
     """
     Checks if the dictionary contains all essential keys that are necessary to represent
@@ -3,7 +3,9 @@ from src.models.key import Key
 from src.models.minuto_voucher import VoucherStatus
 from src.models.voucher_transaction import VoucherTransaction
 from src.models.user_transaction import UserTransaction
-from src.services.utils import get_timestamp, dprint, amount_precision, get_double_spending_vtransaction_ids
+from src.models.voucher_collection import VoucherCollection
+from src import config
+from src.services.utils import get_timestamp, dprint, amount_precision
 import json
 
 class Person:
@@ -22,6 +24,24 @@ class Person:
         # Initialize voucherlist using VoucherStatus enum
         self.voucherlist = {status.value: [] for status in VoucherStatus}
 
+    @property
+    def voucherlist(self):
+        return self._voucherlist
+
+    @voucherlist.setter
+    def voucherlist(self, voucherlist):
+        # the voucher collection indexes the vouchers by status and keeps the balance ledger of the person up to date
+        self._voucherlist = VoucherCollection(self.id, voucherlist)
+
+    @property
+    def balance_ledger(self):
+        return self._voucherlist.ledger
+
+    @property
+    def double_spend_index(self):
+        # index of all voucher transactions for the double spending detection (see check_double_spending)
+        return self._voucherlist.double_spend_index
+
     def set_person_data(self, person_data):
         """
         Sets the attributes of the Person object based on the provided person_data dictionary.
@@ -68,52 +88,9 @@ class Person:
                       'voucher_id': The ID of the voucher on which double spending occurred.
                       Returns an empty list if no double spending is detected.
         """
-        from src.models.minuto_voucher import MinutoVoucher
-        # Accumulate all vouchers from all categories
-        all_vouchers = []
-        for status in VoucherStatus:
-            all_vouchers += self.voucherlist[status.value]
-        double_spends = get_double_spending_vtransaction_ids(all_vouchers)
-        number_of_double_spends = len(double_spends)
-        if number_of_double_spends == 0:
-            return []
-
-        # If double spends, then detect user id that double spends
-        double_spend_info = []
-        for dspend_t_ids in double_spends:
-            for voucher in all_vouchers:
-                for transaction in voucher.transactions:
-                    if transaction["t_id"] not in dspend_t_ids:
-                        continue
-
-                    user_id = transaction["sender_id"]  # The sender is the double spender
-                    max_allowed_amount = MinutoVoucher.get_transaction_amount(voucher, user_id, transaction["t_id"])
-
-                    # Find the user's info if it exists
-                    user_info = next((info for info in double_spend_info if info['double_spender_id'] == user_id), None)
-
-                    if not user_info:
-                        # If user info doesn't exist, add it with the current voucher and transaction
-                        double_spend_info.append({
-                            "double_spender_id": user_id,
-                            "voucher": [{"voucher_id": voucher.voucher_id, "max_allowed_amount": max_allowed_amount, "send_amount" : str(transaction["amount"]),
-                                         "transactions": [transaction]}]})
-                    else:
-                        # Find the voucher info if it exists
-                        voucher_info = next((v for v in user_info['voucher'] if v['voucher_id'] == voucher.voucher_id),
-                                            None)
-
-                        if not voucher_info:
-                            # If voucher info doesn't exist, add it with the current transaction
-                            user_info['voucher'].append(
-                                {"voucher_id": voucher.voucher_id, "max_allowed_amount": max_allowed_amount, "send_amount" : str(transaction["amount"]),
-                                 "transactions": [transaction]})
-                        else:
-                            # If voucher exists, append transaction_id
-                            voucher_info['transactions'].append(transaction)
-                            voucher_info["send_amount"] = str(float(voucher_info["send_amount"]) + float(transaction["amount"]))
-
-        return double_spend_info
+        # the voucher collection indexes the transactions when vouchers are added, changed or removed,
+        # so the report is built from the conflicting index entries only
+        return self.double_spend_index.get_double_spending_info()
 
     def read_voucher_and_save_voucher(self, filename, subfolder=None, simulation = False):
         """read the voucher and stores it to persons voucher list"""
@@ -318,9 +295,9 @@ class Person:
         transaction = VoucherTransaction(voucher)
         transaction_data = transaction.get_initial_transaction(self.key)
         voucher.transactions.append(transaction_data)
-        # add voucher to own list and remove from unfinished list
-        self.voucherlist[VoucherStatus.OWN.value].append(voucher)
+        # move voucher from the unfinished list to the own list
         self.voucherlist[VoucherStatus.UNFINISHED.value].remove(voucher)
+        self.voucherlist[VoucherStatus.OWN.value].append(voucher)
         return True, ""
 
     def verify_creator_signature(self, voucher=None):
@@ -338,22 +315,14 @@ class Person:
         """
         transaction = self.usertransaction.process_transaction_to_user(self, amount, recipient_id, purpose=purpose)
 
-        # clean vouchers with empty amount (balance)
-        # Create a new list for the remaining vouchers
-        remaining_vouchers = []
-        for list_type in [VoucherStatus.OTHER.value, VoucherStatus.OWN.value]:
-            for voucher in self.voucherlist[list_type]:
-                if voucher.get_voucher_amount(self.id) == 0:
-                    self.voucherlist[VoucherStatus.ARCHIVED.value].append(voucher)  # Add empty voucher to the empty vouchers list
-                else:
-                    remaining_vouchers.append(voucher)  # Keep the voucher if it's not empty
-
-        self.voucherlist[VoucherStatus.OWN.value] = []
-        self.voucherlist[VoucherStatus.OTHER.value] = []
-        # add the self.vouchers list with the remaining vouchers
-        for voucher in remaining_vouchers:
-            voucher_status = voucher.voucher_status(self.id)
-            self.voucherlist[voucher_status.value].append(voucher)
+        # update the status of the vouchers used for the transaction only, all other vouchers keep their status
+        for voucher in transaction.transaction_vouchers:
+            if voucher.get_voucher_amount(self.id) == 0:
+                voucher_status = VoucherStatus.ARCHIVED  # move empty voucher to the empty vouchers list
+            else:
+                voucher_status = voucher.voucher_status(self.id)
+            if self.voucherlist.get_status(voucher) in [VoucherStatus.OTHER.value, VoucherStatus.OWN.value]:
+                self.voucherlist.move(voucher, voucher_status.value)
 
         return transaction
 
@@ -391,13 +360,12 @@ class Person:
 
 
     def get_amount_of_all_vouchers(self):
-        """calculates the full amount of all vouchers of the person"""
-        full_amount = 0
+        """returns the full amount of all vouchers of the person (from the balance ledger)"""
+        if config.BALANCE_LEDGER_CHECK and not self.balance_ledger.check_consistency(self.voucherlist):
+            raise ValueError("Balance ledger is inconsistent with the voucher lists")
         # only own and other are vouchers with amount
-        available_vouchers = self.voucherlist[VoucherStatus.OWN.value] + self.voucherlist[VoucherStatus.OTHER.value]
-        for voucher in available_vouchers:
-            full_amount += voucher.get_voucher_amount(self.id)
-        return full_amount
+        return (self.balance_ledger.get_balance(VoucherStatus.OWN.value)
+                + self.balance_ledger.get_balance(VoucherStatus.OTHER.value))
 
     def check_duplicate_voucher_objects(self):
         """
@@ -1,6 +1,10 @@
 # secure_file_handler.py
 import json
-from src.services.crypto_utils import symmetric_decrypt, symmetric_encrypt, generate_shared_secret, extract_compressed_pubkey_from_public_ID
+import secrets
+from cryptography.fernet import InvalidToken
+from src.services.crypto_utils import symmetric_decrypt, symmetric_encrypt, generate_shared_secret, \
+    extract_compressed_pubkey_from_public_ID, derive_symmetric_key, b64d
+from src.services.utils import LRUCache
 import os
 from pathlib import Path
 
@@ -15,8 +19,11 @@ class SecureFileHandler:
         self.private_key = private_key
         self.own_user_id = own_user_id
         self.data_folder = os.getcwd()
+        # ECDH shared secrets of the own private key per peer user ID (computed once per peer and session)
+        self._shared_secret_cache = LRUCache(maxsize=1024)
 
-    def encrypt_and_save(self, obj, file_path, password="", second_password=None, key=None, salt=None, subfolder=None):
+    def encrypt_and_save(self, obj, file_path, password="", second_password=None, key=None, salt=None, subfolder=None,
+                         binary=False):
         """
         Encrypts an object using symmetric encryption and saves it to a file.
 
@@ -25,6 +32,7 @@ class SecureFileHandler:
             file_path: Path to the file where the encrypted data will be saved.
             password: The password used for encryption.
             subfolder: Optional. The subfolder under the script directory where the file will be saved.
+            binary: Optional. If True, the object is serialized in the compact binary format instead of JSON.
         """
 
         # Create full file path including subfolder if provided
@@ -37,11 +45,12 @@ class SecureFileHandler:
         os.makedirs(os.path.dirname(full_path), exist_ok=True)
 
         # Encrypt the data
-        encrypted_data = symmetric_encrypt(obj, password=password, second_password=second_password, key=key, salt=salt)
+        encrypted_data = symmetric_encrypt(obj, password=password, second_password=second_password, key=key, salt=salt,
+                                           binary=binary)
         with open(full_path, 'w') as file:
             json.dump(encrypted_data, file)
 
-    def decrypt_and_load(self, file_path, password, obj=None, subfolder=None):
+    def decrypt_and_load(self, file_path, password, obj=None, subfolder=None, key=None):
         """
         Decrypts data from a file using symmetric encryption.
 
@@ -49,6 +58,7 @@ class SecureFileHandler:
             file_path: Path to the file containing the encrypted data.
             password: The password used for decryption.
             subfolder: Optional. The subfolder under the script directory from where the file will be read.
+            key: Optional. Key used for decryption instead of the password (skips the key generation).
         Returns:
             The decrypted object.
         """
@@ -61,9 +71,10 @@ class SecureFileHandler:
 
         with open(full_path, 'r') as file:
             encrypted_data = json.load(file)
-        return symmetric_decrypt(encrypted_data, password, obj)
+        return symmetric_decrypt(encrypted_data, password, obj, key=key)
 
-    def encrypt_with_shared_secret_and_save(self, obj, file_path, peer_user_id, own_user_id=None, private_key=None):
+    def encrypt_with_shared_secret_and_save(self, obj, file_path, peer_user_id, own_user_id=None, private_key=None,
+                                            binary=False):
         """
         Encrypts an object with a shared secret derived from ECDH using symmetric encryption and saves it to a file,
         using the encrypt_and_save method. Optionally, encrypts and appends the own user ID with a special marker.
@@ -75,6 +86,7 @@ class SecureFileHandler:
             private_key (bytes, optional): The private key used in ECDH to generate the shared secret.
                                           If not provided, the instance's private key is used.
             own_user_id (str, optional): The own user ID to encrypt and append to the encrypted data.
+            binary (bool, optional): If True, the object is serialized in the compact binary format instead of JSON.
 
         Raises:
             ValueError: If the private key is not provided and not set in the instance.
@@ -88,14 +100,13 @@ class SecureFileHandler:
         if private_key is None:
             raise ValueError("Private key is required but not provided.")
 
-        peer_compressed_public_key = extract_compressed_pubkey_from_public_ID(peer_user_id)
-        shared_secret = generate_shared_secret(private_key, peer_compressed_public_key)
+        shared_secret = self.get_shared_secret(peer_user_id, private_key)
 
-        encrypted_data = symmetric_encrypt(obj, password=shared_secret)
+        encrypted_data = self.encrypt_with_secret(obj, shared_secret, binary=binary)
 
         # Encrypt and append the own user ID with a special marker if provided
         if own_user_id is not None:
-            encrypted_own_user_id = symmetric_encrypt(own_user_id, password=peer_user_id)
+            encrypted_own_user_id = self.encrypt_with_secret(own_user_id, peer_user_id)
             encrypted_data += '@' + encrypted_own_user_id
 
         with open(file_path, 'w') as file:
@@ -140,15 +151,74 @@ class SecureFileHandler:
             encrypted_data, encrypted_own_user_id = encrypted_data.split(uid_marker, 1)
             if not peer_user_id and own_user_id:
                 # Decrypt the peer_user_id using the own_user_id
-                peer_user_id = symmetric_decrypt(encrypted_own_user_id, password=own_user_id)
+                peer_user_id = self.decrypt_with_secret(encrypted_own_user_id, own_user_id)
 
         if peer_user_id:
-            peer_compressed_public_key = extract_compressed_pubkey_from_public_ID(peer_user_id)
-            shared_secret = generate_shared_secret(private_key, peer_compressed_public_key)
+            shared_secret = self.get_shared_secret(peer_user_id, private_key)
         else:
             raise ValueError("Peer user ID could not be determined for decryption.")
 
-        return symmetric_decrypt(encrypted_data, shared_secret, obj)
+        return self.decrypt_with_secret(encrypted_data, shared_secret, obj)
+
+    def get_shared_secret(self, peer_user_id, private_key):
+        """
+        Returns the ECDH shared secret with a peer. Shared secrets of the own private key are cached per peer,
+        so repeated files from or to the same peer need only one key exchange.
+
+        Args:
+            peer_user_id (str): The user ID of the peer.
+            private_key: The private key used in ECDH.
+
+        Returns:
+            bytes: The shared secret.
+        """
+        use_cache = private_key is self.private_key
+        shared_secret = self._shared_secret_cache.get(peer_user_id) if use_cache else None
+        if shared_secret is None:
+            peer_compressed_public_key = extract_compressed_pubkey_from_public_ID(peer_user_id)
+            shared_secret = generate_shared_secret(private_key, peer_compressed_public_key)
+            if use_cache:
+                self._shared_secret_cache.put(peer_user_id, shared_secret)
+        return shared_secret
+
+    def clear_shared_secret_cache(self):
+        self._shared_secret_cache.clear()
+
+    @staticmethod
+    def encrypt_with_secret(obj, secret, binary=False):
+        """
+        Encrypts an object with a key derived from a secret (shared secret or user ID) with HKDF instead of PBKDF2.
+
+        Args:
+            obj (Serializable or dict or str): The object to encrypt.
+            secret (bytes or str): The secret used to derive the key.
+            binary (bool, optional): If True, the object is serialized in the compact binary format instead of JSON.
+
+        Returns:
+            str: The encrypted string (same format as symmetric_encrypt).
+        """
+        salt = secrets.token_bytes(16)
+        return symmetric_encrypt(obj, key=derive_symmetric_key(secret, salt), salt=salt, binary=binary)
+
+    @staticmethod
+    def decrypt_with_secret(encrypted_string, secret, obj=None):
+        """
+        Decrypts a string encrypted with encrypt_with_secret. Strings of older versions, encrypted with the
+        secret as password (PBKDF2), are still decrypted. Other errors (e.g. corrupt data) are raised.
+
+        Args:
+            encrypted_string (str): The encrypted string.
+            secret (bytes or str): The secret used to derive the key.
+            obj (Serializable or dict, optional): The object type to which the decrypted data will be converted.
+
+        Returns:
+            Serializable or dict or str: The decrypted object.
+        """
+        salt = b64d(encrypted_string.split('|')[1])
+        try:
+            return symmetric_decrypt(encrypted_string, cls=obj, key=derive_symmetric_key(secret, salt))
+        except InvalidToken:  # not encrypted with the derived key -> older version
+            return symmetric_decrypt(encrypted_string, secret, obj)
 
     def delete_file(self, file_path, subfolder=None):
         """
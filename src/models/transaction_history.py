@@ -0,0 +1,143 @@
+# transaction_history.py
+import bisect
+
+
+class TransactionHistory:
+    """
+    The done transactions of a profile, sorted by time (most recent first).
+
+    The transactions are kept in a list sorted by (time, insertion order) and in lists per sender and
+    recipient, so a transaction is inserted with bisect in O(log n) (plus the list insert) and time range
+    queries are answered with bisect. Supports the read access of a dict (transaction_id -> entry) in
+    descending time order, like the former management dict.
+    Listeners are notified about every change (e.g. to update a transaction list without rebuilding it).
+    """
+
+    def __init__(self):
+        self._listeners = []  # callables listener(event, entry), see add_listener
+        self.clear()
+
+    def clear(self):
+        """Removes all transactions (the listeners are kept and notified with the event 'clear')."""
+        self._entries = {}  # transaction_id -> entry (dict with id, sender, recipient, amount, purpose, time, ...)
+        self._keys = {}  # transaction_id -> sort key
+        self._sorted = []  # sort keys (time, -insertion number, transaction_id) in ascending order
+        self._by_sender = {}  # sender_id -> sorted list of sort keys
+        self._by_recipient = {}  # recipient_id -> sorted list of sort keys
+        self._counter = 0
+        self._notify('clear', None)
+
+    def add_listener(self, listener):
+        """
+        Registers a function that is called after every change with (event, entry): 'add' after an entry was
+        added, 'remove' after an entry was removed (an entry with an existing id is removed before the new entry
+        is added) and 'clear' (entry None) after all entries were removed.
+        The listeners are called in the thread that changes the history.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    def _notify(self, event, entry):
+        for listener in self._listeners:
+            listener(event, entry)
+
+    def add(self, entry):
+        """
+        Adds or replaces a transaction entry.
+
+        Args:
+            entry (dict): The entry with at least 'id', 'sender', 'recipient' and 'time'.
+        """
+        transaction_id = entry['id']
+        if transaction_id in self._entries:
+            self.remove(transaction_id)
+        self._counter += 1
+        # transactions with the same time are listed in the order they were added
+        key = (entry['time'], -self._counter, transaction_id)
+        self._entries[transaction_id] = entry
+        self._keys[transaction_id] = key
+        bisect.insort(self._sorted, key)
+        bisect.insort(self._by_sender.setdefault(entry['sender'], []), key)
+        bisect.insort(self._by_recipient.setdefault(entry['recipient'], []), key)
+        self._notify('add', entry)
+
+    def remove(self, transaction_id):
+        entry = self._entries.pop(transaction_id)
+        key = self._keys.pop(transaction_id)
+        for keys in [self._sorted, self._by_sender[entry['sender']], self._by_recipient[entry['recipient']]]:
+            del keys[bisect.bisect_left(keys, key)]
+        self._notify('remove', entry)
+
+    def get(self, transaction_id, default=None):
+        return self._entries.get(transaction_id, default)
+
+    def __getitem__(self, transaction_id):
+        return self._entries[transaction_id]
+
+    def __contains__(self, transaction_id):
+        return transaction_id in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return (key[2] for key in reversed(self._sorted))
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return [self._entries[key[2]] for key in reversed(self._sorted)]
+
+    def items(self):
+        return [(key[2], self._entries[key[2]]) for key in reversed(self._sorted)]
+
+    def position(self, transaction_id, sender=None, recipient=None):
+        """
+        Returns the position of a transaction in the result of query(sender=..., recipient=...) (most recent
+        first) or None if the transaction is not in the history or does not match.
+        """
+        entry = self._entries.get(transaction_id)
+        if entry is None or sender not in (None, entry['sender']) or recipient not in (None, entry['recipient']):
+            return None
+        if sender is not None:
+            keys = self._by_sender[sender]
+        elif recipient is not None:
+            keys = self._by_recipient[recipient]
+        else:
+            keys = self._sorted
+        position = len(keys) - 1 - bisect.bisect_left(keys, self._keys[transaction_id])
+        if sender is not None and recipient is not None:
+            # count only the more recent transactions of the sender to the recipient
+            position = sum(1 for key in keys[len(keys) - position:]
+                           if self._entries[key[2]]['recipient'] == recipient)
+        return position
+
+    def query(self, start=None, end=None, sender=None, recipient=None):
+        """
+        Returns the entries of the transactions in the time range, most recent first.
+
+        Args:
+            start (str, optional): The earliest time (ISO 8601, inclusive).
+            end (str, optional): The latest time (ISO 8601, inclusive).
+            sender (str, optional): Only transactions of this sender.
+            recipient (str, optional): Only transactions to this recipient.
+
+        Returns:
+            list: The entries (dicts) of the matching transactions.
+        """
+        if sender is not None:
+            keys = self._by_sender.get(sender, [])
+        elif recipient is not None:
+            keys = self._by_recipient.get(recipient, [])
+        else:
+            keys = self._sorted
+        low = 0 if start is None else bisect.bisect_left(keys, (start,))
+        # all keys with time == end are smaller than (end, 1) (the second element is always negative)
+        high = len(keys) if end is None else bisect.bisect_right(keys, (end, 1))
+        entries = [self._entries[key[2]] for key in reversed(keys[low:high])]
+        if sender is not None and recipient is not None:
+            entries = [entry for entry in entries if entry['recipient'] == recipient]
+        return entries
@@ -0,0 +1,104 @@
+# transaction_record.py
+
+
+def _to_number(value):
+    """Returns the value as float or None if it is no number (e.g. a corrupt amount)."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TransactionRecord:
+    """
+    A transaction of a voucher (see VoucherTransaction) with one slot per field instead of a dict per transaction.
+
+    The fields can be read as attributes (None if the field is not set) or like a dict (record['amount'],
+    record.get('t_type'), items(), ...), so code written for the former transaction dicts keeps working.
+    The record is converted losslessly to the transaction dict (to_dict): the values are stored unchanged and the
+    set keys are kept in their order, so hashes, transaction IDs and signatures are not affected.
+    The amounts are additionally stored as numbers (amount_value and sender_remaining_value), so the verification
+    of a transaction chain doesn't parse them again for every transaction.
+    Unknown keys (e.g. of newer versions) are kept in a dict.
+    """
+    FIELDS = ('previous_hash', 'recipient_id', 'amount', 'sender_id', 't_time', 't_type', 'sender_note',
+              'recipient_note', 'sender_remaining_amount', 't_id', 'sender_signature')
+    __slots__ = FIELDS + ('amount_value', 'sender_remaining_value', '_keys', '_extra')
+
+    _FIELD_SET = frozenset(FIELDS)
+    _key_tuples = {}  # shared tuples of the set keys (most transactions have the same keys in the same order)
+
+    def __init__(self, data=None):
+        for field in self.FIELDS:
+            setattr(self, field, None)
+        self.amount_value = None
+        self.sender_remaining_value = None
+        self._keys = ()
+        self._extra = None  # unknown key -> value
+        if data:
+            for key, value in data.items():
+                self[key] = value
+
+    @classmethod
+    def from_dict(cls, data):
+        """Creates a TransactionRecord from a transaction dict (a record is returned unchanged)."""
+        if isinstance(data, cls):
+            return data
+        return cls(data)
+
+    def to_dict(self):
+        """Returns the transaction dict with the set keys in their original order."""
+        return {key: self[key] for key in self._keys}
+
+    def __getitem__(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
+        if key in self._FIELD_SET:
+            return getattr(self, key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if key in self._FIELD_SET:
+            setattr(self, key, value)
+            if key == 'amount':
+                self.amount_value = _to_number(value)
+            elif key == 'sender_remaining_amount':
+                self.sender_remaining_value = _to_number(value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+        if key not in self._keys:
+            keys = self._keys + (key,)
+            self._keys = self._key_tuples.setdefault(keys, keys)
+
+    def get(self, key, default=None):
+        return self[key] if key in self._keys else default
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def keys(self):
+        return list(self._keys)
+
+    def values(self):
+        return [self[key] for key in self._keys]
+
+    def items(self):
+        return [(key, self[key]) for key in self._keys]
+
+    def __eq__(self, other):
+        if isinstance(other, (TransactionRecord, dict)):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    __hash__ = None  # mutable like the former dicts
+
+    def __repr__(self):
+        return repr(self.to_dict())
@@ -1,15 +1,30 @@
 # user_profile.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from src.services.utils import convert_json_string_to_dict, file_exists, join_path, Serializable, read_file_content, \
     is_valid_object, dprint, display_balance
-from src.services.crypto_utils import generate_symmetric_key, symmetric_encrypt, symmetric_decrypt, b64d, is_encrypted_string, hash_bytes
+from src.services.crypto_utils import generate_symmetric_key, symmetric_encrypt, symmetric_decrypt, b64d, is_encrypted_string, hash_bytes, \
+    clear_key_cache
 from src.models.secure_file_handler import SecureFileHandler
+from src.models.voucher_store import SQLiteVoucherStore
 from src.models.person import Person
-from src.models.minuto_voucher import is_voucher_dict, VoucherStatus, MinutoVoucher, is_user_transaction_dict
+from src.models.minuto_voucher import is_voucher_dict, VoucherStatus, MinutoVoucher, is_user_transaction_dict, \
+    verify_many
 from src.models.user_transaction import UserTransaction
+from src.models.transaction_history import TransactionHistory
+from src import config
+
+# File extensions of vouchers, transactions and guarantor signatures (see import_files)
+DATA_FILE_EXTENSIONS = ('.mv', '.mt', '.ms')
+
+
 class UserProfile(Serializable):
     # Singleton instance of UserProfile.
     # Ensures a single, globally accessible user profile instance across the application.
     _instance = None
+    # Serializes the loading of the vouchers, which can run in a background task (see load_vouchers)
+    _voucher_load_lock = threading.RLock()
 
     def __new__(cls, *args, **kwargs):
         """Required for singleton instance"""
@@ -52,13 +67,32 @@ class UserProfile(Serializable):
         self.person = Person()
         self._profile_initialized = False
         self.file_enc_key = None # key for encyption of local files (vouchers)
+        self.voucher_storage = 'files'  # 'files' (one encrypted file per voucher) or 'sqlite' (single database file)
+        self.voucher_db_filename = 'vouchers.db'
+        self._voucher_store: SQLiteVoucherStore = None  # only used if voucher_storage is 'sqlite'
+        self.voucher_index_filename = 'voucher_index.dat'
+
+        # Lightweight index of all stored vouchers (location -> entry with voucher_id, local_vid, status, balance,
+        # valid_until, creator name and transaction count). It is stored encrypted with the file key, so at login
+        # only the index has to be read and the vouchers are loaded on demand (see self.load_vouchers).
+        # Stored vouchers that are not loaded (unreadable or duplicates) have an entry with 'skipped' (the reason),
+        # so the index still covers all locations of the voucher storage.
+        self._voucher_index = {}
+        self._voucher_index_changed = False  # the index is written once per operation (see save_voucher_index)
+        self._vouchers_loaded = False  # set only after all vouchers were read successfully
+        self._vouchers_loading = False  # guards against a new load of the vouchers while they are read
 
         # Initialize the vouchers management dictionary. This dictionary is used for managing vouchers in memory and
         # won't be stored on disk (excluded in the self.to_dict method). It is initialized at startup.
+        # The duplicate detection on import uses the local_vid and voucher_id indexes of the voucher collection of
+        # the person (see local_vid_exists).
         self.vouchers = {}
 
-        # Initialize the transaction management dictionary (excluded in the self.to_dict method)
-        self.transactions = {}
+        # Initialize the transaction history, sorted by time (excluded in the self.to_dict method)
+        if hasattr(self, 'transactions'):
+            self.transactions.clear()  # keep the listeners of the history (e.g. the transaction list of the GUI)
+        else:
+            self.transactions = TransactionHistory()
 
 
     def init_existing_profile(self,password):
@@ -67,30 +101,255 @@ class UserProfile(Serializable):
         seed = symmetric_decrypt(self.encrypted_seed_words, password)
         self.person = Person(self.person_data, seed=seed)
         self._secure_file_handler = SecureFileHandler(self.person.key.private_key, self.person.id) # prvate key needed for encrytion with other users
-        self.read_vouchers_from_disk()
+        self.open_voucher_store()
+        if not self.load_voucher_index():
+            self.load_vouchers()  # no valid index -> read all vouchers now (rebuilds the index)
         self.read_transactions_from_disk()
         return True
 
+    def load_vouchers(self):
+        """
+        Reads all vouchers from disk if not already done in this session.
+        Must be called before the voucher lists of the person are used.
+        The vouchers are marked as loaded only after they were read completely, until then the balances and
+        voucher lists are taken from the voucher index (the Qt GUI loads the vouchers in a background task right
+        after the login, see Frm_Mainwin.profile_login).
+        Other threads wait until the running load is finished. If reading fails, the next call reads again.
+        """
+        if self._vouchers_loaded:
+            return
+        with self._voucher_load_lock:
+            if self._vouchers_loaded or self._vouchers_loading:
+                return  # loaded by another thread meanwhile or called again while reading
+            self._vouchers_loading = True
+            try:
+                self.read_vouchers_from_disk()
+                self._vouchers_loaded = True
+            finally:
+                self._vouchers_loading = False
+
+    def vouchers_loaded(self):
+        return self._vouchers_loaded
+
+    def load_voucher_index(self):
+        """
+        Loads the encrypted voucher index from disk.
+        The index is only used if it contains exactly the vouchers in the voucher storage (including the skipped
+        ones, see read_vouchers_from_disk).
+
+        Returns:
+            bool: True if a valid index was loaded, otherwise False.
+        """
+        if not file_exists(self.data_folder, self.voucher_index_filename):
+            return False
+        try:
+            index_data = self._secure_file_handler.decrypt_and_load(
+                join_path(self.data_folder, self.voucher_index_filename), "", key=self.file_enc_key.encode('utf-8'))
+        except Exception as e:
+            print(f"Voucher index decryption failed: {e}")
+            return False
+
+        voucher_index = {entry['location']: entry for entry in index_data.get('entries', [])}
+        if set(voucher_index) != self.get_voucher_locations():
+            return False  # vouchers were added or removed outside of the app
+        self._voucher_index = voucher_index
+        return True
+
+    def save_voucher_index(self):
+        """
+        Writes the voucher index if it was changed. The voucher storage methods only mark the index as changed,
+        so an operation with many vouchers (send_minuto, import_files) writes the index only once at its end.
+        """
+        if not self._voucher_index_changed:
+            return
+        self._voucher_index_changed = False
+        self._secure_file_handler.encrypt_and_save({'entries': list(self._voucher_index.values())},
+                                                   self.voucher_index_filename,
+                                                   key=self.file_enc_key.encode('utf-8'), subfolder=self.data_folder)
+
+    def get_voucher_locations(self):
+        """
+        Returns the locations of all stored vouchers (file paths or row_ids of the voucher database)
+        without reading the vouchers.
+        """
+        if self._voucher_store is not None:
+            return set(self._voucher_store.get_row_ids())
+
+        import os
+        locations = set()
+        for status in VoucherStatus:
+            folder_path = os.path.join(self.data_folder, status.value)
+            if os.path.isdir(folder_path):
+                locations.update(os.path.join(folder_path, filename) for filename in os.listdir(folder_path)
+                                 if filename.endswith('.mv'))
+        return locations
+
+    def update_voucher_index(self, voucher: MinutoVoucher, voucher_status, location, old_location=None):
+        """
+        Adds or updates the index entry of a voucher.
+
+        Args:
+            voucher (MinutoVoucher): The voucher.
+            voucher_status (str): The status value of the voucher.
+            location: The file path or the row_id of the stored voucher.
+            old_location (optional): The previous location of the voucher, its entry will be removed.
+        """
+        if old_location is not None:
+            self._voucher_index.pop(old_location, None)
+        self._voucher_index_changed = True
+        self._voucher_index[location] = self.get_voucher_index_entry(voucher, voucher_status, location)
+
+    def get_voucher_index_entry(self, voucher: MinutoVoucher, voucher_status, location):
+        """
+        Returns the index entry of a voucher (see update_voucher_index).
+        """
+        return {
+            'location': location,
+            'voucher_id': voucher.voucher_id,
+            'local_vid': self.vouchers[id(voucher)]['local_vid'],
+            'status': voucher_status,
+            'balance': voucher.get_voucher_amount(self.person.id),
+            'amount': voucher.amount,
+            'valid_until': voucher.valid_until,
+            'creator_name': f"{voucher.creator_first_name} {voucher.creator_last_name}",
+            'tx_count': len(voucher.transactions)
+        }
+
+    def get_voucher_index(self, voucher_status=None):
+        """
+        Returns the index entries of all loadable vouchers, optionally only those with the given status value.
+        """
+        return [entry for entry in self._voucher_index.values() if not entry.get('skipped')
+                and (voucher_status is None or entry['status'] == voucher_status)]
+
+    def get_voucher(self, location):
+        """
+        Returns the voucher stored at the given location (file path or row_id). Loads the vouchers if necessary.
+        """
+        self.load_vouchers()
+        for voucher_list in self.person.voucherlist.values():
+            for voucher in voucher_list:
+                info = self.vouchers.get(id(voucher))
+                if info and location in (info.get('file_path'), info.get('row_id')):
+                    return voucher
+        return None
+
+    def open_voucher_store(self):
+        """
+        Opens the SQLite voucher database if the profile uses the 'sqlite' voucher storage.
+        """
+        if self.voucher_storage != 'sqlite' or self._voucher_store is not None:
+            return
+        import os
+        os.makedirs(self.data_folder, exist_ok=True)
+        self._voucher_store = SQLiteVoucherStore(join_path(self.data_folder, self.voucher_db_filename),
+                                                 self.file_enc_key.encode('utf-8'), binary=config.BINARY_STORAGE)
+
+    def close_voucher_store(self):
+        if self._voucher_store is not None:
+            self._voucher_store.close()
+            self._voucher_store = None
+
+    def set_voucher_storage(self, voucher_storage):
+        """
+        Changes the voucher storage of the profile ('files' or 'sqlite') and moves all vouchers to the new storage.
+
+        Args:
+            voucher_storage (str): 'files' for one encrypted file per voucher or 'sqlite' for a single database file.
+        """
+        if voucher_storage not in ['files', 'sqlite']:
+            raise ValueError(f"Unknown voucher storage: {voucher_storage}")
+        if voucher_storage == self.voucher_storage:
+            return
+        self.load_vouchers()
+
+        # remember the old storage locations of all vouchers before switching
+        old_locations = [(info.get('file_path'), info.get('row_id')) for info in self.vouchers.values()]
+        old_store = self._voucher_store
+        self._voucher_store = None
+
+        self.voucher_storage = voucher_storage
+        self.open_voucher_store()
+        for info in self.vouchers.values():
+            info['file_path'] = None
+            info['row_id'] = None
+        self._voucher_index = {}
+        self._voucher_index_changed = True
+
+        # save all vouchers into the new storage (the status list of each voucher is kept)
+        for status in VoucherStatus:
+            for voucher in self.person.voucherlist[status.value][:]:
+                if id(voucher) in self.vouchers:
+                    self.write_voucher(voucher, status.value)
+        self.save_voucher_index()
+
+        # remove vouchers from the old storage
+        for file_path, row_id in old_locations:
+            if file_path:
+                self._secure_file_handler.delete_file(file_path)
+            if row_id is not None and old_store is not None:
+                old_store.delete_voucher(row_id)
+        if old_store is not None:
+            old_store.close()
+        self.save_profile_to_disk()
+
     def read_vouchers_from_disk(self):
         """
         Reads vouchers from disk and categorizes them based on their types.
         It expects the folders to be named according to the VoucherStatus enum.
+        With the 'sqlite' voucher storage all vouchers are read from the database with one query.
         """
         import os
-        for status in VoucherStatus:  # Iterate over each status in the VoucherStatus enum
-            folder_name = status.value  # Get the folder name corresponding to the voucher status
-            folder_path = os.path.join(self.data_folder, folder_name)
-            os.makedirs(folder_path, exist_ok=True)
-
-            # List all files in the directory
-            for filename in os.listdir(folder_path):
-                # Check if the file is a .mv file
-                if filename.endswith('.mv'):
-                    full_file_path = os.path.join(folder_path, filename)
-                    if status == VoucherStatus.TRASHED:
-                        self.open_voucher(full_file_path, trashed=True)
-                    else:
-                        self.open_voucher(full_file_path)
+        loaded_vouchers = []  # list of (voucher, file_path or row_id, trashed)
+        skipped_locations = {}  # file_path or row_id -> reason, for stored vouchers that are not loaded
+        if self._voucher_store is not None:
+            for row_id, status, voucher_data in self._voucher_store.load_vouchers():
+                if is_voucher_dict(voucher_data):
+                    voucher = MinutoVoucher.read_from_dict(voucher_data)
+                    voucher.restore_verified_prefix(voucher_data.get('_verified_prefix'))
+                    loaded_vouchers.append((voucher, row_id, status == VoucherStatus.TRASHED.value))
+                else:
+                    skipped_locations[row_id] = 'unreadable'
+        else:
+            for status in VoucherStatus:  # Iterate over each status in the VoucherStatus enum
+                folder_name = status.value  # Get the folder name corresponding to the voucher status
+                folder_path = os.path.join(self.data_folder, folder_name)
+                os.makedirs(folder_path, exist_ok=True)
+
+                # List all files in the directory
+                for filename in os.listdir(folder_path):
+                    # Check if the file is a .mv file
+                    if filename.endswith('.mv'):
+                        full_file_path = os.path.join(folder_path, filename)
+                        voucher = self.read_voucher_file(full_file_path)
+                        if voucher is not None:
+                            loaded_vouchers.append((voucher, full_file_path, status == VoucherStatus.TRASHED))
+                        else:
+                            skipped_locations[full_file_path] = 'unreadable'
+
+        # Verify all (not trashed) vouchers in parallel
+        vouchers_to_verify = [voucher for voucher, _, trashed in loaded_vouchers if not trashed]
+        voucher_statuses = iter(verify_many(vouchers_to_verify, self.person.id, workers=config.VERIFICATION_WORKERS,
+                                            use_processes=config.VERIFICATION_USE_PROCESSES))
+
+        # the new index replaces the old one only when it is complete (it can be read meanwhile, see load_vouchers)
+        voucher_index = {}
+        for voucher, location, trashed in loaded_vouchers:
+            voucher_status = VoucherStatus.TRASHED if trashed else next(voucher_statuses)
+            if self._voucher_store is not None:
+                added = self.add_loaded_voucher(voucher, None, voucher_status, trashed, row_id=location)
+            else:
+                added = self.add_loaded_voucher(voucher, location, voucher_status, trashed)
+            if added:
+                voucher_index[location] = self.get_voucher_index_entry(voucher, voucher_status.value, location)
+            else:
+                skipped_locations[location] = 'duplicate'
+        # skipped vouchers are kept in the index, otherwise the index never matches the storage (see load_voucher_index)
+        for location, reason in skipped_locations.items():
+            voucher_index[location] = {'location': location, 'status': None, 'skipped': reason}
+        self._voucher_index = voucher_index
+        self._voucher_index_changed = True
+        self.save_voucher_index()
 
 
     def read_transactions_from_disk(self):
@@ -115,8 +374,23 @@ class UserProfile(Serializable):
         Opens and reads vouchers, signatures, or transactions from user interaction in the GUI.
         Decrypts the content if necessary and processes it based on its type (voucher, transaction, or signature).
         """
-        return_info = ""
-        transaction = None
+        self.load_vouchers()
+        file_content, error_info = self.read_data_file(file_path)
+        if error_info:
+            return None, None, error_info
+        result = self.import_file_content(file_content)
+        self.save_voucher_index()
+        return result
+
+    def read_data_file(self, file_path):
+        """
+        Reads and decrypts a voucher, transaction or signature file without changing the profile,
+        so several files can be read in parallel (see import_files).
+
+        Returns:
+            tuple: (file_content, error_info) - the content as dict (or list for signatures) and
+                   an error message if the file could not be decrypted.
+        """
         file_content = read_file_content(file_path)
 
         if is_encrypted_string(file_content):
@@ -131,11 +405,22 @@ class UserProfile(Serializable):
                     print("Decryption failed")
                     return None, "Entschlüsselung fehlgeschlagen"
 
-        if is_valid_object(file_content):
-            # If the content is a string, then convert it to a dictionary
-            if isinstance(file_content, str):
-                file_content = convert_json_string_to_dict(file_content)
+        # If the content is a string, then convert it to a dictionary
+        if is_valid_object(file_content) and isinstance(file_content, str):
+            file_content = convert_json_string_to_dict(file_content)
+        return file_content, ""
 
+    def import_file_content(self, file_content):
+        """
+        Processes the content of a file read with read_data_file based on its type (voucher, transaction,
+        or signature) and adds it to the profile. The voucher index is not written (see save_voucher_index).
+
+        Returns:
+            tuple: (voucher, transaction, return_info)
+        """
+        return_info = ""
+        transaction = None
+        if is_valid_object(file_content):
             # Check if the content is a voucher dictionary
             if is_voucher_dict(file_content):
                 self.person.read_voucher_from_dict(file_content)
@@ -150,17 +435,15 @@ class UserProfile(Serializable):
                 elif voucher_status == VoucherStatus.UNFINISHED:
                     return_info = "Unfertigen Gutschein hinzugefügt."
 
-                # Retrieve all local_ids that are already saved in self.vouchers
+                # Check if the local_id is already managed in self.vouchers
                 local_id, _ = self.person.current_voucher.get_local_voucher_id(self.person.id)
-                all_local_ids = [info['local_vid'] for info in self.vouchers.values()]
-                existing_vouchers = (local_id in all_local_ids)
+                existing_vouchers = self.local_vid_exists(local_id)
 
                 # If the voucher does not already exist, add it to the voucher list and voucher management
                 if not existing_vouchers:
                     self.person.voucherlist[voucher_status.value].append(self.person.current_voucher)
-                    self.vouchers[id(self.person.current_voucher)] = {
-                        'local_vid': local_id, 'file_path': None, 'trashed': False}
-                    self.save_voucher_to_disk(self.person.current_voucher)
+                    self.add_voucher_to_management(self.person.current_voucher, local_id)
+                    self.save_voucher_to_disk(self.person.current_voucher, save_index=False)
                 else:
                     # Todo (optional improvement): Avoid adding older voucher versions when a newer version exists
                     return_info = "Gutschein existiert schon."
@@ -176,9 +459,8 @@ class UserProfile(Serializable):
                 if self._user_transaction.receive_transaction_from_user(transaction_object, self.person,
                                                                         receive_temp=True):
                     # Todo: additional -checks if all is successful (sum of total amount before and after transaktion)
-                    all_local_ids = [info['local_vid'] for info in self.vouchers.values()]
-                    existing_vouchers = any(voucher.get_local_voucher_id(self.person.id)[0] in all_local_ids
-                                         for voucher in self.person.voucherlist[VoucherStatus.TEMP.value])
+                    existing_vouchers = any(self.local_vid_exists(voucher.get_local_voucher_id(self.person.id)[0])
+                                            for voucher in self.person.voucherlist[VoucherStatus.TEMP.value])
 
                     # if there are existing vouchers in the transaction don't import vouchers of transaction
                     # todo can be change to check user_transaction_id
@@ -194,9 +476,9 @@ class UserProfile(Serializable):
                             local_id, _ = voucher.get_local_voucher_id(self.person.id)
 
                             # Add voucher to management dictionary
-                            self.vouchers[id(voucher)] = {'local_vid': local_id, 'file_path': None, 'trashed': False}
+                            self.add_voucher_to_management(voucher, local_id)
                             # Todo: Ask user if store vouchers
-                            self.save_voucher_to_disk(voucher)
+                            self.save_voucher_to_disk(voucher, save_index=False)
                         self.save_transaction_to_disk(transaction_object)
                         self.add_transaction_to_management_list(transaction_object)
                         return_info = f"Transaktion mit {transaction_object.transaction_amount} Minuto erfolgreich empfangen"
@@ -216,7 +498,7 @@ class UserProfile(Serializable):
 
                 # Save updated voucher to disk
                 if self.person.current_voucher is not None:
-                    self.save_voucher_to_disk(self.person.current_voucher)
+                    self.save_voucher_to_disk(self.person.current_voucher, save_index=False)
             else:
                 return_info = "unbekanntes Format"
 
@@ -227,6 +509,88 @@ class UserProfile(Serializable):
         self.person.current_voucher = None
         return voucher ,transaction, return_info
 
+    def _read_and_verify_data_file(self, file_path):
+        """
+        Reads and decrypts a file and verifies the contained vouchers (worker of import_files). The results of the
+        verification are stored in the verification cache, so the following import of the content is fast.
+        """
+        try:
+            file_content, error_info = self.read_data_file(file_path)
+            if not error_info and isinstance(file_content, dict):
+                if is_voucher_dict(file_content):
+                    vouchers = [MinutoVoucher.read_from_dict(file_content)]
+                elif is_user_transaction_dict(file_content):
+                    vouchers = UserTransaction.from_dict(file_content).transaction_vouchers
+                else:
+                    vouchers = []
+                for voucher in vouchers:
+                    if voucher.transactions:
+                        voucher.verify_complete_voucher()
+            return file_content, error_info
+        except Exception as e:
+            print(f"Error while reading {file_path}: {e}")
+            return None, "Ungültige Datei"
+
+    @staticmethod
+    def collect_data_files(paths):
+        """
+        Returns the voucher, transaction and signature files (.mv, .mt, .ms) of a directory or a list of
+        files and directories (directories sorted by file name).
+        """
+        import os
+        if isinstance(paths, str):
+            paths = [paths]
+        file_paths = []
+        for path in paths:
+            if os.path.isdir(path):
+                file_paths += [join_path(path, name) for name in sorted(os.listdir(path))
+                               if os.path.splitext(name)[1] in DATA_FILE_EXTENSIONS
+                               and os.path.isfile(join_path(path, name))]
+            else:
+                file_paths.append(path)
+        return file_paths
+
+    def import_files(self, paths, progress_callback=None, workers=None):
+        """
+        Imports many voucher, transaction and signature files, e.g. all payments received in a day.
+        The files are decrypted and the vouchers verified in a thread pool, the verified contents are then added
+        to the profile one by one in the calling thread (in the order of the files), so duplicate vouchers and
+        transactions are detected like in open_file. The results are yielded as soon as they are available.
+
+        Args:
+            paths (str or list): A directory or a list of files (and directories) to import.
+            progress_callback (callable, optional): Called after every file with
+                (number of imported files, number of files, file_path, return_info).
+            workers (int, optional): Number of parallel workers. Defaults to config.VERIFICATION_WORKERS
+                (or the number of CPU cores).
+
+        Yields:
+            tuple: (file_path, voucher, transaction, return_info) for every file (see open_file).
+        """
+        import os
+        self.load_vouchers()
+        file_paths = self.collect_data_files(paths)
+        if workers is None:
+            workers = config.VERIFICATION_WORKERS or os.cpu_count() or 1
+        workers = max(1, min(workers, len(file_paths)))
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            # map starts all files at once and returns the results in the order of the files
+            results = executor.map(self._read_and_verify_data_file, file_paths)
+            for done, (file_path, (file_content, error_info)) in enumerate(zip(file_paths, results), 1):
+                if error_info:
+                    voucher, transaction, return_info = None, None, error_info
+                else:
+                    voucher, transaction, return_info = self.import_file_content(file_content)
+                if progress_callback is not None:
+                    progress_callback(done, len(file_paths), file_path, return_info)
+                yield file_path, voucher, transaction, return_info
+        finally:
+            # if the caller stops early (e.g. canceled by the user), the files not yet started are skipped
+            executor.shutdown(cancel_futures=True)
+            self.save_voucher_index()
+
     def open_voucher(self, file_path, trashed=False):
         """
         Opens and reads a voucher file at startup.
@@ -237,7 +601,27 @@ class UserProfile(Serializable):
 
         Todo:
             - Check if a new voucher has already been sent to reduce the possibility of double spending when users make mistakes.
-            - Check if the voucher is already loaded (add list of all loaded local_voucher_ids) or if a new version is loaded (use old_local_ids).
+            - Check if a new version is loaded (use old_local_ids).
+        """
+        voucher = self.read_voucher_file(file_path)
+        if voucher is None:
+            return
+
+        # Determine and set the voucher status
+        voucher_status = voucher.voucher_status(self.person.id)
+        if trashed:  # Mark the voucher as trashed if the file is in the trash folder
+            voucher_status = VoucherStatus.TRASHED
+        self.add_loaded_voucher(voucher, file_path, voucher_status, trashed)
+
+    def read_voucher_file(self, file_path):
+        """
+        Reads and decrypts a local voucher file.
+
+        Args:
+            file_path (str): The path of the file to be read.
+
+        Returns:
+            MinutoVoucher: The voucher or None if the file does not contain a voucher.
         """
         file_content = read_file_content(file_path)
 
@@ -249,80 +633,106 @@ class UserProfile(Serializable):
                 print(f"Local voucher decryption failed: {e}")
 
         # Validate and process the voucher content
-        if is_valid_object(file_content):
-            # Convert string to dictionary if necessary
-            if isinstance(file_content, str):
-                file_content = convert_json_string_to_dict(file_content)
+        if not is_valid_object(file_content):
+            return None
 
-            # Process the voucher if it's in the correct format
-            if is_voucher_dict(file_content):
-                self.person.read_voucher_from_dict(file_content)
+        # Convert string to dictionary if necessary
+        if isinstance(file_content, str):
+            file_content = convert_json_string_to_dict(file_content)
 
+        # Process the voucher if it's in the correct format
+        if not is_voucher_dict(file_content):
+            return None
 
-                # Retrieve and store the local voucher ID
-                local_id, old_local_ids = self.person.current_voucher.get_local_voucher_id(self.person.id)
+        voucher = MinutoVoucher.read_from_dict(file_content)
+        # restore the verification checkpoint (only from own local files), so only new transactions are verified
+        voucher.restore_verified_prefix(file_content.get('_verified_prefix'))
+        return voucher
 
+    def add_loaded_voucher(self, voucher, file_path, voucher_status, trashed=False, row_id=None):
+        """
+        Adds a voucher read from disk to the voucher management and to the voucher list of the person.
 
-                # Determine and set the voucher status
-                voucher_status = self.person.current_voucher.voucher_status(self.person.id)
-                if trashed:  # Mark the voucher as trashed if the file is in the trash folder
-                    voucher_status = VoucherStatus.TRASHED
+        Args:
+            voucher (MinutoVoucher): The voucher read from disk.
+            file_path (str): The path of the voucher file (None if stored in the voucher database).
+            voucher_status (VoucherStatus): The status of the voucher.
+            trashed (bool): Indicates whether the voucher is marked as trashed.
+            row_id (int, optional): The row_id if the voucher is stored in the voucher database.
+
+        Returns:
+            bool: False if the voucher was skipped, because a voucher with the same local ID is already loaded.
+        """
+        # Retrieve and store the local voucher ID
+        local_id, old_local_ids = voucher.get_local_voucher_id(self.person.id)
+        if self.local_vid_exists(local_id):
+            print(f"Skipped duplicate voucher {local_id} ({file_path or row_id})")
+            return False
+
+        # add voucher to managment dict
+        self.add_voucher_to_management(voucher, local_id, file_path, trashed, row_id)
+
+        # Add the voucher to the list
+        self.person.voucherlist[voucher_status.value].append(voucher)
+        return True
+
+
+    def add_voucher_to_management(self, voucher, local_id, file_path=None, trashed=False, row_id=None):
+        """
+        Adds a voucher to the voucher management dict.
+
+        Args:
+            voucher (MinutoVoucher): The voucher.
+            local_id (str): The local voucher ID (see MinutoVoucher.get_local_voucher_id).
+            file_path (str, optional): The path of the voucher file.
+            trashed (bool): Indicates whether the voucher is marked as trashed.
+            row_id (int, optional): The row_id if the voucher is stored in the voucher database.
+        """
+        self.vouchers[id(voucher)] = {'local_vid': local_id, 'file_path': file_path, 'trashed': trashed,
+                                      'row_id': row_id}
+
+    def remove_voucher_from_management(self, voucher):
+        """
+        Removes a voucher from the voucher management dict.
+        """
+        self.vouchers.pop(id(voucher), None)
+
+    def set_voucher_local_vid(self, voucher, local_id):
+        """
+        Updates the local voucher ID of a managed voucher (changes with new transactions of the voucher).
+        """
+        self.vouchers[id(voucher)]['local_vid'] = local_id
 
-                # add voucher to managment dict
-                self.vouchers[id(self.person.current_voucher)] = {'local_vid': local_id, 'file_path': file_path, 'trashed': trashed}
+    def _managed_vouchers(self, vouchers):
+        # the vouchers of the TEMP list (received, but not imported yet) are not managed by the profile
+        return [voucher for voucher in vouchers
+                if self.person.voucherlist.get_status(voucher) != VoucherStatus.TEMP.value]
 
-                # Add the voucher to the list
-                self.person.voucherlist[voucher_status.value].append(self.person.current_voucher)
-                self.person.current_voucher = None  # Reset the current voucher
+    def local_vid_exists(self, local_id):
+        """Returns True if a voucher with the local voucher ID is already managed by the profile."""
+        return bool(self._managed_vouchers(self.person.voucherlist.get_by_local_vid(local_id)))
 
+    def voucher_id_exists(self, voucher_id):
+        """Returns True if a version of the voucher (any local voucher ID) is already managed by the profile."""
+        return bool(self._managed_vouchers(self.person.voucherlist.get_by_voucher_id(voucher_id)))
 
     def add_transaction_to_management_list(self, transaction):
         """
-           Adds a given transaction to the management dict (self.transactions) in descending order based on the transaction time.
-           This method ensures that the most recent transactions are always at the beginning of the dictionary.
-           Note: This approach relies on the dictionary maintaining insertion order, a feature available in Python 3.7 and later versions.
-           It iteratively inserts the new transaction at its correct position based on its timestamp to maintain the order.
+           Adds a given transaction to the transaction history (self.transactions), which is sorted by the
+           transaction time (most recent first).
 
            Args:
                transaction (UserTransaction): The transaction object to be added.
            """
-        transaction_id = transaction.transaction_id
-        transaction_time = transaction.transaction_end_timestamp
-
-        # Temporary dictionary to reorder transactions based on timestamp
-        temp_dict = {}
-
-        # Determine the position for the new transaction
-        inserted = False
-        for key, value in self.transactions.items():
-            if not inserted and transaction_time > value['time']:
-                # Insert the new transaction at the correct position
-                temp_dict[transaction_id] = {
-                    'id': transaction_id,
-                    'sender': transaction.transaction_sender_id,
-                    'recipient': transaction.transaction_recipient_id,
-                    'amount': transaction.transaction_amount,
-                    'purpose': transaction.transaction_purpose,
-                    'time': transaction_time,
-                    'transaction_object': transaction
-                }
-                inserted = True
-            temp_dict[key] = value
-
-        # If the new transaction is the most recent, add it at the end
-        if not inserted:
-            temp_dict[transaction_id] = {
-                'id': transaction_id,
-                'sender': transaction.transaction_sender_id,
-                'recipient': transaction.transaction_recipient_id,
-                'amount': transaction.transaction_amount,
-                'purpose': transaction.transaction_purpose,
-                'time': transaction_time,
-                'transaction_object': transaction
-            }
-
-        # Update the main dictionary with the new order
-        self.transactions = temp_dict
+        self.transactions.add({
+            'id': transaction.transaction_id,
+            'sender': transaction.transaction_sender_id,
+            'recipient': transaction.transaction_recipient_id,
+            'amount': transaction.transaction_amount,
+            'purpose': transaction.transaction_purpose,
+            'time': transaction.transaction_end_timestamp,
+            'transaction_object': transaction
+        })
 
     def open_transaction(self, file_path):
         """
@@ -362,25 +772,32 @@ class UserProfile(Serializable):
             voucher: The voucher object to be deleted.
         """
 
-        # Delete the file from the filesystem
-        self._secure_file_handler.delete_file(self.vouchers[id(voucher)]['file_path'])
+        # Delete the file from the filesystem (or the row from the voucher database)
+        if self._voucher_store is not None:
+            location = self.vouchers[id(voucher)].get('row_id')
+            if location is not None:
+                self._voucher_store.delete_voucher(location)
+        else:
+            location = self.vouchers[id(voucher)]['file_path']
+            self._secure_file_handler.delete_file(location)
+        self._voucher_index.pop(location, None)
+        self._voucher_index_changed = True
 
         # Remove the voucher from the user's trashed voucher list
         user_profile.person.voucherlist[VoucherStatus.TRASHED.value].remove(voucher)
 
         # Remove the voucher from management list
-        self.vouchers.pop(id(voucher), None)
-
-    def save_voucher_to_disk(self, voucher:MinutoVoucher, trash=False):
-        # save vouher to disk
+        self.remove_voucher_from_management(voucher)
 
-        voucher_stored_on_disk = (self.vouchers[id(voucher)]['file_path'] is not None)
+    def save_voucher_to_disk(self, voucher:MinutoVoucher, trash=False, save_index=True):
+        # save vouher to disk (with save_index=False the caller writes the voucher index after all vouchers)
 
-        local_id, old_local_ids = voucher.get_local_voucher_id(self.person.id)
         if trash:
             # if voucher already in trash -> really delete voucher file
             if self.vouchers[id(voucher)]['trashed']:  # voucher._trashed:
                 self.delete_voucher(voucher)
+                if save_index:
+                    self.save_voucher_index()
                 return
             self.vouchers[id(voucher)]['trashed'] = True
             voucher_status = VoucherStatus.TRASHED.value
@@ -389,31 +806,58 @@ class UserProfile(Serializable):
             voucher_status = voucher.voucher_status(self.person.id).value
             self.vouchers[id(voucher)]['trashed'] = False
 
+        # Move voucher to the list of the new status (or add it on voucher creation)
+        user_profile.person.voucherlist.move(voucher, voucher_status)
+
+        # when trashed only the status changes, the voucher itself is unchanged
+        self.write_voucher(voucher, voucher_status, status_only=trash)
+        if save_index:
+            self.save_voucher_index()
+
+    def write_voucher(self, voucher: MinutoVoucher, voucher_status, status_only=False):
+        """
+        Writes a voucher to the voucher storage of the profile, either as encrypted file in the folder of its
+        status or as row of the voucher database.
+
+        Args:
+            voucher (MinutoVoucher): The voucher to be written.
+            voucher_status (str): The status value of the voucher.
+            status_only (bool): If True, only the status has changed (only used by the voucher database).
+        """
+        management_info = self.vouchers[id(voucher)]
+        local_id, old_local_ids = voucher.get_local_voucher_id(self.person.id)
+        self.set_voucher_local_vid(voucher, local_id)
+
+        # local files are encrypted with the own file key, so the verification checkpoint can be stored with the voucher
+        voucher_data = None
+        if not (status_only and management_info.get('row_id') is not None):
+            voucher_data = voucher.to_dict()
+            voucher_data['_verified_prefix'] = voucher.get_verified_prefix()
+
+        if self._voucher_store is not None:
+            if voucher_data is None:
+                self._voucher_store.update_status(management_info['row_id'], voucher_status)
+            else:
+                management_info['row_id'] = self._voucher_store.save_voucher(
+                    voucher_data, voucher.voucher_id, local_id, voucher_status,
+                    voucher.get_voucher_amount(self.person.id), voucher.creator_id, management_info.get('row_id'))
+            self.update_voucher_index(voucher, voucher_status, management_info['row_id'])
+            return
+
         import os
 
+        voucher_stored_on_disk = (management_info['file_path'] is not None)
         file_path = os.path.join(self.data_folder, voucher_status)
         voucher_name = f"eMinuto-{local_id}.mv"
         new_full_file_path = str(os.path.join(self.data_folder, voucher_status, voucher_name))
 
         old_path = None # for checking if new path
-        if voucher_stored_on_disk and self.vouchers[id(voucher)]['file_path'] != new_full_file_path:
-            old_path = self.vouchers[id(voucher)]['file_path']
-
-        old_voucher_status = None
-        for stat in VoucherStatus: # Search for the voucher and remember its status
-            voucher_list = user_profile.person.voucherlist[stat.value]
-            if voucher in voucher_list:
-                old_voucher_status = stat.value
-                break  # Voucher found, exit the loop
-
-        if old_voucher_status != voucher_status:  # if new status -> Move voucher to new list
-            if old_voucher_status: # if no old status (voucher creation) do nothing
-                user_profile.person.voucherlist[old_voucher_status].remove(voucher)
-            user_profile.person.voucherlist[voucher_status].append(voucher)
-
-        self.vouchers[id(voucher)]['file_path'] = new_full_file_path
-        self.vouchers[id(voucher)]['local_vid'] = local_id
-        self._secure_file_handler.encrypt_and_save(voucher, voucher_name, key=self.file_enc_key.encode('utf-8'), subfolder=file_path)
+        if voucher_stored_on_disk and management_info['file_path'] != new_full_file_path:
+            old_path = management_info['file_path']
+
+        management_info['file_path'] = new_full_file_path
+        self._secure_file_handler.encrypt_and_save(voucher_data, voucher_name, key=self.file_enc_key.encode('utf-8'),
+                                                   subfolder=file_path, binary=config.BINARY_STORAGE)
 
         # todo improve and do check of new file before deletion of old file
 
@@ -421,6 +865,8 @@ class UserProfile(Serializable):
         if old_path:
             self._secure_file_handler.delete_file(old_path)
 
+        self.update_voucher_index(voucher, voucher_status, new_full_file_path, old_location=old_path)
+
 
     def save_transaction_to_disk(self, transaction:UserTransaction):
         # save user transaction to disk
@@ -428,19 +874,66 @@ class UserProfile(Serializable):
         transaction_folder = "transactions"
         file_path = os.path.join(self.data_folder, transaction_folder)
         transaction_name = f"eMinuto-transaction-{transaction.transaction_id[:16]}.mt"
-        self._secure_file_handler.encrypt_and_save(transaction, transaction_name, key=self.file_enc_key.encode('utf-8'), subfolder=file_path)
+        self._secure_file_handler.encrypt_and_save(transaction, transaction_name, key=self.file_enc_key.encode('utf-8'),
+                                                   subfolder=file_path, binary=config.BINARY_STORAGE)
+
+
+    def compact_voucher(self, voucher: MinutoVoucher, keep=1):
+        """
+        Compacts the transaction chain of a voucher (see MinutoVoucher.compact_transactions). The voucher with the
+        full transaction history is archived encrypted in the history folder before, so the compacted
+        transactions are still available locally (e.g. to clarify double spending).
+        Only used vouchers without amount can be compacted, because compacted vouchers are not accepted by
+        other users.
 
+        Args:
+            voucher (MinutoVoucher): The voucher to be compacted (the own user has to be a holder of the voucher).
+            keep (int): Number of transactions at the end of the chain which are kept.
+
+        Returns:
+            list: The compacted transactions.
+        """
+        import os
+        if voucher.get_voucher_amount(self.person.id) > 0:
+            raise ValueError("Only vouchers without amount can be compacted.")
+        compacted_count = voucher.transaction_checkpoint['count'] if voucher.transaction_checkpoint else 0
+        history_name = f"eMinuto-{voucher.voucher_id[:16]}-{compacted_count + len(voucher.transactions)}.mv"
+        self._secure_file_handler.encrypt_and_save(voucher.to_dict(), history_name,
+                                                   key=self.file_enc_key.encode('utf-8'),
+                                                   subfolder=os.path.join(self.data_folder, "history"),
+                                                   binary=config.BINARY_STORAGE)
+
+        compacted = voucher.compact_transactions(self.person.key, keep)
+        self.person.voucherlist.voucher_changed(voucher)  # the shortened chain is indexed again
+        return compacted
+
+    def compact_archived_vouchers(self):
+        """
+        Compacts the archived vouchers (used vouchers, which are only kept locally) with more transactions than
+        config.TRANSACTION_COMPACTION_THRESHOLD and saves them (see compact_voucher).
+        """
+        if not config.TRANSACTION_COMPACTION_THRESHOLD or not self._vouchers_loaded:
+            return
+        for voucher in self.person.voucherlist[VoucherStatus.ARCHIVED.value][:]:
+            if len(voucher.transactions) > config.TRANSACTION_COMPACTION_THRESHOLD:
+                try:
+                    self.compact_voucher(voucher)
+                except ValueError:  # e.g. not verified or the own user was no holder
+                    continue
+                self.save_voucher_to_disk(voucher, save_index=False)
+        self.save_voucher_index()
 
     def send_minuto(self, amount, purpose, recipient_id):
         # creates a transaction and returns an encrypted transaction file
-
+        self.load_vouchers()
         transaction = self.person.send_amount(amount, recipient_id, purpose=purpose)
         if not transaction.transaction_successful:
             return transaction # return failed transaction
 
         # save changed vouchers in transaktion to disk
         for voucher in transaction.transaction_vouchers:
-            self.save_voucher_to_disk(voucher)
+            self.save_voucher_to_disk(voucher, save_index=False)
+        self.save_voucher_index()
 
         self.save_transaction_to_disk(transaction)
         self.add_transaction_to_management_list(transaction)
@@ -463,6 +956,7 @@ class UserProfile(Serializable):
         self.person = Person(self.person_data,seed=seed)
         self._secure_file_handler = SecureFileHandler()
         self.save_profile_to_disk(second_password=seed)
+        self._vouchers_loaded = True  # new profile has no stored vouchers
         self._profile_initialized = True
 
     def recover_password_with_seed(self,seed, new_password):
@@ -491,7 +985,13 @@ class UserProfile(Serializable):
 
     def profile_logout(self):
         self.save_profile_to_disk()
+        self.compact_archived_vouchers()
+        self.save_voucher_index()
+        self.close_voucher_store()
         self.initialize_state()
+        clear_key_cache()  # wipe the derived keys of the session
+        if self._secure_file_handler is not None:
+            self._secure_file_handler.clear_shared_secret_cache()
 
     def load_profile_from_disk(self, password):
         filehandler = SecureFileHandler()
@@ -504,12 +1004,12 @@ class UserProfile(Serializable):
             return False
 
     def create_voucher(self, first_name, last_name, organization, address, gender, email, phone, service_offer, coordinates, amount, region, years_valid, is_test_voucher, description='', footnote=''):
+        self.load_vouchers()
         self.person.create_voucher_from_gui(first_name, last_name, organization, address, gender, email, phone, service_offer, coordinates, amount, region, years_valid, is_test_voucher, description, footnote)
 
         local_id, _ = self.person.current_voucher.get_local_voucher_id(self.person.id)
         # add to voucher management list
-        self.vouchers[id(self.person.current_voucher)] = {'local_vid': local_id, 'file_path': None,
-                                                          'trashed': False}
+        self.add_voucher_to_management(self.person.current_voucher, local_id)
         self.save_voucher_to_disk(self.person.current_voucher) # saves file and add it to voucherlist
         voucher = self.person.current_voucher
         self.person.current_voucher = None
@@ -524,21 +1024,27 @@ class UserProfile(Serializable):
         return {key: value for key, value in self.__dict__.items()
                 if not key.startswith('_') and key not in exclude}
 
+    def get_balance(self, type):
+        """
+        Returns the balance of the vouchers with the status value type, from the balance ledger of the loaded
+        vouchers, otherwise from the voucher index (so the vouchers don't have to be loaded).
+        """
+        if self._vouchers_loaded:
+            return self.person.balance_ledger.get_balance(type)
+        return sum(entry['balance'] for entry in self.get_voucher_index(type))
+
+    def get_available_amount(self):
+        """Returns the amount that can be sent (balance of the own and other vouchers)."""
+        if not self._profile_initialized:
+            return 0
+        return self.get_balance(VoucherStatus.OWN.value) + self.get_balance(VoucherStatus.OTHER.value)
+
     def get_minuto_balance(self,type):
-        # calculate total balances for gui
+        # total balances for gui
         if not self._profile_initialized:
             return "0,00"
-        if type == VoucherStatus.OWN.value:
-            value = 0
-            for v in self.person.voucherlist[VoucherStatus.OWN.value]:
-                value += v.get_voucher_amount(self.person.id)
-            return display_balance(value)
-
-        if type == VoucherStatus.OTHER.value:
-            value = 0
-            for v in self.person.voucherlist[VoucherStatus.OTHER.value]:
-                value += v.get_voucher_amount(self.person.id)
-            return display_balance(value)
+        if type in [VoucherStatus.OWN.value, VoucherStatus.OTHER.value]:
+            return display_balance(self.get_balance(type))
 
 
 
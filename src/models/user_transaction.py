@@ -3,6 +3,9 @@ from src.models.voucher_transaction import VoucherTransaction
 from src.services.crypto_utils import get_hash
 from src.services.utils import dprint, amount_precision, Serializable, get_timestamp
 from src.models.minuto_voucher import VoucherStatus, MinutoVoucher
+from src.models.voucher_selection import select_vouchers, to_cents
+from src import config
+from src.services import binary_format
 
 
 class UserTransaction(Serializable):
@@ -20,13 +23,15 @@ class UserTransaction(Serializable):
         self.transaction_successful = False
         self.transaction_failure_reason = ""
 
-    def process_transaction_to_user(self, person, amount, recipient_id, purpose = "", verbose=False):
+    def process_transaction_to_user(self, person, amount, recipient_id, purpose = "", verbose=False, strategy=None):
         """
         Processes transactions by selecting suitable vouchers and creating transaction data.
 
         :param person: The person object initiating the transaction.
         :param amount: The amount to send.
         :param recipient_id: The ID of the recipient.
+        :param strategy: Name of the voucher selection strategy (see voucher_selection.SELECTION_STRATEGIES).
+                         Defaults to config.VOUCHER_SELECTION_STRATEGY.
         :return: A UserTransaction object with the selected vouchers.
         """
         user_transaction = UserTransaction()
@@ -35,35 +40,22 @@ class UserTransaction(Serializable):
         user_transaction.transaction_recipient_id = recipient_id
         user_transaction.transaction_amount = amount_precision(amount)
         user_transaction.transaction_purpose = purpose
-        remaining_amount_to_send = amount
-        selected_vouchers = []
-
-        for list_type in [VoucherStatus.OTHER.value, VoucherStatus.OWN.value]:
-            for voucher in person.voucherlist[list_type]:
-                if not voucher.verify_complete_voucher(verbose):
-                    continue  # Use only valid vouchers
-
-                voucher_amount = voucher.get_voucher_amount(person.id)
-                if voucher_amount == 0:  # use only vouchers with amount, ignore empty vouchers
-                    continue
-                if voucher_amount >= remaining_amount_to_send:
-                    # wähle diesen voucher und sende damit remaining_amount_to_send
-                    selected_vouchers.append((voucher, remaining_amount_to_send))
-                    remaining_amount_to_send = 0
-                    break
-                else:
-                    # voucher nicht genug amount, nutze diese voucher komplett und den remaining_amount_to_send mit dem nächsten
-                    selected_vouchers.append((voucher, voucher_amount))
-                    remaining_amount_to_send -= voucher_amount
-
-
-        if remaining_amount_to_send > 0:
+        if strategy is None:
+            strategy = config.VOUCHER_SELECTION_STRATEGY
+        if to_cents(amount) <= 0:
+            return self.return_transaction_failure(failure_reason="The amount to send must be positive.")
+
+        # candidates are the vouchers of the OTHER and OWN lists (kept in the balance index of the voucher
+        # collection), only the selected vouchers are verified
+        selected_vouchers = select_vouchers(person.voucherlist.balance_index, amount, strategy, verbose)
+        if selected_vouchers is None:
             return self.return_transaction_failure(failure_reason="Not enough amount to send.")
 
         for voucher, send_amount in selected_vouchers:
             v_transaction = VoucherTransaction(voucher)
             transaction_data = v_transaction.do_transaction(send_amount, person.id, recipient_id, person.key)
             voucher.transactions.append(transaction_data)
+            person.voucherlist.voucher_changed(voucher)
             user_transaction.transaction_vouchers.append(voucher)
 
         user_transaction.transaction_successful = True
@@ -151,6 +143,15 @@ class UserTransaction(Serializable):
         data['transaction_vouchers'] = [voucher.to_dict() for voucher in self.transaction_vouchers]
         return data
 
+    def to_bytes(self):
+        """Returns the transaction (with all vouchers) in the compact binary format (see binary_format)."""
+        return binary_format.encode(self.to_dict())
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Creates a UserTransaction from data in the compact binary format."""
+        return cls.from_dict(binary_format.decode(data))
+
     @classmethod
     def from_dict(cls, dict_):
         instance = cls()  # Erstellen einer neuen Instanz von UserTransaction
@@ -0,0 +1,274 @@
+# voucher_collection.py
+from src.models.balance_ledger import BalanceLedger
+from src.models.double_spend_index import DoubleSpendIndex
+from src.models.minuto_voucher import VoucherStatus
+from src.models.voucher_selection import VoucherBalanceIndex
+
+# Voucher lists with amount that can be used for payments, in the order they are used (see VoucherBalanceIndex)
+SPENDABLE_STATUSES = (VoucherStatus.OTHER.value, VoucherStatus.OWN.value)
+
+
+class VoucherList:
+    """
+    The vouchers of a person with one status, in the order they were added.
+    Behaves like a list of vouchers, but vouchers are identified by the object (not by the content),
+    so membership tests, remove and discard are O(1). A voucher object is contained at most once.
+    Access by index uses a list of the vouchers that is built on the first access after a change, so index loops
+    over an unchanged list are O(1) per access (the first and the last voucher are always accessed in O(1)).
+    """
+
+    def __init__(self, status, collection, vouchers=()):
+        self.status = status
+        self._collection = collection
+        self._vouchers = {}  # id(voucher) -> voucher (in insertion order)
+        self._list = None  # list of the vouchers for the access by index (None after a change)
+        self.extend(vouchers)
+
+    def __iter__(self):
+        return iter(self._vouchers.values())
+
+    def __reversed__(self):
+        return reversed(self._vouchers.values())
+
+    def __len__(self):
+        return len(self._vouchers)
+
+    def __contains__(self, voucher):
+        return id(voucher) in self._vouchers
+
+    def __getitem__(self, index):
+        if index == 0 and self._vouchers:
+            return next(iter(self._vouchers.values()))
+        if index == -1 and self._vouchers:
+            return next(reversed(self._vouchers.values()))
+        if self._list is None:
+            self._list = list(self._vouchers.values())
+        return self._list[index]
+
+    def __eq__(self, other):
+        if isinstance(other, (VoucherList, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __iadd__(self, vouchers):
+        self.extend(vouchers)
+        return self
+
+    def __repr__(self):
+        return f"VoucherList({self.status}, {list(self)})"
+
+    def append(self, voucher):
+        if id(voucher) in self._vouchers:
+            return
+        self._vouchers[id(voucher)] = voucher
+        self._list = None
+        self._collection._voucher_added(voucher, self.status)
+
+    def extend(self, vouchers):
+        for voucher in list(vouchers):
+            self.append(voucher)
+
+    def insert(self, index, voucher):
+        vouchers = list(self)
+        vouchers.insert(index, voucher)
+        self._replace(vouchers)
+
+    def remove(self, voucher):
+        if not self.discard(voucher):
+            raise ValueError("voucher not in list")
+
+    def discard(self, voucher):
+        """
+        Removes the voucher if it is in the list.
+
+        :return: True if the voucher was removed.
+        """
+        if id(voucher) not in self._vouchers:
+            return False
+        del self._vouchers[id(voucher)]
+        self._list = None
+        self._collection._voucher_removed(voucher, self.status)
+        return True
+
+    def pop(self, index=-1):
+        voucher = self[index]
+        self.discard(voucher)
+        return voucher
+
+    def clear(self):
+        for voucher in list(self):
+            self.discard(voucher)
+
+    def copy(self):
+        return list(self)
+
+    def sort(self, key=None, reverse=False):
+        self._vouchers = {id(voucher): voucher for voucher in sorted(self, key=key, reverse=reverse)}
+        self._list = None
+
+    def __setitem__(self, index, value):
+        vouchers = list(self)
+        vouchers[index] = value
+        self._replace(vouchers)
+
+    def __delitem__(self, index):
+        vouchers = list(self)
+        del vouchers[index]
+        self._replace(vouchers)
+
+    def _replace(self, vouchers):
+        # replaces the content of the list (the order is taken from the new list)
+        new_ids = {id(voucher) for voucher in vouchers}
+        for voucher in [v for v in self if id(v) not in new_ids]:
+            self.discard(voucher)
+        old_vouchers = self._vouchers
+        self._vouchers = {}
+        self._list = None
+        for voucher in vouchers:
+            if id(voucher) in old_vouchers:
+                self._vouchers[id(voucher)] = voucher
+            else:
+                self.append(voucher)
+
+
+class VoucherCollection(dict):
+    """
+    The vouchers of a person by status (status value -> VoucherList).
+
+    Besides the lists, the collection keeps the status of every voucher object, indexes by voucher_id and
+    local_vid, the balance ledger of the owner, the balance index of the spendable vouchers (used for the voucher
+    selection of payments) and the double spending index of all vouchers up to date, so status lookups and moves
+    between the lists are O(1).
+    Assigning a list to a status replaces the VoucherList of the status.
+    Iteration over the lists and over each list keeps the order in which the vouchers were added.
+    """
+
+    def __init__(self, owner_id, voucherlist=None):
+        super().__init__()
+        self.owner_id = owner_id
+        self.ledger = BalanceLedger(owner_id)
+        self.balance_index = VoucherBalanceIndex(owner_id)  # vouchers of the SPENDABLE_STATUSES lists
+        self.double_spend_index = DoubleSpendIndex()  # transactions of the vouchers of all lists
+        self._statuses = {}  # id(voucher) -> {status: None} (the lists containing the voucher, ordered set)
+        self._by_voucher_id = {}  # voucher_id -> {id(voucher): voucher}
+        self._by_local_vid = {}  # local_vid -> {id(voucher): voucher}
+        self._local_vids = {}  # id(voucher) -> indexed local_vid
+        if voucherlist is None:
+            voucherlist = {status.value: [] for status in VoucherStatus}
+        for status, vouchers in voucherlist.items():
+            self[status] = vouchers
+
+    def __setitem__(self, status, vouchers):
+        old_vouchers = self.get(status)
+        if old_vouchers is not None:
+            old_vouchers.clear()
+        super().__setitem__(status, VoucherList(status, self, vouchers))
+
+    def _voucher_added(self, voucher, status):
+        self.ledger.add(voucher, status)
+        if status in SPENDABLE_STATUSES:
+            self.balance_index.add(voucher, SPENDABLE_STATUSES.index(status))
+        statuses = self._statuses.get(id(voucher))
+        if statuses is None:
+            self._statuses[id(voucher)] = {status: None}
+            self.double_spend_index.add_voucher(voucher)
+            if voucher.voucher_id:
+                self._by_voucher_id.setdefault(voucher.voucher_id, {})[id(voucher)] = voucher
+            self._index_local_vid(voucher)
+        else:
+            statuses[status] = None
+
+    def _voucher_removed(self, voucher, status):
+        self.ledger.remove(voucher, status)
+        statuses = self._statuses[id(voucher)]
+        del statuses[status]
+        if status in SPENDABLE_STATUSES:
+            self.balance_index.remove(voucher)
+            for other_status in statuses:  # still in another spendable list
+                if other_status in SPENDABLE_STATUSES:
+                    self.balance_index.add(voucher, SPENDABLE_STATUSES.index(other_status))
+                    break
+        if statuses:
+            return
+        del self._statuses[id(voucher)]
+        self.double_spend_index.remove_voucher(voucher)
+        if voucher.voucher_id:
+            self._remove_from_index(self._by_voucher_id, voucher.voucher_id, voucher)
+        local_vid = self._local_vids.pop(id(voucher), None)
+        if local_vid is not None:
+            self._remove_from_index(self._by_local_vid, local_vid, voucher)
+
+    @staticmethod
+    def _remove_from_index(index, key, voucher):
+        vouchers = index.get(key)
+        if vouchers is not None:
+            vouchers.pop(id(voucher), None)
+            if not vouchers:
+                del index[key]
+
+    def _index_local_vid(self, voucher):
+        old_local_vid = self._local_vids.pop(id(voucher), None)
+        if old_local_vid is not None:
+            self._remove_from_index(self._by_local_vid, old_local_vid, voucher)
+        if voucher.voucher_id:
+            local_vid, _ = voucher.get_local_voucher_id(self.owner_id)
+            self._local_vids[id(voucher)] = local_vid
+            self._by_local_vid.setdefault(local_vid, {})[id(voucher)] = voucher
+
+    def voucher_changed(self, voucher):
+        """
+        Updates the balance, the local_vid and the double spending index of a voucher after its transactions have
+        changed. Must be called after every change of the transactions of a voucher in the collection.
+        """
+        if id(voucher) in self._statuses:
+            self.ledger.update(voucher)
+            self.balance_index.update(voucher)
+            self.double_spend_index.add_voucher(voucher)
+            self._index_local_vid(voucher)
+
+    def contains_voucher(self, voucher):
+        return id(voucher) in self._statuses
+
+    def get_status(self, voucher):
+        """Returns the status value of the list containing the voucher (object) or None."""
+        statuses = self._statuses.get(id(voucher))
+        return next(iter(statuses)) if statuses else None
+
+    def move(self, voucher, voucher_status):
+        """
+        Moves the voucher to the list of the status. A voucher that is not in the collection is added.
+
+        :param voucher: The voucher object.
+        :param voucher_status: The new status value.
+        """
+        old_status = self.get_status(voucher)
+        if old_status == voucher_status:
+            return
+        if old_status is not None:
+            self[old_status].discard(voucher)
+        self[voucher_status].append(voucher)
+
+    def get_by_voucher_id(self, voucher_id):
+        """Returns all voucher objects with the voucher_id."""
+        return list(self._by_voucher_id.get(voucher_id, {}).values())
+
+    def get_by_local_vid(self, local_vid):
+        """Returns all voucher objects with the local voucher ID (see MinutoVoucher.get_local_voucher_id)."""
+        return list(self._by_local_vid.get(local_vid, {}).values())
+
+    def all_vouchers(self, statuses=None):
+        """
+        Returns the vouchers of all lists (or of the given status values) in the order of the lists.
+        """
+        vouchers = []
+        for status in statuses or self.keys():
+            vouchers += self[status]
+        return vouchers
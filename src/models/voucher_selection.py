@@ -0,0 +1,244 @@
+# voucher_selection.py
+import bisect
+from itertools import accumulate
+
+
+def to_cents(amount):
+    """Converts an amount (float or str) to integer cents, so amounts can be compared exactly."""
+    return int(round(float(amount) * 100))
+
+
+class VoucherBalanceIndex:
+    """
+    The vouchers of an owner with a positive balance, sorted by balance (in cents).
+    The index is kept up to date by the voucher collection of the owner (see VoucherCollection), like the balance
+    ledger, so a payment doesn't calculate the balances of all vouchers again. Every voucher has a position
+    (rank of its voucher list, order of adding), which is used as the order of the voucher lists.
+    """
+
+    def __init__(self, owner_id, vouchers=()):
+        """
+        :param owner_id: The user ID of the owner of the vouchers.
+        :param vouchers: Optional. Vouchers to add (in the order of the voucher lists).
+        """
+        self.owner_id = owner_id
+        self.entries = []  # list of (balance in cents, position, balance, voucher), ascending by (cents, position)
+        self.balances = []  # the balances in cents of the entries (ascending, for bisect)
+        self._sort_keys = []  # the (balance in cents, position) of the entries (for bisect)
+        self._positions = {}  # id(voucher) -> position of all added vouchers (also with zero balance)
+        self._sort_key_by_voucher = {}  # id(voucher) -> (balance in cents, position) of the entry
+        self._sequence = 0
+        self._prefix_sums = None  # cumulative sums of the balances, calculated on demand (see prefix_sums)
+        for voucher in vouchers:
+            self.add(voucher)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, voucher):
+        return id(voucher) in self._positions
+
+    def total(self):
+        return self.prefix_sums()[-1]
+
+    def prefix_sums(self):
+        """Returns the cumulative sums of the balances ([0, b0, b0 + b1, ...]), cached until the index changes."""
+        if self._prefix_sums is None:
+            self._prefix_sums = [0] + list(accumulate(self.balances))
+        return self._prefix_sums
+
+    def add(self, voucher, rank=0, position=None):
+        """
+        Adds a voucher (or updates it if it is already in the index).
+
+        :param voucher: The voucher.
+        :param rank: The rank of the voucher list of the voucher (lists with a lower rank are used first).
+        :param position: Optional. The former position of a removed voucher (see remove), to restore its order.
+        """
+        if id(voucher) in self._positions:
+            self.update(voucher)
+            return
+        if position is None:
+            self._sequence += 1
+            position = (rank, self._sequence)
+        self._positions[id(voucher)] = position
+        self._insert(voucher)
+
+    def remove(self, voucher):
+        """
+        Removes a voucher from the index (e.g. if it was removed from the voucher lists).
+
+        :return: The position of the removed voucher or None if it was not in the index.
+        """
+        position = self._positions.pop(id(voucher), None)
+        if position is not None:
+            self._delete(voucher)
+        return position
+
+    def update(self, voucher):
+        """Updates the balance of a voucher after its transactions have changed (the position is kept)."""
+        if id(voucher) in self._positions:
+            self._delete(voucher)
+            self._insert(voucher)
+
+    def _insert(self, voucher):
+        balance = voucher.get_voucher_amount(self.owner_id)
+        balance_cents = to_cents(balance)
+        if balance_cents <= 0:  # use only vouchers with amount, ignore empty vouchers
+            return
+        sort_key = (balance_cents, self._positions[id(voucher)])
+        i = bisect.bisect_left(self._sort_keys, sort_key)
+        self._sort_keys.insert(i, sort_key)
+        self.balances.insert(i, balance_cents)
+        self.entries.insert(i, (balance_cents, sort_key[1], balance, voucher))
+        self._sort_key_by_voucher[id(voucher)] = sort_key
+        self._prefix_sums = None
+
+    def _delete(self, voucher):
+        sort_key = self._sort_key_by_voucher.pop(id(voucher), None)
+        if sort_key is None:
+            return
+        i = bisect.bisect_left(self._sort_keys, sort_key)
+        del self._sort_keys[i]
+        del self.balances[i]
+        del self.entries[i]
+        self._prefix_sums = None
+
+    def smallest_covering(self, amount):
+        """Returns the position in the index of the voucher with the smallest balance >= amount (cents) or None."""
+        i = bisect.bisect_left(self.balances, amount)
+        return i if i < len(self.balances) else None
+
+
+def take_in_order(entries, amount):
+    """
+    Takes vouchers in the given order until the amount is covered. The last voucher is used partially.
+
+    :param entries: Index entries (see VoucherBalanceIndex.entries) in the order they should be used.
+    :param amount: The amount to send in cents.
+    :return: List of (voucher, send_amount) or None if the vouchers do not cover the amount.
+    """
+    selected = []
+    remaining = amount
+    for balance_cents, _, balance, voucher in entries:
+        if remaining <= 0:
+            break
+        if balance_cents >= remaining:
+            # a voucher with exactly the remaining amount is sent completely (no split)
+            selected.append((voucher, balance if balance_cents == remaining else remaining / 100))
+            remaining = 0
+        else:
+            selected.append((voucher, balance))
+            remaining -= balance_cents
+    return selected if remaining <= 0 else None
+
+
+def select_list_order(index, amount):
+    """Uses the vouchers in the order of the voucher lists (OTHER before OWN)."""
+    return take_in_order(sorted(index.entries, key=lambda entry: entry[1]), amount)
+
+
+def select_fewest_vouchers(index, amount):
+    """
+    Uses the smallest single voucher that covers the amount, otherwise the vouchers with the largest balances.
+    """
+    i = index.smallest_covering(amount)
+    if i is not None:
+        return take_in_order([index.entries[i]], amount)
+    return take_in_order(reversed(index.entries), amount)
+
+
+def select_exact_match(index, amount, max_vouchers=4, max_steps=10000):
+    """
+    Searches a set of up to max_vouchers vouchers whose balances add up exactly to the amount, so no voucher has to
+    be split. The search is limited to max_steps steps. Falls back to select_fewest_vouchers.
+    """
+    balances = index.balances
+    prefix_sums = index.prefix_sums()
+    steps = 0
+
+    def search(remaining, end, depth):
+        # search in the vouchers index[:end], the last voucher is looked up directly
+        nonlocal steps
+        i = bisect.bisect_left(balances, remaining, 0, end)
+        if i < end and balances[i] == remaining:
+            return [i]
+        if depth == 1:
+            return None
+        for k in range(i - 1, -1, -1):  # vouchers with a smaller balance than remaining, largest first
+            steps += 1
+            if steps > max_steps or prefix_sums[k + 1] < remaining or balances[k] * depth < remaining:
+                return None  # limit reached or the remaining vouchers are not enough
+            result = search(remaining - balances[k], k, depth - 1)
+            if result is not None:
+                return result + [k]
+        return None
+
+    exact_match = search(amount, len(balances), max_vouchers)
+    if exact_match is not None:
+        return take_in_order([index.entries[i] for i in exact_match], amount)
+    return select_fewest_vouchers(index, amount)
+
+
+def select_shortest_chain(index, amount):
+    """Uses the vouchers with the fewest transactions first (smaller transfer files, faster verification)."""
+    return take_in_order(sorted(index.entries, key=lambda entry: (len(entry[3].transactions), -entry[0])), amount)
+
+
+def select_oldest_expiry(index, amount):
+    """Uses the vouchers that expire first."""
+    return take_in_order(sorted(index.entries, key=lambda entry: (entry[3].valid_until, -entry[0])), amount)
+
+
+# Available selection strategies (name -> function(index, amount in cents) -> list of (voucher, send_amount) or None)
+SELECTION_STRATEGIES = {
+    'list_order': select_list_order,
+    'fewest_vouchers': select_fewest_vouchers,
+    'exact_match': select_exact_match,
+    'shortest_chain': select_shortest_chain,
+    'oldest_expiry': select_oldest_expiry,
+}
+
+
+def register_selection_strategy(name, strategy):
+    """
+    Adds a voucher selection strategy.
+
+    :param name: The name of the strategy (used in config.VOUCHER_SELECTION_STRATEGY).
+    :param strategy: function(index: VoucherBalanceIndex, amount: int cents) -> list of (voucher, send_amount) or None
+    """
+    SELECTION_STRATEGIES[name] = strategy
+
+
+def select_vouchers(index, amount, strategy='exact_match', verbose=False):
+    """
+    Selects the vouchers for a payment. Only the selected vouchers are verified; if a selected voucher is invalid,
+    it is excluded and the selection is repeated. The index is unchanged afterwards.
+
+    :param index: The VoucherBalanceIndex of the candidate vouchers (see VoucherCollection.balance_index).
+    :param amount: The amount to send (has to be positive).
+    :param strategy: The name of the selection strategy (see SELECTION_STRATEGIES).
+    :param verbose: If True, provides detailed output during the verification.
+    :return: List of (voucher, send_amount) or None if the valid vouchers do not cover the amount.
+    """
+    if strategy not in SELECTION_STRATEGIES:
+        raise ValueError(f"Unknown voucher selection strategy: {strategy}")
+    amount = to_cents(amount)
+    if amount <= 0:
+        raise ValueError("The amount to send must be positive.")
+
+    excluded = []  # invalid vouchers, removed from the index during the selection (list of (voucher, position))
+    try:
+        while index.total() >= amount:
+            selected = SELECTION_STRATEGIES[strategy](index, amount)
+            if selected is None:
+                return None
+            invalid_vouchers = [voucher for voucher, _ in selected if not voucher.verify_complete_voucher(verbose)]
+            if not invalid_vouchers:
+                return selected
+            for voucher in invalid_vouchers:
+                excluded.append((voucher, index.remove(voucher)))
+        return None
+    finally:
+        for voucher, position in excluded:
+            index.add(voucher, position=position)
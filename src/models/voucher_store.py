@@ -0,0 +1,105 @@
+# voucher_store.py
+import sqlite3
+import threading
+from src.services.crypto_utils import symmetric_encrypt, symmetric_decrypt
+
+
+class SQLiteVoucherStore:
+    """
+    Stores all vouchers of a profile in a single SQLite file instead of one encrypted file per voucher.
+    Every row contains the encrypted voucher (same encryption as the voucher files) and some unencrypted
+    columns for fast queries (voucher_id, local_vid, status, balance, creator_id).
+    A status change is a single UPDATE instead of writing a new file and deleting the old one.
+    """
+
+    def __init__(self, db_path, key, binary=False):
+        """
+        Opens (and creates if necessary) the voucher database.
+
+        :param db_path: Path of the SQLite file.
+        :param key: The key (bytes) for the encryption of the voucher data.
+        :param binary: If True, the voucher data is serialized in the compact binary format instead of JSON.
+        """
+        self.db_path = db_path
+        self.key = key
+        self.binary = binary
+        self._lock = threading.Lock()  # connection is shared between threads
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS vouchers (
+                    row_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    voucher_id TEXT NOT NULL,
+                    local_vid TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    balance REAL NOT NULL DEFAULT 0,
+                    creator_id TEXT NOT NULL,
+                    data TEXT NOT NULL
+                )""")
+            for column in ['voucher_id', 'local_vid', 'status', 'creator_id']:
+                self._connection.execute(f"CREATE INDEX IF NOT EXISTS idx_vouchers_{column} ON vouchers ({column})")
+
+    def save_voucher(self, voucher_data, voucher_id, local_vid, status, balance, creator_id, row_id=None):
+        """
+        Saves a voucher. If row_id is given, the existing row is updated, otherwise a new row is inserted.
+
+        :param voucher_data: The voucher as dict (will be encrypted).
+        :return: The row_id of the voucher.
+        """
+        data = symmetric_encrypt(voucher_data, key=self.key, binary=self.binary)
+        with self._lock, self._connection:
+            if row_id is not None:
+                cursor = self._connection.execute(
+                    "UPDATE vouchers SET voucher_id=?, local_vid=?, status=?, balance=?, creator_id=?, data=? "
+                    "WHERE row_id=?", (voucher_id, local_vid, status, balance, creator_id, data, row_id))
+                if cursor.rowcount:
+                    return row_id
+            cursor = self._connection.execute(
+                "INSERT INTO vouchers (voucher_id, local_vid, status, balance, creator_id, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (voucher_id, local_vid, status, balance, creator_id, data))
+            return cursor.lastrowid
+
+    def update_status(self, row_id, status):
+        """
+        Changes only the status of a stored voucher.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("UPDATE vouchers SET status=? WHERE row_id=?", (status, row_id))
+
+    def delete_voucher(self, row_id):
+        """
+        Permanently deletes a stored voucher.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM vouchers WHERE row_id=?", (row_id,))
+
+    def load_vouchers(self):
+        """
+        Reads and decrypts all stored vouchers with a single query.
+
+        :return: List of tuples (row_id, status, voucher_data dict).
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT row_id, status, data FROM vouchers ORDER BY row_id").fetchall()
+
+        vouchers = []
+        for row_id, status, data in rows:
+            try:
+                vouchers.append((row_id, status, symmetric_decrypt(data, key=self.key)))
+            except Exception as e:
+                print(f"Decryption of stored voucher {row_id} failed: {e}")
+        return vouchers
+
+    def get_row_ids(self):
+        """
+        Returns the row_ids of all stored vouchers without decrypting them.
+        """
+        with self._lock:
+            return [row[0] for row in self._connection.execute("SELECT row_id FROM vouchers ORDER BY row_id")]
+
+    def close(self):
+        """
+        Closes the database connection.
+        """
+        with self._lock:
+            self._connection.close()
@@ -3,6 +3,7 @@ import json
 from src.models.key import Key
 from src.services.utils import get_timestamp, amount_precision
 from src.services.crypto_utils import get_hash
+from src.models.transaction_record import TransactionRecord
 
 class VoucherTransaction:
     def __init__(self, voucher):
@@ -62,8 +63,7 @@ class VoucherTransaction:
         # Use the hash of the last transaction, if available
         if self.voucher.transactions:
             last_transaction = self.voucher.transactions[-1]
-            previous_transaction = json.dumps(last_transaction, sort_keys=True).encode()
-            self.previous_hash = get_hash(previous_transaction)
+            self.previous_hash = self.voucher.get_memoized_transaction_hash(last_transaction)
         else:
             raise ValueError("No previous transactions exist for this voucher.")
 
@@ -94,10 +94,10 @@ class VoucherTransaction:
         return transaction_data
 
     def _sign_transaction_data(self, key, transaction_data):
-        # signs transatction an der returns the complete transaction data
+        # signs transatction an der returns the complete transaction data (TransactionRecord)
         self.sender_signature = key.sign(transaction_data["t_id"], base64_encode=True)
         transaction_data["sender_signature"] = self.sender_signature
-        return transaction_data
+        return TransactionRecord(transaction_data)
 
     @staticmethod
     def calculate_transaction_id(transaction_data):
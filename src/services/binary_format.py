@@ -0,0 +1,189 @@
+# binary_format.py
+"""
+Compact binary encoding of JSON compatible data (dicts, lists, str, int, float, bool, None), used as alternative to
+JSON for voucher and transaction files and for encrypted payloads.
+
+Format (version 1): MAGIC, version byte, one encoded value. Each value starts with a type byte:
+    0x00 None, 0x01 False, 0x02 True
+    0x03 int (zigzag varint)
+    0x04 float (8 byte IEEE 754, big endian)
+    0x05 str (varint length, UTF-8)
+    0x06 Base64 str (varint length, decoded bytes), e.g. signatures (and most Base58 IDs and hashes)
+    0x07 reference to an earlier str (varint index in the order of appearance)
+    0x08 list (varint count, values)
+    0x09 dict (varint count, key value pairs)
+Strings with at least MIN_TABLE_LENGTH characters are numbered in the order of their first appearance, so repeated
+strings (keys, user IDs) are written only once. Base64 strings are only stored as bytes if encoding the bytes again
+results in the same string, so decode(encode(data)) is always equal to data (including the order of the dict keys),
+and the canonical JSON used for hashes and signatures is unchanged.
+Base58 strings are not converted separately: the Base58 alphabet is part of the Base64 alphabet, so IDs and hashes
+with a length divisible by 4 are stored as Base64 bytes (about the same size, but much faster to decode).
+"""
+import base64
+import binascii
+import re
+import struct
+
+MAGIC = b'\x89EMB'
+FORMAT_VERSION = 1
+MIN_TABLE_LENGTH = 4  # shorter strings are written directly
+
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _B64, _REF, _LIST, _DICT = range(10)
+_B64_PATTERN = re.compile(r'^(?:[A-Za-z0-9+/]{4})+(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?$')
+_MIN_BINARY_LENGTH = 24  # shorter strings are not checked for Base64
+_float = struct.Struct('>d')
+
+
+def is_binary(data):
+    """Returns True if data (bytes) is in the binary format."""
+    return isinstance(data, (bytes, bytearray)) and data[:len(MAGIC)] == MAGIC
+
+
+def _write_varint(out, value):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _string_bytes(value):
+    """Returns (type, bytes) of a string: Base64 strings as decoded bytes, other strings as UTF-8."""
+    if len(value) >= _MIN_BINARY_LENGTH and _B64_PATTERN.match(value):
+        raw = base64.b64decode(value)
+        if base64.b64encode(raw).decode() == value:
+            return _B64, raw
+    return _STR, value.encode('utf-8')
+
+
+def encode(data):
+    """
+    Encodes JSON compatible data in the binary format.
+
+    Args:
+        data: dict, list, str, int, float, bool or None (nested).
+
+    Returns:
+        bytes: The encoded data.
+    """
+    out = bytearray(MAGIC)
+    out.append(FORMAT_VERSION)
+    strings = {}  # str -> index
+
+    def write(value):
+        if value is None:
+            out.append(_NONE)
+        elif value is True:
+            out.append(_TRUE)
+        elif value is False:
+            out.append(_FALSE)
+        elif isinstance(value, str):
+            index = strings.get(value)
+            if index is not None:
+                out.append(_REF)
+                _write_varint(out, index)
+                return
+            if len(value) >= MIN_TABLE_LENGTH:
+                strings[value] = len(strings)
+            value_type, raw = _string_bytes(value)
+            out.append(value_type)
+            _write_varint(out, len(raw))
+            out.extend(raw)
+        elif isinstance(value, int):
+            out.append(_INT)
+            _write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)
+        elif isinstance(value, float):
+            out.append(_FLOAT)
+            out.extend(_float.pack(value))
+        elif isinstance(value, dict):
+            out.append(_DICT)
+            _write_varint(out, len(value))
+            for key, item in value.items():
+                write(key)
+                write(item)
+        elif isinstance(value, (list, tuple)):
+            out.append(_LIST)
+            _write_varint(out, len(value))
+            for item in value:
+                write(item)
+        else:
+            raise TypeError(f"Object of type {type(value).__name__} can not be encoded")
+
+    write(data)
+    return bytes(out)
+
+
+def decode(data):
+    """
+    Decodes data in the binary format.
+
+    Args:
+        data (bytes): The encoded data (see encode).
+
+    Returns:
+        The decoded data (dict, list, str, ...).
+
+    Raises:
+        ValueError: If the data is not in the binary format or the version is not supported.
+    """
+    if not is_binary(data):
+        raise ValueError("Data is not in the binary format")
+    if data[len(MAGIC)] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary format version: {data[len(MAGIC)]}")
+
+    data = bytes(data)
+    position = len(MAGIC) + 1
+    strings = []
+
+    def read_varint():
+        nonlocal position
+        result = 0
+        shift = 0
+        while True:
+            byte = data[position]
+            position += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def read():
+        nonlocal position
+        value_type = data[position]
+        position += 1
+        if value_type == _REF:
+            return strings[read_varint()]
+        if value_type == _STR or value_type == _B64:
+            length = read_varint()
+            raw = data[position:position + length]
+            position += length
+            if value_type == _STR:
+                value = raw.decode('utf-8')
+            else:
+                value = binascii.b2a_base64(raw, newline=False).decode()
+            if len(value) >= MIN_TABLE_LENGTH:
+                strings.append(value)
+            return value
+        if value_type == _DICT:
+            result = {}
+            for _ in range(read_varint()):
+                key = read()
+                result[key] = read()
+            return result
+        if value_type == _LIST:
+            return [read() for _ in range(read_varint())]
+        if value_type == _INT:
+            value = read_varint()
+            return value >> 1 if not value & 1 else -((value + 1) >> 1)
+        if value_type == _FLOAT:
+            value = _float.unpack_from(data, position)[0]
+            position += 8
+            return value
+        if value_type == _NONE:
+            return None
+        if value_type == _TRUE:
+            return True
+        if value_type == _FALSE:
+            return False
+        raise ValueError(f"Invalid type byte {value_type} at position {position - 1}")
+
+    return read()
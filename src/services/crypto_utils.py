@@ -2,7 +2,8 @@
 import base64
 import gzip
 import secrets
-from src.services.utils import Serializable
+from src.services.utils import Serializable, LRUCache
+from src.services import binary_format
 
 from mnemonic import Mnemonic
 import hashlib
@@ -12,12 +13,23 @@ from cryptography.hazmat.primitives.asymmetric import ec
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric.ec import EllipticCurvePublicKey
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 
 # Elliptic curve cryptography from:
 #https://cryptography.io/en/latest/hazmat/primitives/asymmetric/ec/#
 
+# Cache of decompressed public keys, keyed by the compressed public key (the user ID without prefix and checksum).
+# The same creator, guarantor and sender IDs appear in many signatures, so the point decompression is done only once
+# per user. Shared by all signature verifications and ECDH key exchanges.
+public_key_cache = LRUCache(maxsize=4096)
+
+# Session cache of keys derived with PBKDF2, keyed by (SHA-256 digest of the password, salt).
+# The profile password and the seed are used with the same salt many times per session (profile and seed decryption,
+# every save of the profile), so the expensive key derivation is done only once. Wiped with clear_key_cache on logout.
+derived_key_cache = LRUCache(maxsize=256)
+
 def generate_seed():
     """ Generates a random seed of 12 words. """
     mnemo = Mnemonic("english")
@@ -92,9 +104,11 @@ def verify_message_signature(compressed_public_key, message, signature):
     """
     try:
         public_key = decompress_public_key(compressed_public_key)
-        # Check if signature is base64 encoded and decode if necessary
-        if is_base64(signature):
+        # Check if signature is base64 encoded and decode if necessary (same check as is_base64 with a single decoding)
+        try:
             signature = base64.b64decode(signature)
+        except Exception:
+            pass
 
         # Attempt to verify the signature
         public_key.verify(signature, message.encode('utf-8'), ec.ECDSA(hashes.SHA256()))
@@ -172,12 +186,17 @@ def compress_public_key(public_key):
 def decompress_public_key(compressed_public_key):
     """
     Decompresses a Base58 encoded, compressed public key back into a VerifyingKey object.
+    Decompressed keys are kept in the public_key_cache.
 
     :param compressed_public_key: The Base58 encoded, compressed public key.
     :return: A VerifyingKey object.
     """
-    public_key_bytes = base58.b58decode(compressed_public_key)
-    return EllipticCurvePublicKey.from_encoded_point(ec.SECP384R1(), public_key_bytes)
+    public_key = public_key_cache.get(compressed_public_key)
+    if public_key is None:
+        public_key_bytes = base58.b58decode(compressed_public_key)
+        public_key = EllipticCurvePublicKey.from_encoded_point(ec.SECP384R1(), public_key_bytes)
+        public_key_cache.put(compressed_public_key, public_key)
+    return public_key
 
 
 def get_hash(data):
@@ -256,20 +275,55 @@ def generate_symmetric_key(password, salt=None, b64_string=False):
     if salt is None:
         salt = secrets.token_bytes(16)
 
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=salt,
-        iterations=100000,
-    )
-    key = base64.urlsafe_b64encode(kdf.derive(password))
+    cache_key = (hashlib.sha256(password).digest(), bytes(salt))
+    key = derived_key_cache.get(cache_key)
+    if key is None:
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=salt,
+            iterations=100000,
+        )
+        key = base64.urlsafe_b64encode(kdf.derive(password))
+        derived_key_cache.put(cache_key, key)
 
     if b64_string:
         return key.decode(), b64e(salt)
 
     return key, salt
 
-def symmetric_encrypt(obj, password="", second_password=None, key=None, salt=None):
+def clear_key_cache():
+    """
+    Removes all derived keys of the session from the key cache (called on profile logout).
+    """
+    derived_key_cache.clear()
+
+
+def derive_symmetric_key(secret, salt):
+    """
+    Derives a symmetric key from a secret with HKDF-SHA256.
+    Much faster than generate_symmetric_key (PBKDF2), so it is only used for secrets that are not passwords
+    typed by users, e.g. ECDH shared secrets.
+
+    Args:
+        secret (bytes | str): The secret used to derive the key.
+        salt (bytes): The salt for the key derivation.
+
+    Returns:
+        bytes: The Base64 encoded key (usable with Fernet).
+    """
+    if isinstance(secret, str):
+        secret = secret.encode()
+    hkdf = HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        info=b"eminuto-file-key",
+    )
+    return base64.urlsafe_b64encode(hkdf.derive(secret))
+
+
+def symmetric_encrypt(obj, password="", second_password=None, key=None, salt=None, binary=False):
     """
     Encrypts and compresses the provided object using symmetric encryption and concatenates
     the encrypted data, salt, and optionally the encrypted key, separated by '|'.
@@ -283,6 +337,8 @@ def symmetric_encrypt(obj, password="", second_password=None, key=None, salt=Non
         second_password (str, optional): A second password used to encrypt the encryption key.
         key (bytes, optional): Directly provided encryption key for faster processing.
         salt (bytes, optional): Salt used in conjunction with the password to generate the encryption key.
+        binary (bool, optional): If True, the object is serialized in the compact binary format (see binary_format)
+                                 instead of JSON. symmetric_decrypt detects the format.
 
     Returns:
         str: A string containing the base64 encoded encrypted data, salt, and optionally the encrypted key, separated by '|'.
@@ -301,7 +357,10 @@ def symmetric_encrypt(obj, password="", second_password=None, key=None, salt=Non
 
     f = Fernet(key)
     obj_dict = obj.to_dict() if isinstance(obj, Serializable) else obj
-    serialized_data = json.dumps(obj_dict).encode('utf-8')
+    if binary:
+        serialized_data = binary_format.encode(obj_dict)
+    else:
+        serialized_data = json.dumps(obj_dict).encode('utf-8')
     compressed_data = gzip.compress(serialized_data)
     encrypted_data = f.encrypt(compressed_data)
 
@@ -330,6 +389,9 @@ def symmetric_decrypt(encrypted_string, password="", cls=None, key=None):
 
     Returns:
         object or dict: An instance of the specified class initialized with the decrypted data, or a dictionary of the decrypted data.
+
+    Raises:
+        InvalidToken: If the key, password or second password is wrong.
     """
     parts = encrypted_string.split('|')
     encrypted_data = base64.b64decode(parts[0])
@@ -352,13 +414,16 @@ def symmetric_decrypt(encrypted_string, password="", cls=None, key=None):
                 f_final = Fernet(decrypted_key)
                 decrypted_data = f_final.decrypt(encrypted_data)
             except Exception:
-                raise Exception("Invalid decryption key, password, or second password")
+                raise InvalidToken("Invalid decryption key, password, or second password")
         else:
-            raise Exception("Invalid decryption key or password")
+            raise InvalidToken("Invalid decryption key or password")
 
     # Decompressing and then deserializing the object
     decompressed_data = gzip.decompress(decrypted_data)
-    deserialized_data = json.loads(decompressed_data.decode('utf-8'))
+    if binary_format.is_binary(decompressed_data):
+        deserialized_data = binary_format.decode(decompressed_data)
+    else:
+        deserialized_data = json.loads(decompressed_data.decode('utf-8'))
 
     if cls:
         # Instantiate an object of the provided class
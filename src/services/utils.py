@@ -4,6 +4,8 @@ import json
 import re
 from datetime import datetime
 import os, random, string
+import threading
+from collections import OrderedDict
 
 def read_file_content(file_path):
     """
@@ -211,37 +213,6 @@ def display_balance(number):
         raise ValueError("The function accepts only float or int as input.")
 
 
-def get_double_spending_vtransaction_ids(all_vouchers):
-    """
-    Extracts transaction IDs (t_id) from voucher transactions that have the same previous_hash and same sender_id
-    across all provided vouchers, avoiding duplicates. If multiple t_ids have the same previous_hash and same sender_id
-    it is evidence that double spending has occurred.
-
-    Args:
-    all_vouchers (list): A list of vouchers, each containing a list of transactions.
-
-    Returns:
-    list: A list of lists, where each inner list contains t_ids that share the same previous_hash.and the same sender_id
-          Returns an empty list if no t_ids share the same previous_hash.
-    """
-
-    # Dictionary to group t_ids by previous_hash using sets to avoid duplicates
-    hash_groups = {}
-
-    # Iterate over each voucher and transaction
-    for voucher in all_vouchers:
-        for transaction in voucher.transactions:
-            prev_hash = transaction['previous_hash']
-            sender_id = transaction['sender_id']
-            prev_hash_senders = prev_hash + sender_id
-            t_id = transaction['t_id']
-            hash_groups.setdefault(prev_hash_senders, set()).add(t_id)
-
-    # Extract groups of t_ids with more than one element and convert each set to a list
-    # This groups with 2 or more transactions are double spends!
-    return [list(group) for group in hash_groups.values() if len(group) > 1]
-
-
 class Serializable:
     """
     A base class that provides methods to convert an object to a dictionary and vice versa,
@@ -275,6 +246,63 @@ class Serializable:
         return instance
 
 
+class LRUCache:
+    """
+    A bounded, thread safe cache which discards the least recently used entries when it is full.
+    Hits and misses are counted to be able to check the efficiency of the cache.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value for the key (and marks it as recently used) or default if not cached.
+        """
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def put(self, key, value):
+        """
+        Stores a value. If the cache is full, the least recently used entry is removed.
+        """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all entries and resets the counters.
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """
+        Returns a dict with the number of hits, misses, the current size and the maximum size of the cache.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data), 'maxsize': self.maxsize}
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
 def dprint(*args, sep=' ', end='\n'):
     # Get the current frame
     current_frame = inspect.currentframe()
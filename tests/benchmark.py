@@ -0,0 +1,289 @@
+# benchmark.py
+"""
+Benchmarks of the voucher lifecycle, transfer and verification hot paths.
+
+Run from the repository root:
+    python -m tests.benchmark --output benchmark.json
+    python -m tests.benchmark --output new.json --compare old.json
+
+The results (min/mean/max seconds per run) are written as JSON, so results of different commits can be compared.
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from tests.models.simulationhelper import SimulationHelper
+from src.models.double_spend_index import DoubleSpendIndex
+from src.models.minuto_voucher import VoucherStatus, verification_cache
+from src.models.user_transaction import UserTransaction
+from src.models.voucher_transaction import VoucherTransaction
+from src.services import binary_format
+from src.services.crypto_utils import symmetric_encrypt, symmetric_decrypt, generate_symmetric_key, clear_key_cache, \
+    generate_seed
+
+CHAIN_LENGTHS = [1, 10, 100, 1000]
+VOUCHER_COUNTS = [10, 1000, 10000]
+PROFILE_VOUCHER_COUNT = 100
+
+
+def measure(func, repeat, setup=None):
+    """
+    Runs func repeat times and returns the timing statistics in seconds.
+
+    :param func: The function to measure. It gets the return value of setup as arguments (if setup is given).
+    :param repeat: Number of runs.
+    :param setup: Optional function called before every run (not measured), returns a tuple of arguments for func.
+    """
+    times = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return {'repeat': repeat, 'min': min(times), 'mean': statistics.mean(times), 'max': max(times)}
+
+
+def reset_verification(voucher):
+    """Removes all cached verification results, so the voucher is verified completely."""
+    verification_cache.clear()
+    voucher._verified_prefix = None
+    voucher._transaction_memo = {}
+
+
+def build_chain(sim, voucher, chain_length):
+    """
+    Returns a copy of the voucher with chain_length transactions. The full amount is sent back and forth
+    between the creator (person 0) and person 1.
+    """
+    voucher = copy.deepcopy(voucher)
+    sender, recipient = sim.persons[0], sim.persons[1]
+    while len(voucher.transactions) < chain_length:
+        amount = voucher.get_voucher_amount(sender.id)
+        voucher.transactions.append(VoucherTransaction(voucher).do_transaction(amount, sender.id, recipient.id,
+                                                                               sender.key))
+        sender, recipient = recipient, sender
+    return voucher
+
+
+def generate_vouchers(sim, count, amount=1):
+    """
+    Returns count distinct vouchers of person 0 (each with its own voucher_id, signatures and transaction chain).
+    """
+    vouchers = []
+    for _ in range(count):
+        sim.generate_voucher_for_person(0, 1, 2, amount, 5)
+        vouchers.append(sim.persons[0].voucherlist[VoucherStatus.OWN.value].pop())
+    return vouchers
+
+
+def person_with_vouchers(sim, vouchers):
+    """
+    Returns a copy of person 0 that owns copies of the given distinct vouchers.
+    The verification cache and the verified-prefix checkpoints are removed, so the vouchers are verified
+    completely, as without any earlier verification in the session.
+    """
+    verification_cache.clear()
+    person = copy.copy(sim.persons[0])
+    person.voucherlist = {status.value: [] for status in VoucherStatus}
+    own_vouchers = copy.deepcopy(vouchers)
+    for voucher in own_vouchers:
+        voucher._verified_prefix = None
+        voucher._transaction_memo = {}
+    person.voucherlist[VoucherStatus.OWN.value] = own_vouchers
+    return person
+
+
+def bench_voucher_lifecycle(sim, repeat, results):
+    creator, guarantor1, guarantor2 = sim.persons[0], sim.persons[1], sim.persons[2]
+
+    results['voucher_create'] = measure(lambda: creator.create_voucher(100, "Frankfurt", 5), repeat)
+    unsigned_voucher = creator.current_voucher
+
+    results['voucher_sign_guarantor'] = measure(
+        guarantor1.sign_voucher_as_guarantor, repeat, setup=lambda: (copy.deepcopy(unsigned_voucher),))
+
+    guarantor1.sign_voucher_as_guarantor(unsigned_voucher)
+    guarantor2.sign_voucher_as_guarantor(unsigned_voucher)
+
+    def setup_creator_signing():
+        voucher = copy.deepcopy(unsigned_voucher)
+        creator.voucherlist[VoucherStatus.UNFINISHED.value] = [voucher]  # signing moves it to the own vouchers
+        return (voucher,)
+
+    own_vouchers = creator.voucherlist[VoucherStatus.OWN.value][:]
+    results['voucher_sign_creator'] = measure(creator.sign_voucher_as_creator, repeat, setup=setup_creator_signing)
+    creator.voucherlist[VoucherStatus.OWN.value] = own_vouchers
+
+
+def bench_verification(sim, voucher, chain_lengths, repeat, results):
+    for chain_length in chain_lengths:
+        chain_voucher = build_chain(sim, voucher, chain_length)
+        results[f'verify_complete_voucher[chain={chain_length}]'] = measure(
+            chain_voucher.verify_complete_voucher, repeat,
+            setup=lambda: reset_verification(chain_voucher) or ())
+
+
+def bench_transfer(sim, vouchers, voucher_counts, repeat, results):
+    recipient_id = sim.persons[3].id
+    for count in voucher_counts:
+        results[f'process_transaction_to_user[vouchers={count}]'] = measure(
+            lambda person: UserTransaction().process_transaction_to_user(person, 10, recipient_id), repeat,
+            setup=lambda: (person_with_vouchers(sim, vouchers[:count]),))
+        results[f'send_amount[vouchers={count}]'] = measure(
+            lambda person: person.send_amount(10, recipient_id), repeat,
+            setup=lambda: (person_with_vouchers(sim, vouchers[:count]),))
+
+        person = person_with_vouchers(sim, vouchers[:count])
+        all_vouchers = person.voucherlist.all_vouchers()
+        results[f'double_spend_index_build[vouchers={count}]'] = measure(
+            lambda: DoubleSpendIndex().update(all_vouchers), repeat)
+        results[f'check_double_spending[vouchers={count}]'] = measure(person.check_double_spending, repeat)
+
+
+def bench_encryption(voucher, repeat, results):
+    voucher_data = voucher.to_dict()
+    key, salt = generate_symmetric_key("password")
+    encrypted = symmetric_encrypt(voucher_data, key=key, salt=salt)
+
+    results['symmetric_encrypt[key]'] = measure(lambda: symmetric_encrypt(voucher_data, key=key, salt=salt), repeat)
+    results['symmetric_decrypt[key]'] = measure(lambda: symmetric_decrypt(encrypted, key=key), repeat)
+    results['symmetric_decrypt[password]'] = measure(lambda: symmetric_decrypt(encrypted, "password"), repeat,
+                                                     setup=lambda: clear_key_cache() or ())
+
+    json_data = json.dumps(voucher_data)
+    binary_data = binary_format.encode(voucher_data)
+    encrypted_binary = symmetric_encrypt(voucher_data, key=key, salt=salt, binary=True)
+    results['json_decode'] = measure(lambda: json.loads(json_data), repeat)
+    results['binary_encode'] = measure(lambda: binary_format.encode(voucher_data), repeat)
+    results['binary_decode'] = measure(lambda: binary_format.decode(binary_data), repeat)
+    results['symmetric_decrypt[key,binary]'] = measure(lambda: symmetric_decrypt(encrypted_binary, key=key), repeat)
+
+
+def bench_profile_load(sim, voucher_count, repeat, results):
+    """Login of a profile with voucher_count received vouchers (stored as files)."""
+    from src.models.user_profile import UserProfile
+
+    data_folder = tempfile.mkdtemp(prefix="minuto_benchmark_")
+    try:
+        profile = UserProfile()
+        profile.data_folder = data_folder
+        profile.create_new_profile("benchmark", "First", "Last", "", generate_seed(), "password")
+        profile.init_existing_profile("password")
+
+        # distinct vouchers of person 0 sent to the profile
+        sender = person_with_vouchers(sim, generate_vouchers(sim, voucher_count))
+        transaction = copy.deepcopy(sender.send_amount(voucher_count, profile.person.id))
+        profile.person.receive_amount(transaction)
+        for received_voucher in transaction.transaction_vouchers:
+            local_id, _ = received_voucher.get_local_voucher_id(profile.person.id)
+            profile.add_voucher_to_management(received_voucher, local_id)
+            profile.save_voucher_to_disk(received_voucher)
+        profile.profile_logout()
+
+        def login():
+            profile.data_folder = data_folder
+            profile.init_existing_profile("password")
+
+        def logout():
+            if profile.profile_initialized():
+                profile.profile_logout()
+            verification_cache.clear()
+            return ()
+
+        results[f'profile_login[vouchers={voucher_count}]'] = measure(login, repeat, setup=logout)
+        results[f'profile_load_vouchers[vouchers={voucher_count}]'] = measure(
+            profile.load_vouchers, repeat, setup=lambda: logout() or login() or ())
+        profile.profile_logout()
+    finally:
+        shutil.rmtree(data_folder, ignore_errors=True)
+
+
+def get_git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def compare_results(results, old_results):
+    """Prints the ratio of the mean times (new / old) of all benchmarks contained in both results."""
+    for name, result in results.items():
+        old_result = old_results.get(name)
+        if old_result:
+            ratio = result['mean'] / old_result['mean'] if old_result['mean'] else float('inf')
+            print(f"{name:60} {old_result['mean']:10.5f}s -> {result['mean']:10.5f}s  x{ratio:.2f}")
+
+
+def run_benchmarks(repeat=3, quick=False):
+    """
+    Runs all benchmarks.
+
+    :param repeat: Number of runs per benchmark.
+    :param quick: If True, the largest chain lengths and voucher counts are skipped.
+    :return: Dict with the benchmark results.
+    """
+    chain_lengths = [n for n in CHAIN_LENGTHS if not quick or n <= 100]
+    voucher_counts = [n for n in VOUCHER_COUNTS if not quick or n <= 1000]
+    profile_voucher_count = 10 if quick else PROFILE_VOUCHER_COUNT
+
+    sim = SimulationHelper()
+    sim.generate_persons(4)
+    sim.generate_voucher_for_person(0, 1, 2, 100, 5)
+    voucher = sim.persons[0].voucherlist[VoucherStatus.OWN.value].pop()
+    small_vouchers = generate_vouchers(sim, max(voucher_counts))
+
+    results = {}
+    benchmarks = [
+        lambda: bench_voucher_lifecycle(sim, repeat, results),
+        lambda: bench_verification(sim, voucher, chain_lengths, repeat, results),
+        lambda: bench_transfer(sim, small_vouchers, voucher_counts, repeat, results),
+        lambda: bench_encryption(build_chain(sim, voucher, 100), repeat, results),
+        lambda: bench_profile_load(sim, profile_voucher_count, repeat, results),
+    ]
+    for benchmark in benchmarks:
+        known_results = set(results)
+        benchmark()
+        for name in results:
+            if name not in known_results:
+                print(f"{name:60} {results[name]['mean']:10.5f}s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of the voucher hot paths.")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON file for the results")
+    parser.add_argument('--repeat', type=int, default=3, help="number of runs per benchmark")
+    parser.add_argument('--quick', action='store_true', help="skip the largest chain lengths and voucher counts")
+    parser.add_argument('--compare', help="JSON file with results of an earlier run")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.repeat, args.quick)
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': get_git_commit(),
+        'python': sys.version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'repeat': args.repeat,
+        'quick': args.quick,
+        'results': results,
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare_results(results, json.load(file)['results'])
+
+
+if __name__ == '__main__':
+    main()
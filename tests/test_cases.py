@@ -1,9 +1,14 @@
 # test_cases.py
 import unittest
 import os
+import shutil
+import tempfile
 from tests.models.simulationhelper import SimulationHelper
 from tests.services.utils import modify_voucher, compare_and_highlight_differences
 from src.models.minuto_voucher import VoucherStatus
+from src.models.user_profile import UserProfile
+from src.models.secure_file_handler import SecureFileHandler
+from src.services.crypto_utils import generate_seed
 
 class TestPerson(unittest.TestCase):
     def setUp(self):
@@ -168,6 +173,182 @@ class TestPerson(unittest.TestCase):
         self.assertEqual(sorted(dspender_ids), sorted(sim_dspender_ids),
                          "Detected double spenders should match expected ones.")
 
+    def test_double_spend_index(self):
+        """
+        Test the incremental update of the double spending index.
+        """
+        import copy
+        sim = SimulationHelper()
+        sim.generate_persons(4)
+        sim.generate_voucher_for_person(0, 1, 2, 100, 5)
+        double_spender_id = sim.send_amount_double_spend(0, 1, 49, 2, 100)
+        sim.send_amount(1, 3, 49)
+        self.assertEqual(sim.persons[3].check_double_spending(), [])
+
+        # the second branch of the double spend reaches person 3
+        sim.send_amount(2, 3, 100)
+        person = sim.persons[3]
+        self.assertTrue(person.double_spend_index.has_double_spending())
+        double_spend_info = person.check_double_spending()
+        self.assertEqual([info['double_spender_id'] for info in double_spend_info], [double_spender_id])
+        self.assertEqual(person.check_double_spending(), double_spend_info)
+
+        # replaced or shortened transaction chains are indexed again (no stale entries of the old chain)
+        voucher, other_voucher = person.voucherlist[VoucherStatus.OTHER.value]
+        transactions = voucher.transactions
+        voucher.transactions = copy.deepcopy(other_voucher.transactions)  # same length, other transactions
+        person.voucherlist.voucher_changed(voucher)
+        self.assertEqual(person.check_double_spending(), [])
+        voucher.transactions = transactions
+        person.voucherlist.voucher_changed(voucher)
+        self.assertEqual([info['double_spender_id'] for info in person.check_double_spending()], [double_spender_id])
+        voucher.transactions = transactions[:1]
+        person.voucherlist.voucher_changed(voucher)
+        self.assertEqual(person.check_double_spending(), [])
+        voucher.transactions = transactions
+        person.voucherlist.voucher_changed(voucher)
+
+        # vouchers removed from the voucher lists are removed from the index
+        person.voucherlist[VoucherStatus.OTHER.value] = []
+        self.assertEqual(person.check_double_spending(), [])
+        self.assertFalse(person.double_spend_index.has_double_spending())
+
+    def test_voucher_selection(self):
+        """
+        Test the voucher selection strategies for payments.
+        """
+        from src.models.voucher_selection import select_vouchers, VoucherBalanceIndex
+
+        sim = SimulationHelper()
+        sim.generate_persons(3)
+        for amount in [30, 50, 20, 45]:
+            sim.generate_voucher_for_person(0, 1, 2, amount, 5)
+        person = sim.persons[0]
+        index = person.voucherlist.balance_index
+
+        def selected_amounts(amount, strategy):
+            return [(float(voucher.amount), float(send_amount))
+                    for voucher, send_amount in select_vouchers(index, amount, strategy)]
+
+        self.assertEqual(selected_amounts(70, 'list_order'), [(30, 30), (50, 40)])
+        self.assertEqual(sorted(selected_amounts(70, 'exact_match')), [(20, 20), (50, 50)])
+        self.assertEqual(selected_amounts(40, 'fewest_vouchers'), [(45, 40)])
+        self.assertEqual(selected_amounts(120, 'fewest_vouchers'), [(50, 50), (45, 45), (30, 25)])
+        self.assertIsNone(select_vouchers(index, 146, 'exact_match'))
+        with self.assertRaises(ValueError):
+            select_vouchers(index, 0)
+        self.assertFalse(person.send_amount(0, sim.persons[1].id).transaction_successful)
+        self.assertFalse(person.send_amount(-5, sim.persons[1].id).transaction_successful)
+
+        # the payment uses the configured strategy
+        transaction = person.send_amount(95, sim.persons[1].id)
+        self.assertTrue(transaction.transaction_successful)
+        self.assertEqual(sorted(float(v.amount) for v in transaction.transaction_vouchers), [45, 50])
+        self.assertEqual(person.get_amount_of_all_vouchers(), 50)
+
+        # the balance index of the voucher collection is kept up to date with the voucher lists
+        rebuilt = VoucherBalanceIndex(person.id, person.voucherlist[VoucherStatus.OWN.value])
+        self.assertEqual(index.balances, rebuilt.balances)
+        self.assertEqual(index.total(), 5000)
+
+    def test_balance_ledger(self):
+        """
+        Test that the running balances of the balance ledger match the recalculated balances after
+        payments, double spending and direct changes of the voucher lists.
+        """
+        from src import config
+
+        sim = SimulationHelper()
+        sim.generate_persons(4)
+        sim.generate_voucher_for_person(0, 1, 2, 100, 5)
+        sim.generate_voucher_for_person(1, 0, 3, 50, 5)
+        config.BALANCE_LEDGER_CHECK = True  # every balance query is checked against the recalculated balances
+        try:
+            self.assertEqual(sim.persons[0].get_amount_of_all_vouchers(), 100)
+            sim.send_amount(0, 1, 30.5)
+            sim.send_amount(1, 2, 60)
+            sim.send_amount_double_spend(0, 3, 20, 2, 49.5)
+            for person in sim.persons:
+                self.assertTrue(person.balance_ledger.check_consistency(person.voucherlist))
+            self.assertEqual(sim.persons[1].get_amount_of_all_vouchers(), 20.5)
+            self.assertEqual(sim.persons[1].balance_ledger.get_balance(VoucherStatus.OWN.value), 0)
+
+            # direct changes of the voucher lists update the ledger
+            person = sim.persons[2]
+            vouchers = person.voucherlist[VoucherStatus.OTHER.value]
+            voucher = vouchers.pop()
+            person.voucherlist[VoucherStatus.OWN.value] = [voucher]
+            person.voucherlist[VoucherStatus.OWN.value][0] = voucher
+            self.assertTrue(person.balance_ledger.check_consistency(person.voucherlist))
+            del person.voucherlist[VoucherStatus.OWN.value][:]
+            self.assertTrue(person.balance_ledger.check_consistency(person.voucherlist))
+            self.assertEqual(person.balance_ledger.get_balance(VoucherStatus.OWN.value), 0)
+        finally:
+            config.BALANCE_LEDGER_CHECK = False
+
+    def test_voucher_collection(self):
+        """
+        Test the status lookup, moves and the voucher_id/local_vid indexes of the voucher collection.
+        """
+        sim = SimulationHelper()
+        sim.generate_persons(3)
+        for amount in [10, 20, 30]:
+            sim.generate_voucher_for_person(0, 1, 2, amount, 5)
+        person = sim.persons[0]
+        collection = person.voucherlist
+        v10, v20, v30 = collection[VoucherStatus.OWN.value]
+
+        self.assertEqual(collection.get_status(v20), VoucherStatus.OWN.value)
+        self.assertEqual(collection.get_by_voucher_id(v20.voucher_id), [v20])
+        self.assertIn(v20, collection[VoucherStatus.OWN.value])
+
+        own_vouchers = collection[VoucherStatus.OWN.value]
+        self.assertEqual([own_vouchers[i] for i in range(len(own_vouchers))], [v10, v20, v30])
+        self.assertEqual(own_vouchers[1:], [v20, v30])
+
+        collection.move(v20, VoucherStatus.ARCHIVED.value)
+        self.assertEqual(collection[VoucherStatus.OWN.value], [v10, v30])  # the order is kept
+        self.assertIs(own_vouchers[1], v30)  # index access after a change
+        self.assertEqual(collection.get_status(v20), VoucherStatus.ARCHIVED.value)
+        self.assertEqual(collection.all_vouchers([VoucherStatus.OWN.value, VoucherStatus.ARCHIVED.value]),
+                         [v10, v30, v20])
+
+        # the local_vid index follows new transactions
+        person.send_amount(5, sim.persons[1].id)
+        local_vid, _ = v10.get_local_voucher_id(person.id)
+        self.assertEqual(collection.get_by_local_vid(local_vid), [v10])
+
+        collection[VoucherStatus.ARCHIVED.value].remove(v20)
+        self.assertIsNone(collection.get_status(v20))
+        self.assertEqual(collection.get_by_voucher_id(v20.voucher_id), [])
+        with self.assertRaises(ValueError):
+            collection[VoucherStatus.ARCHIVED.value].remove(v20)
+
+    def test_send_amount_touched_vouchers(self):
+        """
+        Test that after a payment only the status of the used vouchers is calculated again.
+        """
+        from unittest import mock
+        from src.models.minuto_voucher import MinutoVoucher
+
+        sim = SimulationHelper()
+        sim.generate_persons(3)
+        for amount in [10, 20, 30, 40]:
+            sim.generate_voucher_for_person(0, 1, 2, amount, 5)
+        person = sim.persons[0]
+
+        with mock.patch.object(MinutoVoucher, 'voucher_status', autospec=True,
+                          side_effect=MinutoVoucher.voucher_status) as voucher_status:
+            transaction = person.send_amount(25, sim.persons[1].id)  # 30 is used partially
+            self.assertEqual(voucher_status.call_count, 1)
+            transaction = person.send_amount(40, sim.persons[1].id)  # 40 is used completely
+            self.assertEqual(voucher_status.call_count, 1)
+
+        self.assertTrue(transaction.transaction_successful)
+        self.assertEqual(sorted(float(v.amount) for v in person.voucherlist[VoucherStatus.OWN.value]), [10, 20, 30])
+        self.assertEqual([float(v.amount) for v in person.voucherlist[VoucherStatus.ARCHIVED.value]], [40])
+        self.assertEqual(person.get_amount_of_all_vouchers(), 35)
+
     def test_encryption_decryption(self):
         """
         Test the encryption and decryption process of vouchers using Diffie-Hellman key exchange.
@@ -213,6 +394,328 @@ class TestPerson(unittest.TestCase):
             "Original and decrypted vouchers should be identical."
         )
 
+    def test_verified_prefix_checkpoint(self):
+        """
+        Test that only transactions appended after the verified-prefix checkpoint are verified again and that
+        checkpoints which do not match the transactions (or come from received data) are not used.
+        """
+        from unittest import mock
+        from src.models.minuto_voucher import MinutoVoucher
+
+        sim = SimulationHelper()
+        sim.generate_persons(3)
+        sim.generate_voucher_for_person(0, 1, 2, 100, 5)
+        sim.send_amount(0, 1, 50)
+        sim.send_amount(1, 2, 20)
+
+        voucher = sim.persons[2].voucherlist[VoucherStatus.OTHER.value][0]
+        self.assertTrue(voucher.verify_all_transactions())
+        checkpoint = voucher.get_verified_prefix()
+        self.assertEqual(checkpoint['index'], len(voucher.transactions) - 1)
+
+        # after a new transaction only the new transaction is verified
+        sim.persons[2].usertransaction.process_transaction_to_user(sim.persons[2], 10, sim.persons[0].id)
+        with mock.patch.object(MinutoVoucher, 'verify_transaction_ids_signature', autospec=True,
+                               side_effect=MinutoVoucher.verify_transaction_ids_signature) as verify_signature:
+            self.assertTrue(voucher.verify_all_transactions())
+            self.assertEqual(verify_signature.call_count, 1)
+        self.assertEqual(voucher.get_verified_prefix_length(), len(voucher.transactions))
+
+        # a checkpoint which does not match the transactions is rejected
+        copied_voucher = MinutoVoucher.read_from_dict(voucher.to_dict())
+        self.assertFalse(copied_voucher.restore_verified_prefix(dict(checkpoint, digest="wrong")))
+        self.assertEqual(copied_voucher.get_verified_prefix_length(), 0)
+        self.assertTrue(copied_voucher.restore_verified_prefix(checkpoint))
+
+        # a change of any verified transaction (not only the last one) invalidates the checkpoint
+        copied_voucher.transactions[1]['amount'] = 100
+        self.assertEqual(copied_voucher.get_verified_prefix_length(), 0)
+        self.assertFalse(copied_voucher.verify_complete_voucher())
+
+        # local keys (like the checkpoint) are never taken from external data
+        received_data = dict(voucher.to_dict(), _verified_prefix=voucher.get_verified_prefix())
+        self.assertEqual(MinutoVoucher.read_from_dict(received_data).get_verified_prefix_length(), 0)
+
+    def test_verification_cache(self):
+        """
+        Test that the result of verify_complete_voucher is cached by content and verified again after changes.
+        """
+        from unittest import mock
+        from src.models.minuto_voucher import MinutoVoucher, verification_cache
+
+        sim = SimulationHelper()
+        sim.generate_persons(3)
+        sim.generate_voucher_for_person(0, 1, 2, 100, 5)
+        voucher = sim.persons[0].voucherlist[VoucherStatus.OWN.value][0]
+        verification_cache.clear()
+
+        with mock.patch.object(MinutoVoucher, 'verify_all_guarantor_signatures', autospec=True,
+                               side_effect=MinutoVoucher.verify_all_guarantor_signatures) as verify_guarantors:
+            self.assertTrue(voucher.verify_complete_voucher())
+            self.assertTrue(voucher.verify_complete_voucher())
+            self.assertEqual(verify_guarantors.call_count, 1)
+            self.assertEqual(verification_cache.info()['hits'], 1)
+
+            # a new transaction changes the content, so the voucher is verified again
+            sim.persons[0].usertransaction.process_transaction_to_user(sim.persons[0], 10, sim.persons[1].id)
+            self.assertTrue(voucher.verify_complete_voucher())
+            self.assertEqual(verify_guarantors.call_count, 2)
+
+        # a modified copy of a verified voucher is not taken from the cache
+        corrupt_voucher = MinutoVoucher.read_from_file(voucher.save_to_disk(simulation=True), simulation=True)
+        corrupt_voucher.transactions[-1]['amount'] = "90"
+        self.assertTrue(voucher.verify_complete_voucher())
+        self.assertFalse(corrupt_voucher.verify_complete_voucher())
+
+    def test_binary_format(self):
+        """
+        Test the lossless round trip of vouchers, transactions and encrypted payloads in the compact binary format.
+        """
+        import json
+        from src.models.minuto_voucher import MinutoVoucher
+        from src.models.user_transaction import UserTransaction
+        from src.services import binary_format
+        from src.services.crypto_utils import symmetric_encrypt, symmetric_decrypt, generate_symmetric_key
+
+        data = {'none': None, 'flags': [True, False], 'int': -123456789012, 'float': 0.1, 'text': 'äöü €',
+                'nested': [{'empty': ''}, [], {}], 'b64': 'MGUCMQCAjHy9nxpmaGrEWa7Gk+bs65l4kcsDn93j5KzKgzdr',
+                'b64_like': 'MGUCMQCAjHy9nxpmaGrEWa7Gk+bs65l4kcsDn93j5KzKgzdr=='}
+        self.assertEqual(json.dumps(binary_format.decode(binary_format.encode(data))), json.dumps(data))
+        with self.assertRaises(ValueError):
+            binary_format.decode(json.dumps(data).encode())
+
+        sim = SimulationHelper()
+        sim.generate_persons(3)
+        sim.generate_voucher_for_person(0, 1, 2, 100, 5)
+        transaction = sim.persons[0].send_amount(40, sim.persons[1].id)
+        voucher = transaction.transaction_vouchers[0]
+
+        binary_voucher = voucher.save_to_disk(simulation=True, binary=True)
+        self.assertLess(len(binary_voucher), len(voucher.save_to_disk(simulation=True)))
+        restored_voucher = MinutoVoucher.read_from_file(binary_voucher, simulation=True)
+        self.assertEqual(restored_voucher.get_content_hash(), voucher.get_content_hash())
+        self.assertTrue(restored_voucher.verify_complete_voucher())
+
+        restored_transaction = UserTransaction.from_bytes(transaction.to_bytes())
+        self.assertEqual(json.dumps(restored_transaction.to_dict()), json.dumps(transaction.to_dict()))
+
+        key, salt = generate_symmetric_key("password")
+        encrypted = symmetric_encrypt(voucher, key=key, salt=salt, binary=True)
+        self.assertEqual(symmetric_decrypt(encrypted, key=key), voucher.to_dict())
+
+    def test_transaction_memo(self):
+        """
+        Test that the hash and the t_id of a transaction are computed once and recomputed after a modification.
+        """
+        from unittest import mock
+        from src.models.voucher_transaction import VoucherTransaction
+
+        sim = SimulationHelper()
+        sim.generate_persons(3)
+        sim.generate_voucher_for_person(0, 1, 2, 100, 5)
+        sim.send_amount(0, 1, 40)
+        sim.send_amount(1, 2, 10)
+        voucher = sim.persons[2].voucherlist[VoucherStatus.OTHER.value][0]
+
+        with mock.patch.object(VoucherTransaction, 'calculate_transaction_id',
+                               side_effect=VoucherTransaction.calculate_transaction_id) as calculate_transaction_id:
+            self.assertTrue(voucher.verify_all_transactions(use_checkpoint=False))
+            calls = calculate_transaction_id.call_count
+            self.assertTrue(voucher.verify_all_transactions(use_checkpoint=False))
+            self.assertEqual(calculate_transaction_id.call_count, calls)
+
+            # a modified transaction is not taken from the memo
+            transaction = voucher.transactions[-1]
+            old_hash = voucher.get_memoized_transaction_hash(transaction)
+            transaction['amount'] = "20"
+            self.assertNotEqual(voucher.get_memoized_transaction_hash(transaction), old_hash)
+            self.assertEqual(voucher.get_memoized_transaction_hash(transaction), voucher.get_transaction_hash(transaction))
+            self.assertFalse(voucher.verify_all_transactions(use_checkpoint=False))
+            self.assertEqual(calculate_transaction_id.call_count, calls + 1)
+
+    def test_public_key_cache(self):
+        """
+        Test that public keys are decompressed only once per user for repeated signature verifications.
+        """
+        from src.models.key import Key
+        from src.services.crypto_utils import public_key_cache
+
+        key = self.test_person[0].key
+        signature = key.sign("message", base64_encode=True)
+        public_key_cache.clear()
+
+        for i in range(3):
+            self.assertTrue(Key.verify_signature("message", signature, Key.get_pubkey_from_id(key.id)))
+        self.assertFalse(Key.verify_signature("other message", signature, Key.get_pubkey_from_id(key.id)))
+        self.assertEqual(public_key_cache.info()['misses'], 1)
+        self.assertEqual(public_key_cache.info()['hits'], 3)
+
+    def test_verify_many(self):
+        """
+        Test the parallel verification of voucher lists with process and thread pools.
+        """
+        from src.models.minuto_voucher import MinutoVoucher, verify_many, verification_cache
+
+        sim = SimulationHelper()
+        sim.generate_persons(3)
+        sim.generate_voucher_for_person(0, 1, 2, 100, 5)
+        sim.send_amount(0, 1, 40)
+        sim.send_amount(0, 1, 30)
+
+        vouchers = [MinutoVoucher.read_from_file(v.save_to_disk(simulation=True), simulation=True)
+                    for v in sim.persons[1].voucherlist[VoucherStatus.OTHER.value]]
+        vouchers[0].transactions[-1]['amount'] = "100"  # corrupt the first voucher
+        expected_statuses = [VoucherStatus.CORRUPT] + [VoucherStatus.OTHER] * (len(vouchers) - 1)
+
+        for use_processes in [False, True]:
+            verification_cache.clear()
+            statuses = verify_many(vouchers, sim.persons[1].id, workers=2, use_processes=use_processes)
+            self.assertEqual(statuses, expected_statuses)
+
+        # results of the worker processes are taken over by the calling process
+        self.assertEqual(vouchers[1].get_verified_prefix_length(), len(vouchers[1].transactions))
+        self.assertIn(vouchers[1].get_content_hash(), verification_cache)
+
+    def test_transaction_history(self):
+        """
+        Test the order and the range queries of the transaction history.
+        """
+        from src.models.transaction_history import TransactionHistory
+
+        history = TransactionHistory()
+        transactions = [('t1', 'a', 'b', '2024-01-02T10:00:00'), ('t2', 'b', 'a', '2024-01-01T10:00:00'),
+                        ('t3', 'a', 'c', '2024-01-03T10:00:00'), ('t4', 'c', 'a', '2024-01-02T10:00:00')]
+        for transaction_id, sender, recipient, time in transactions:
+            history.add({'id': transaction_id, 'sender': sender, 'recipient': recipient, 'time': time})
+
+        # most recent first, transactions with the same time in the order they were added
+        self.assertEqual(list(history), ['t3', 't1', 't4', 't2'])
+        self.assertEqual([e['id'] for e in history.query(sender='a')], ['t3', 't1'])
+        self.assertEqual([e['id'] for e in history.query(recipient='a')], ['t4', 't2'])
+        self.assertEqual([e['id'] for e in history.query(start='2024-01-02T10:00:00', end='2024-01-02T10:00:00')],
+                         ['t1', 't4'])
+        self.assertEqual([e['id'] for e in history.query(end='2024-01-02T09:00:00')], ['t2'])
+        self.assertEqual([e['id'] for e in history.query(sender='a', recipient='c')], ['t3'])
+
+        # the position in the query result (e.g. the row of a new transaction in the transaction list)
+        for arguments in [{}, {'sender': 'a'}, {'recipient': 'a'}, {'sender': 'a', 'recipient': 'c'}]:
+            for row, entry in enumerate(history.query(**arguments)):
+                self.assertEqual(history.position(entry['id'], **arguments), row)
+        self.assertIsNone(history.position('t2', sender='a'))
+        self.assertIsNone(history.position('unknown'))
+
+        history.add({'id': 't1', 'sender': 'a', 'recipient': 'b', 'time': '2024-01-04T10:00:00'})  # replaced
+        self.assertEqual(list(history), ['t1', 't3', 't4', 't2'])
+        self.assertEqual(history.get('t1')['time'], '2024-01-04T10:00:00')
+        history.remove('t3')
+        self.assertEqual([e['id'] for e in history.query(sender='a')], ['t1'])
+
+        # change notifications
+        events = []
+        history.add_listener(lambda event, entry: events.append((event, entry and entry['id'])))
+        history.add({'id': 't5', 'sender': 'a', 'recipient': 'b', 'time': '2024-01-05T10:00:00'})
+        history.add({'id': 't5', 'sender': 'a', 'recipient': 'b', 'time': '2024-01-06T10:00:00'})
+        history.clear()
+        self.assertEqual(events, [('add', 't5'), ('remove', 't5'), ('add', 't5'), ('clear', None)])
+        self.assertEqual(len(history), 0)
+
+    def test_transaction_compaction(self):
+        """
+        Test that a holder can replace the beginning of the transaction chain with a signed checkpoint, that the
+        compacted voucher is only valid with the local verified-prefix checkpoint and that compacted vouchers of
+        other users (e.g. with a forged checkpoint) are rejected.
+        """
+        import copy
+        from src.models.minuto_voucher import MinutoVoucher
+        sim = SimulationHelper()
+        sim.generate_persons(4)
+        sim.generate_voucher_for_person(0, 1, 2, 100, 5)
+        sim.send_amount(0, 1, 100)
+        sim.send_amount(1, 3, 100)
+        sim.send_amount(3, 1, 100)
+        sim.send_amount(1, 3, 100)
+        sim.send_amount(3, 1, 100)
+
+        voucher = sim.persons[1].voucherlist[VoucherStatus.OTHER.value][0]
+        self.assertEqual(len(voucher.transactions), 6)
+        full_size = len(voucher.save_to_disk(simulation=True))
+
+        # only a holder of the last compacted transaction can sign the checkpoint
+        with self.assertRaises(ValueError):
+            copy.deepcopy(voucher).compact_transactions(sim.persons[1].key, keep=1)
+
+        compacted = voucher.compact_transactions(sim.persons[1].key, keep=2)
+        self.assertEqual(len(compacted), 4)
+        self.assertEqual(len(voucher.transactions), 2)
+        self.assertEqual(voucher.transaction_checkpoint['count'], 4)
+        self.assertEqual(voucher.get_voucher_amount(sim.persons[1].id), 100)
+        self.assertLess(len(voucher.save_to_disk(simulation=True)), full_size)
+
+        # the compacted voucher is valid with the local checkpoint (also when restored from the own storage)
+        self.assertTrue(voucher.verify_complete_voucher())
+        self.assertEqual(voucher.voucher_status(sim.persons[1].id), VoucherStatus.OTHER)
+        stored = MinutoVoucher.read_from_file(voucher.save_to_disk(simulation=True), simulation=True)
+        self.assertFalse(stored.verify_complete_voucher())
+        self.assertTrue(stored.restore_verified_prefix(voucher.get_verified_prefix()))
+        self.assertTrue(stored.verify_complete_voucher())
+        self.assertFalse(voucher.verify_all_transactions(use_checkpoint=False))
+
+        # a changed checkpoint doesn't match the local checkpoint anymore
+        forged = MinutoVoucher.read_from_file(voucher.save_to_disk(simulation=True), simulation=True)
+        forged.transaction_checkpoint['last_transaction']['amount'] = 1000
+        self.assertFalse(forged.restore_verified_prefix(voucher.get_verified_prefix()))
+        self.assertFalse(forged.verify_complete_voucher())
+
+        # other users can't verify the compacted transactions, so a compacted voucher is rejected by them even
+        # with a valid checkpoint signature (anybody could sign a checkpoint over an invented transaction),
+        # also after a copy with the same content was verified locally
+        received = MinutoVoucher.read_from_file(voucher.save_to_disk(simulation=True), simulation=True)
+        self.assertEqual(received.get_content_hash(), voucher.get_content_hash())
+        self.assertTrue(received.verify_transaction_checkpoint())
+        self.assertFalse(received.verify_complete_voucher())
+        self.assertEqual(received.voucher_status(sim.persons[3].id), VoucherStatus.CORRUPT)
+        self.assertEqual(received.voucher_status(sim.persons[1].id), VoucherStatus.CORRUPT)
+        self.assertTrue(voucher.verify_complete_voucher())
+
+    def test_transaction_record(self):
+        """
+        Test that transactions are stored as TransactionRecord and converted losslessly to the transaction dicts
+        (key order, unknown keys), so the transaction hashes and the saved vouchers are unchanged.
+        """
+        import json
+        from src.models.minuto_voucher import MinutoVoucher
+        from src.models.transaction_record import TransactionRecord
+        sim = SimulationHelper()
+        sim.generate_persons(3)
+        sim.generate_voucher_for_person(0, 1, 2, 100, 5)
+        sim.send_amount(0, 1, 22.5)
+
+        voucher = sim.persons[1].voucherlist[VoucherStatus.OTHER.value][0]
+        saved = voucher.save_to_disk(simulation=True)
+        transaction_dicts = json.loads(saved)['transactions']
+        restored = MinutoVoucher.read_from_file(saved, simulation=True)
+        self.assertTrue(all(isinstance(transaction, TransactionRecord) for transaction in restored.transactions))
+        self.assertEqual(restored.save_to_disk(simulation=True), saved)
+        self.assertEqual(restored.get_content_hash(), voucher.get_content_hash())
+        self.assertTrue(restored.verify_complete_voucher())
+
+        split = restored.transactions[-1]
+        self.assertEqual(list(split.to_dict().items()), list(transaction_dicts[-1].items()))
+        self.assertEqual(split.t_type, 'split')
+        self.assertEqual((split.amount_value, split.sender_remaining_value), (22.5, 77.5))
+        self.assertEqual(split['sender_id'], sim.persons[0].id)
+        self.assertIsNone(restored.transactions[0].sender_remaining_amount)
+        self.assertNotIn('sender_remaining_amount', restored.transactions[0])
+        self.assertEqual(MinutoVoucher.get_transaction_hash(split),
+                         MinutoVoucher.get_transaction_hash(transaction_dicts[-1]))
+
+        # changes and unknown keys are kept
+        record = TransactionRecord({'t_id': "abc", 'future_key': [1, 2], 'amount': "5"})
+        record['amount'] = "7.5"
+        self.assertEqual(record.amount_value, 7.5)
+        self.assertEqual(record.to_dict(), {'t_id': "abc", 'future_key': [1, 2], 'amount': "7.5"})
+        self.assertEqual(record, {'t_id': "abc", 'future_key': [1, 2], 'amount': "7.5"})
+
     # def tearDown(self):
     #     # Cleanup: Remove test files
     #     for file_name in [self.voucher_file_name, self.male_signed_voucher_file_name, self.male_female_signed_voucher_file_name, "minutoschein-complete.txt"]:
@@ -220,5 +723,380 @@ class TestPerson(unittest.TestCase):
     #         if os.path.exists(full_path):
     #             os.remove(full_path)
 
+
+class TestUserProfile(unittest.TestCase):
+    """
+    Tests of the user profile and its storage (voucher files, voucher database and encrypted files).
+    Every test uses its own temporary folder.
+    """
+    def setUp(self):
+        simulation = SimulationHelper()
+        simulation.generate_persons(4)
+        simulation.generate_voucher_for_person(0, 1, 2, 100, 5)
+        self.test_person = simulation.persons
+
+        self.temp_folder = tempfile.mkdtemp()
+        self.data_folder = os.path.join(self.temp_folder, "profile")
+        self.profile = None
+
+    def tearDown(self):
+        if self.profile is not None and self.profile.profile_initialized():
+            self.profile.profile_logout()
+        shutil.rmtree(self.temp_folder, ignore_errors=True)
+
+    def create_profile(self):
+        """Creates a profile in the temporary data folder and logs in."""
+        self.profile = UserProfile()
+        self.profile.data_folder = self.data_folder
+        self.profile.create_new_profile("test", "First", "Last", "", generate_seed(), "password")
+        self.assertTrue(self.profile.init_existing_profile("password"))
+        return self.profile
+
+    def login(self):
+        """Logs out (if logged in) and in again."""
+        if self.profile.profile_initialized():
+            self.profile.profile_logout()
+        self.profile.data_folder = self.data_folder  # reset by the logout
+        self.assertTrue(self.profile.init_existing_profile("password"))
+
+    def save_transaction(self, sender, amount, file_path):
+        """Sends the amount from the sender (Person) to the profile and saves the encrypted transaction file."""
+        transaction = sender.send_amount(amount, self.profile.person.id)
+        SecureFileHandler(sender.key.private_key, sender.id).encrypt_with_shared_secret_and_save(
+            transaction, file_path, self.profile.person.id)
+        return file_path
+
+    def test_voucher_index(self):
+        """
+        Test that the login only loads the voucher index and the vouchers are loaded on demand.
+        """
+        from unittest import mock
+
+        profile = self.create_profile()
+
+        # receive a transaction from another person
+        profile.open_file(self.save_transaction(self.test_person[0], 10,
+                                                os.path.join(self.temp_folder, "transaction.mt")))
+        balance = profile.get_minuto_balance(VoucherStatus.OTHER.value)
+        self.assertEqual(balance, "10,00")
+
+        # login only reads the index
+        self.login()
+        self.assertFalse(profile.vouchers_loaded())
+        self.assertEqual(profile.person.voucherlist[VoucherStatus.OTHER.value], [])
+        self.assertEqual(profile.get_minuto_balance(VoucherStatus.OTHER.value), balance)
+        self.assertEqual(profile.get_available_amount(), 10)  # e.g. the maximum amount of the send form
+        entry = profile.get_voucher_index(VoucherStatus.OTHER.value)[0]
+        self.assertEqual((entry['balance'], entry['tx_count']), (10, 2))
+
+        # a failed load doesn't mark the vouchers as loaded, the balances are still taken from the index
+        with mock.patch.object(UserProfile, 'read_vouchers_from_disk', side_effect=OSError("read error")):
+            with self.assertRaises(OSError):
+                profile.load_vouchers()
+        self.assertFalse(profile.vouchers_loaded())
+        self.assertEqual(profile.get_minuto_balance(VoucherStatus.OTHER.value), balance)
+
+        # the voucher is loaded on demand
+        voucher = profile.get_voucher(entry['location'])
+        self.assertTrue(profile.vouchers_loaded())
+        self.assertEqual(voucher.voucher_id, entry['voucher_id'])
+        self.assertEqual(profile.person.voucherlist[VoucherStatus.OTHER.value], [voucher])
+
+        # a copied voucher file is skipped as duplicate, but kept in the index, so the next login uses the index
+        shutil.copy(entry['location'], os.path.join(os.path.dirname(entry['location']), "copy.mv"))
+        self.login()
+        self.assertTrue(profile.vouchers_loaded())  # the index doesn't match the storage -> full load
+        self.login()
+        self.assertFalse(profile.vouchers_loaded())
+        self.assertEqual(len(profile.get_voucher_index()), 1)
+        self.assertEqual(profile.get_minuto_balance(VoucherStatus.OTHER.value), balance)
+
+    def test_duplicate_import(self):
+        """
+        Test that vouchers and transactions that are already in the profile are not imported again,
+        neither by open_file nor at login from a copied voucher file.
+        """
+        profile = self.create_profile()
+        transaction_file = self.save_transaction(self.test_person[0], 10,
+                                                 os.path.join(self.temp_folder, "transaction.mt"))
+        _, received_transaction, _ = profile.open_file(transaction_file)
+        self.assertIsNotNone(received_transaction)
+        voucher = profile.person.voucherlist[VoucherStatus.OTHER.value][0]
+        local_id, _ = voucher.get_local_voucher_id(profile.person.id)
+        self.assertTrue(profile.local_vid_exists(local_id))
+        self.assertTrue(profile.voucher_id_exists(voucher.voucher_id))
+
+        _, received_transaction, return_info = profile.open_file(transaction_file)
+        self.assertIsNone(received_transaction)
+        self.assertIn("existieren", return_info)
+        self.assertEqual(len(profile.person.voucherlist[VoucherStatus.OTHER.value]), 1)
+        voucher_file = profile.vouchers[id(voucher)]['file_path']
+
+        # a copy of a voucher file is skipped at login
+        profile.profile_logout()
+        shutil.copy(voucher_file, voucher_file.replace(".mv", "-copy.mv"))
+        self.login()
+        profile.load_vouchers()
+        self.assertEqual(len(profile.person.voucherlist[VoucherStatus.OTHER.value]), 1)
+        self.assertEqual(profile.get_minuto_balance(VoucherStatus.OTHER.value), "10,00")
+
+    def test_import_files(self):
+        """
+        Test the bulk import of a directory with transaction files (including a copy of a transaction),
+        the order of the results and the progress callback.
+        """
+        profile = self.create_profile()
+        import_folder = os.path.join(self.temp_folder, "import_files")
+        os.makedirs(import_folder)
+
+        sim = SimulationHelper()
+        sim.generate_persons(4)
+        sim.generate_voucher_for_person(0, 1, 2, 100, 5)
+        sim.generate_voucher_for_person(1, 0, 3, 100, 5)
+        for i, amount in enumerate([3, 4]):
+            self.save_transaction(sim.persons[i], amount, os.path.join(import_folder, f"payment{i}.mt"))
+        shutil.copy(os.path.join(import_folder, "payment0.mt"), os.path.join(import_folder, "payment2.mt"))
+        with open(os.path.join(import_folder, "notes.txt"), "w") as file:
+            file.write("not imported")
+
+        progress = []
+        results = list(profile.import_files(import_folder, progress_callback=lambda *args: progress.append(args),
+                                            workers=2))
+        self.assertEqual([os.path.basename(result[0]) for result in results],
+                         ["payment0.mt", "payment1.mt", "payment2.mt"])
+        self.assertEqual([result[2] is not None for result in results], [True, True, False])
+        self.assertIn("existieren", results[2][3])
+        self.assertEqual([(done, total) for done, total, _, _ in progress], [(1, 3), (2, 3), (3, 3)])
+        self.assertEqual(profile.get_minuto_balance(VoucherStatus.OTHER.value), "7,00")
+        self.assertEqual(len(profile.transactions), 2)
+
+    def test_key_cache_and_shared_secret_files(self):
+        """
+        Test that PBKDF2 keys are derived only once per (password, salt) and that files encrypted with a shared
+        secret are decrypted without PBKDF2 (files of older versions are still readable).
+        """
+        from src.services.crypto_utils import generate_symmetric_key, symmetric_encrypt, derived_key_cache, \
+            clear_key_cache, generate_shared_secret, extract_compressed_pubkey_from_public_ID
+        import base64
+        import gzip
+        import secrets
+        from cryptography.fernet import Fernet, InvalidToken
+        from src.services.crypto_utils import derive_symmetric_key
+
+        clear_key_cache()
+        key, salt = generate_symmetric_key("password")
+        self.assertEqual(generate_symmetric_key("password", salt), (key, salt))
+        self.assertNotEqual(generate_symmetric_key("other password", salt)[0], key)
+        self.assertEqual(derived_key_cache.info()['hits'], 1)
+
+        sender, recipient = self.test_person[0], self.test_person[1]
+        sender_handler = SecureFileHandler(sender.key.private_key, sender.id)
+        recipient_handler = SecureFileHandler(recipient.key.private_key, recipient.id)
+        file_path = os.path.join(self.temp_folder, "shared_secret_file.mt")
+        sender_handler.encrypt_with_shared_secret_and_save({'data': 1}, file_path, recipient.id)
+        clear_key_cache()
+        self.assertEqual(recipient_handler.decrypt_with_shared_secret_and_load(file_path), {'data': 1})
+        self.assertEqual(derived_key_cache.info()['misses'], 0)
+
+        # file encrypted with the shared secret and the user ID as passwords (older versions)
+        shared_secret = generate_shared_secret(sender.key.private_key,
+                                               extract_compressed_pubkey_from_public_ID(recipient.id))
+        with open(file_path, 'w') as file:
+            file.write(symmetric_encrypt({'data': 2}, password=shared_secret) + '@' +
+                       symmetric_encrypt(sender.id, password=recipient.id))
+        self.assertEqual(recipient_handler.decrypt_with_shared_secret_and_load(file_path), {'data': 2})
+
+        # a wrong secret is reported, corrupt data is not decrypted again with the older key derivation
+        encrypted = SecureFileHandler.encrypt_with_secret({'data': 3}, shared_secret)
+        self.assertEqual(SecureFileHandler.decrypt_with_secret(encrypted, shared_secret), {'data': 3})
+        with self.assertRaises(InvalidToken):
+            SecureFileHandler.decrypt_with_secret(encrypted, b"wrong secret")
+        salt = secrets.token_bytes(16)
+        token = Fernet(derive_symmetric_key(shared_secret, salt)).encrypt(b"no compressed data")
+        corrupt = base64.b64encode(token).decode() + '|' + base64.b64encode(salt).decode()
+        clear_key_cache()
+        with self.assertRaises(gzip.BadGzipFile):
+            SecureFileHandler.decrypt_with_secret(corrupt, shared_secret)
+        self.assertEqual(derived_key_cache.info()['misses'], 0)
+
+    def test_shared_secret_cache(self):
+        """
+        Test that the ECDH key exchange with a peer is done only once for several files.
+        """
+        sender, recipient = self.test_person[0], self.test_person[1]
+        sender_handler = SecureFileHandler(sender.key.private_key, sender.id)
+        recipient_handler = SecureFileHandler(recipient.key.private_key, recipient.id)
+        for i in range(3):
+            file_path = os.path.join(self.temp_folder, f"shared_secret_file_{i}.mt")
+            sender_handler.encrypt_with_shared_secret_and_save({'data': i}, file_path, recipient.id)
+            self.assertEqual(recipient_handler.decrypt_with_shared_secret_and_load(file_path), {'data': i})
+
+        for handler in [sender_handler, recipient_handler]:
+            self.assertEqual(handler._shared_secret_cache.info()['misses'], 1)
+            self.assertEqual(handler._shared_secret_cache.info()['hits'], 2)
+        self.assertEqual(sender_handler.get_shared_secret(recipient.id, sender.key.private_key),
+                         recipient_handler.get_shared_secret(sender.id, recipient.key.private_key))
+
+    def test_sqlite_voucher_store(self):
+        """
+        Test saving, status change, loading and deletion of vouchers in the SQLite voucher store.
+        """
+        from src.models.minuto_voucher import MinutoVoucher
+        from src.models.voucher_store import SQLiteVoucherStore
+        from src.services.crypto_utils import generate_symmetric_key
+
+        voucher = self.test_person[0].voucherlist[VoucherStatus.OWN.value][0]
+        key, _ = generate_symmetric_key("password")
+        db_path = os.path.join(self.temp_folder, "vouchers.db")
+
+        store = SQLiteVoucherStore(db_path, key)
+        row_id = store.save_voucher(voucher.to_dict(), voucher.voucher_id, "local-id", VoucherStatus.OWN.value, 100,
+                                    voucher.creator_id)
+        self.assertEqual(store.save_voucher(voucher.to_dict(), voucher.voucher_id, "local-id",
+                                            VoucherStatus.OWN.value, 100, voucher.creator_id, row_id), row_id)
+        store.update_status(row_id, VoucherStatus.TRASHED.value)
+        store.close()
+
+        store = SQLiteVoucherStore(db_path, key)
+        stored_vouchers = store.load_vouchers()
+        self.assertEqual(len(stored_vouchers), 1)
+        self.assertEqual(stored_vouchers[0][:2], (row_id, VoucherStatus.TRASHED.value))
+        self.assertEqual(MinutoVoucher.read_from_dict(stored_vouchers[0][2]), voucher)
+
+        store.delete_voucher(row_id)
+        self.assertEqual(store.load_vouchers(), [])
+        self.assertEqual(store.get_row_ids(), [])
+        store.close()
+
+
+class TestQtModels(unittest.TestCase):
+    """
+    Tests of the background tasks and table models of the Qt GUI (without windows).
+    """
+    def test_task_runner(self):
+        """
+        Test that the background tasks deliver results, progress and errors in the GUI thread
+        and that the result of a task replaced by a task with the same name is discarded.
+        """
+        import threading
+        from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+        from src.gui.qt.task_runner import TaskRunner
+
+        app = QCoreApplication.instance() or QCoreApplication([])
+        runner = TaskRunner()
+        gui_thread = threading.current_thread()
+        events = []
+
+        def count(task, n):
+            for i in range(n):
+                task.report_progress(i + 1, n)
+            return threading.current_thread() is not gui_thread
+
+        blocker = threading.Event()
+        runner.start(blocker.wait, 5, name="list", on_result=lambda result: events.append(("first", result)))
+        runner.start(count, 2, name="list", with_task=True, on_result=lambda result: events.append(("second", result)),
+                     on_progress=lambda done, total: events.append((done, total)))
+        runner.start(lambda: 1 / 0, on_error=lambda message: events.append(("error", message)),
+                     on_finished=lambda: events.append("finished"))
+        blocker.set()
+
+        loop = QEventLoop()
+        runner.thread_pool.waitForDone()
+        QTimer.singleShot(0, loop.quit)
+        loop.exec()
+        self.assertEqual(events, [(1, 2), (2, 2), ("second", True), ("error", "division by zero"), "finished"])
+        self.assertFalse(runner.is_running("list"))
+
+    def test_object_table_model(self):
+        """
+        Test that the cells of the object table model are computed only when requested, that set_objects
+        updates the rows incrementally and that new rows are inserted in the sort order.
+        """
+        from PySide6.QtCore import QCoreApplication, Qt
+        from src.gui.qt.table_models import ObjectTableModel, TableColumn
+
+        app = QCoreApplication.instance() or QCoreApplication([])
+        computed = []
+
+        def balance(item):
+            computed.append(item['name'])
+            return item['balance']
+
+        model = ObjectTableModel([TableColumn("Name", lambda item: item['name']), TableColumn("Betrag", balance)])
+        items = [{'name': name, 'balance': float(balance)} for name, balance in [("b", 3), ("a", 10), ("c", 2)]]
+        inserted, removed = [], []
+        model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+        model.rowsRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+
+        model.set_objects(items)
+        self.assertEqual(model.rowCount(), 3)
+        self.assertEqual(computed, [])
+        self.assertEqual(model.index(1, 1).data(), "10.00")
+        self.assertEqual(model.index(1, 1).data(Qt.UserRole), 10.0)
+        model.index(1, 1).data()
+        self.assertEqual(computed, ["a"])
+
+        model.sort(1, Qt.DescendingOrder)
+        self.assertEqual([model.index(row, 0).data() for row in range(3)], ["a", "b", "c"])
+
+        # remove one item and add a new one, only the changed rows are inserted and removed
+        new_item = {'name': "d", 'balance': 5.0}
+        model.set_objects([items[0], items[1], new_item])
+        self.assertEqual(inserted, [(0, 2), (2, 2)])
+        self.assertEqual(removed, [(2, 2)])
+        self.assertEqual([model.index(row, 0).data() for row in range(3)], ["a", "d", "b"])
+        self.assertIs(model.object_at(1), new_item)
+
+        # a single object is inserted at the row of the sort order
+        model.insert_objects([{'name': "e", 'balance': 4.0}], row=0)
+        self.assertEqual([model.index(row, 0).data() for row in range(4)], ["a", "d", "e", "b"])
+        self.assertEqual(inserted[-1], (2, 2))
+
+    def test_filter_proxy_model(self):
+        """
+        Test that the filter proxy model matches all words in the visible columns, narrows refined filters
+        to the previous matches and rebuilds its search index when the model changes.
+        """
+        from unittest import mock
+        from PySide6.QtCore import QCoreApplication
+        from src.gui.qt.table_models import ObjectTableModel, TableColumn, CustomSortFilterProxyModel
+
+        app = QCoreApplication.instance() or QCoreApplication([])
+        model = ObjectTableModel([TableColumn("Name", lambda item: item['name']),
+                                  TableColumn("Region", lambda item: item['region'])])
+        model.set_objects([{'name': "Anna", 'region': "Bernau"}, {'name': "Bernd", 'region': "Hamburg"},
+                           {'name': "Hanna", 'region': "Bern"}])
+        proxy = CustomSortFilterProxyModel()
+        proxy.setSourceModel(model)
+        proxy.set_visible_columns([0, 1])
+
+        def names():
+            return sorted(proxy.index(row, 0).data() for row in range(proxy.rowCount()))
+
+        proxy.set_filter_text("ber", delay=False)
+        self.assertEqual(names(), ["Anna", "Bernd", "Hanna"])
+        with mock.patch.object(proxy, 'build_search_index', wraps=proxy.build_search_index) as build:
+            proxy.set_filter_text("ANNA bern", delay=False)
+            self.assertEqual(names(), ["Anna", "Hanna"])
+            proxy.set_filter_text("hanna bern", delay=False)
+            self.assertEqual(names(), ["Hanna"])
+            build.assert_not_called()
+
+        # only the visible columns are searched
+        proxy.set_visible_columns([0])
+        self.assertEqual(names(), [])
+
+        # a delayed filter text is applied once after the delay (or when requested)
+        proxy.set_filter_text("a", delay=True)
+        proxy.set_filter_text("an", delay=True)
+        self.assertEqual(names(), [])
+        proxy.apply_pending_filter_text()
+        self.assertEqual(names(), ["Anna", "Hanna"])
+
+        # changes of the model are filtered with a new search index
+        model.insert_objects([{'name': "Jan", 'region': "Kiel"}])
+        self.assertEqual(names(), ["Anna", "Hanna", "Jan"])
+
+
 if __name__ == '__main__':
     unittest.main()